@@ -0,0 +1,32 @@
+"""
+Add composite indexes for the company applicants view (keyset pagination and sorting)
+
+applications: (job_id, status, applied_at) and (job_id, applied_at)
+students: (cgpa, id), (ats_score, id), (full_name, id)
+"""
+from app import app, db
+from sqlalchemy import text
+
+INDEXES = [
+    ('applications', 'idx_job_status_applied', 'job_id, status, applied_at'),
+    ('applications', 'idx_job_applied', 'job_id, applied_at'),
+    ('students', 'idx_student_cgpa', 'cgpa, id'),
+    ('students', 'idx_student_ats', 'ats_score, id'),
+    ('students', 'idx_student_name', 'full_name, id'),
+]
+
+with app.app_context():
+    try:
+        for table, name, columns in INDEXES:
+            result = db.session.execute(text(f"SHOW INDEX FROM {table} WHERE Key_name = '{name}'"))
+            if not result.fetchone():
+                print(f"Adding {name} on {table}...")
+                db.session.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+                db.session.commit()
+                print(f"✓ Added {name}")
+            else:
+                print(f"✓ {name} already exists")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,40 @@
+"""
+Create the background_jobs table used by the in-process job queue
+"""
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW TABLES LIKE 'background_jobs'"))
+        if not result.fetchone():
+            print("Creating background_jobs table...")
+            db.session.execute(text("""
+                CREATE TABLE background_jobs (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    job_type VARCHAR(50) NOT NULL,
+                    status ENUM('Queued', 'Running', 'Succeeded', 'Failed') NOT NULL DEFAULT 'Queued',
+                    payload JSON,
+                    result JSON,
+                    error TEXT,
+                    user_id INT NULL,
+                    attempts INT NOT NULL DEFAULT 0,
+                    max_attempts INT NOT NULL DEFAULT 3,
+                    timeout_seconds INT NOT NULL,
+                    next_run_at DATETIME NULL,
+                    lease_expires_at DATETIME NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    started_at DATETIME,
+                    finished_at DATETIME,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+                    INDEX idx_job_status_type (status, job_type, next_run_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created background_jobs table")
+        else:
+            print("✓ background_jobs table already exists")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
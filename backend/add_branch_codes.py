@@ -0,0 +1,52 @@
+"""
+Add canonical branch codes: students.branch_code and the job_eligible_branches join table
+
+Backfills codes for existing students and jobs, and rewrites JSON-array
+eligible_branches (written by the drive wizard) to the comma separated form.
+Re-run after bulk-loading students or jobs with SQL seed scripts.
+"""
+from app import app, db
+from sqlalchemy import text
+from models import Job
+from branches import format_eligible_branches, refresh_branch_codes
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW COLUMNS FROM students LIKE 'branch_code'"))
+        if not result.fetchone():
+            print("Adding branch_code column...")
+            db.session.execute(text("ALTER TABLE students ADD COLUMN branch_code VARCHAR(20) NULL AFTER branch"))
+            db.session.execute(text("CREATE INDEX idx_branch_code ON students (branch_code)"))
+            db.session.commit()
+            print("✓ Added branch_code column")
+        else:
+            print("✓ branch_code column already exists")
+
+        result = db.session.execute(text("SHOW TABLES LIKE 'job_eligible_branches'"))
+        if not result.fetchone():
+            print("Creating job_eligible_branches table...")
+            db.session.execute(text("""
+                CREATE TABLE job_eligible_branches (
+                    job_id INT NOT NULL,
+                    branch_code VARCHAR(20) NOT NULL,
+                    PRIMARY KEY (job_id, branch_code),
+                    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+                    INDEX idx_branch_job (branch_code, job_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created job_eligible_branches table")
+        else:
+            print("✓ job_eligible_branches table already exists")
+
+        rewritten = 0
+        for job in Job.query.filter(Job.eligible_branches.like('[%')).all():
+            job.eligible_branches = format_eligible_branches(job.eligible_branches)
+            rewritten += 1
+        refresh_branch_codes()
+        db.session.commit()
+        print(f"✓ Backfilled branch codes ({rewritten} JSON eligible_branches rewritten)")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,22 @@
+"""
+Add the (session_id, status, application_deadline, id) index behind the student job feed's keyset pagination
+"""
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW INDEX FROM jobs WHERE Key_name = 'idx_job_feed'"))
+        if not result.fetchone():
+            print("Adding idx_job_feed index...")
+            db.session.execute(text(
+                "CREATE INDEX idx_job_feed ON jobs (session_id, status, application_deadline, id)"
+            ))
+            db.session.commit()
+            print("✓ Added idx_job_feed index")
+        else:
+            print("✓ idx_job_feed index already exists")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,33 @@
+"""
+Create the llm_response_cache table backing the Gemini response cache
+"""
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW TABLES LIKE 'llm_response_cache'"))
+        if not result.fetchone():
+            print("Creating llm_response_cache table...")
+            db.session.execute(text("""
+                CREATE TABLE llm_response_cache (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    cache_key CHAR(64) NOT NULL UNIQUE,
+                    kind VARCHAR(50) NOT NULL,
+                    model VARCHAR(100) NOT NULL,
+                    prompt_version VARCHAR(50) NOT NULL,
+                    response JSON NOT NULL,
+                    hit_count INT DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    expires_at DATETIME NOT NULL,
+                    INDEX idx_llm_cache_expires (expires_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created llm_response_cache table")
+        else:
+            print("✓ llm_response_cache table already exists")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
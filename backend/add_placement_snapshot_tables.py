@@ -0,0 +1,66 @@
+"""
+Create the student_placement_state table, the placement_stats watermark column
+and the updated_at indexes behind incremental placement snapshots, then take
+today's snapshot
+"""
+from app import app, db
+from sqlalchemy import text
+from placement_snapshots import refresh_placement_snapshot
+
+INDEXES = [
+    ('offer_letters', 'idx_offer_updated', 'updated_at'),
+    ('applications', 'idx_application_updated', 'updated_at'),
+]
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW TABLES LIKE 'student_placement_state'"))
+        if not result.fetchone():
+            print("Creating student_placement_state table...")
+            db.session.execute(text("""
+                CREATE TABLE student_placement_state (
+                    student_id INT PRIMARY KEY,
+                    branch_code VARCHAR(20),
+                    is_placed BOOLEAN NOT NULL DEFAULT FALSE,
+                    best_ctc DECIMAL(12,2),
+                    offers INT NOT NULL DEFAULT 0,
+                    applications INT NOT NULL DEFAULT 0,
+                    refreshed_at DATETIME,
+                    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+                    INDEX idx_placement_state_branch (branch_code)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created student_placement_state table")
+        else:
+            print("✓ student_placement_state table already exists")
+
+        result = db.session.execute(text("SHOW TABLES LIKE 'placement_stats'"))
+        if not result.fetchone():
+            db.metadata.tables['placement_stats'].create(db.engine)
+            print("✓ Created placement_stats table")
+        else:
+            result = db.session.execute(text("SHOW COLUMNS FROM placement_stats LIKE 'computed_through'"))
+            if not result.fetchone():
+                db.session.execute(text("ALTER TABLE placement_stats ADD COLUMN computed_through DATETIME"))
+                db.session.commit()
+                print("✓ Added placement_stats.computed_through")
+            else:
+                print("✓ placement_stats.computed_through already exists")
+
+        for table, name, columns in INDEXES:
+            result = db.session.execute(text(f"SHOW INDEX FROM {table} WHERE Key_name = '{name}'"))
+            if not result.fetchone():
+                db.session.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+                db.session.commit()
+                print(f"✓ Added {name} index")
+            else:
+                print(f"✓ {name} index already exists")
+
+        stats, _ = refresh_placement_snapshot(full=True)
+        db.session.commit()
+        print(f"✓ Placement snapshot for {stats.date}: {stats.placed_students}/{stats.total_students} placed")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,34 @@
+"""
+Create the resume_documents table holding extracted resume text and parsed ATS features
+"""
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW TABLES LIKE 'resume_documents'"))
+        if not result.fetchone():
+            print("Creating resume_documents table...")
+            db.session.execute(text("""
+                CREATE TABLE resume_documents (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    student_id INT NOT NULL UNIQUE,
+                    resume_url VARCHAR(500),
+                    content_hash CHAR(64) NOT NULL,
+                    text LONGTEXT,
+                    features JSON,
+                    parser_version INT NOT NULL,
+                    extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created resume_documents table")
+        else:
+            print("✓ resume_documents table already exists")
+
+        print("Existing resumes are extracted lazily on their first ATS request")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
@@ -0,0 +1,81 @@
+"""
+Create/upgrade the resume_scores table used as the materialized ATS score store
+and add students.resume_hash
+"""
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW COLUMNS FROM students LIKE 'resume_hash'"))
+        if not result.fetchone():
+            print("Adding resume_hash column to students...")
+            db.session.execute(text("ALTER TABLE students ADD COLUMN resume_hash CHAR(64) NULL"))
+            db.session.commit()
+            print("✓ Added resume_hash column")
+        else:
+            print("✓ students.resume_hash column already exists")
+
+        result = db.session.execute(text("SHOW TABLES LIKE 'resume_scores'"))
+        if not result.fetchone():
+            print("Creating resume_scores table...")
+            db.session.execute(text("""
+                CREATE TABLE resume_scores (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    student_id INT NOT NULL,
+                    job_id INT NOT NULL,
+                    resume_url VARCHAR(500),
+                    resume_hash CHAR(64) NOT NULL,
+                    jd_hash CHAR(64) NOT NULL,
+                    overall_match_percentage INT,
+                    skills_match_percentage INT,
+                    experience_match_percentage INT,
+                    education_match_percentage INT,
+                    missing_keywords TEXT,
+                    matched_keywords TEXT,
+                    improvement_suggestions TEXT,
+                    level VARCHAR(50),
+                    summary TEXT,
+                    report JSON,
+                    heatmap_data JSON,
+                    assessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+                    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+                    UNIQUE KEY unique_resume_job (student_id, job_id),
+                    INDEX idx_match_score (overall_match_percentage),
+                    INDEX idx_job_score (job_id, overall_match_percentage),
+                    INDEX idx_student (student_id),
+                    INDEX idx_job (job_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created resume_scores table")
+        else:
+            # Table from schema_enhancements.sql predates the hash-keyed store
+            columns_to_add = [
+                ('resume_hash', "CHAR(64) NOT NULL DEFAULT ''"),
+                ('jd_hash', "CHAR(64) NOT NULL DEFAULT ''"),
+                ('level', 'VARCHAR(50) NULL'),
+                ('summary', 'TEXT NULL'),
+                ('report', 'JSON NULL'),
+                ('heatmap_data', 'JSON NULL')
+            ]
+            for column_name, column_def in columns_to_add:
+                result = db.session.execute(text(f"SHOW COLUMNS FROM resume_scores LIKE '{column_name}'"))
+                if not result.fetchone():
+                    print(f"Adding {column_name} column...")
+                    db.session.execute(text(f"ALTER TABLE resume_scores ADD COLUMN {column_name} {column_def}"))
+                    db.session.commit()
+                    print(f"✓ Added {column_name} column")
+                else:
+                    print(f"✓ {column_name} column already exists")
+
+            result = db.session.execute(text("SHOW INDEX FROM resume_scores WHERE Key_name = 'idx_job_score'"))
+            if not result.fetchone():
+                db.session.execute(text("CREATE INDEX idx_job_score ON resume_scores (job_id, overall_match_percentage)"))
+                db.session.commit()
+                print("✓ Added idx_job_score index")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
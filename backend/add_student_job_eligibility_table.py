@@ -0,0 +1,39 @@
+"""
+Create the student_job_eligibility table and backfill it for every student and job
+
+Re-run after bulk-loading students, jobs or batch mappings with SQL seed scripts.
+"""
+from app import app, db
+from sqlalchemy import text
+from eligibility import rebuild_eligibility
+
+with app.app_context():
+    try:
+        result = db.session.execute(text("SHOW TABLES LIKE 'student_job_eligibility'"))
+        if not result.fetchone():
+            print("Creating student_job_eligibility table...")
+            db.session.execute(text("""
+                CREATE TABLE student_job_eligibility (
+                    student_id INT NOT NULL,
+                    job_id INT NOT NULL,
+                    is_eligible BOOLEAN NOT NULL DEFAULT TRUE,
+                    reasons INT NOT NULL DEFAULT 0,
+                    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (student_id, job_id),
+                    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+                    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+                    INDEX idx_job_eligible (job_id, is_eligible)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """))
+            db.session.commit()
+            print("✓ Created student_job_eligibility table")
+        else:
+            print("✓ student_job_eligibility table already exists")
+
+        rows = rebuild_eligibility()
+        db.session.commit()
+        print(f"✓ Backfilled {rows} eligibility rows")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
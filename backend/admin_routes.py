@@ -4,36 +4,32 @@ Comprehensive management and analytics endpoints for admin users
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, StudentVerification, StudentBlacklist, Department, BatchYear, Skill, PlacementStats, CompanyVisit, Student, User, Application, OfferLetter, Job
+from models import db, StudentVerification, StudentBlacklist, Department, BatchYear, Skill, CompanyVisit, Student, User, Application, OfferLetter, Job
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_, case
+from sqlalchemy import func, and_, case
 from sqlalchemy.orm import aliased
 import json
+from auth import roles_required, get_user_id, ROLE_ADMIN
+from branches import normalize_branch, refresh_branch_codes
+from eligibility import refresh_job_eligibility
+from job_queue import submit_job, job_accepted
+from analytics import placement_analytics, student_placement_snapshot
+from placement_snapshots import latest_placement_snapshot, placement_trend
+from schedule_conflicts import find_conflicts
+from analytics_cache import cached_view
+from job_feed import parse_date
+from exports import (EXPORT_FORMATS, STUDENT_EXPORT_COLUMNS, DEFAULT_STUDENT_COLUMNS, parse_columns,
+                     export_response, json_stream_response)
 
 # Create blueprint
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
-def get_user_id():
-    """Convert JWT identity (string) to integer user_id"""
-    identity = get_jwt_identity()
-    return int(identity) if identity else None
-
-def check_admin(user_id):
-    """Verify user is admin"""
-    user = User.query.get(user_id)
-    return user and user.role_id == 3
-
-
 @admin_bp.route('/company-progress', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
+@cached_view('company_progress')
 def get_company_progress():
     """Company-wise placement progress for Companies tab"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-
         from models import Company
 
         companies = Company.query.all()
@@ -105,23 +101,19 @@ def get_company_progress():
 
 
 @admin_bp.route('/students/branch-counts', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
+@cached_view('branch_counts')
 def get_student_branch_counts():
     """Branch-wise registered/placed student counts (for Master Data -> Departments)."""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-
         # One offer per student (latest) to avoid double-counting
         latest_offer_subq = db.session.query(
             OfferLetter.student_id.label('student_id'),
             func.max(OfferLetter.id).label('offer_id')
         ).group_by(OfferLetter.student_id).subquery()
 
-        # IMPORTANT:
-        # Students may store branch as Department.code (e.g. "CSE") while the UI displays Department.name
-        # (e.g. "Computer Science & Engineering"). Join via (code OR name) so counts match Master Data.
+        # Students may store branch as Department.code (e.g. "CSE") or a spelling of Department.name
+        # (e.g. "Computer Science & Engineering"); both normalize to the department's code.
         rows = db.session.query(
             Department.name.label('branch'),
             Department.code.label('code'),
@@ -129,7 +121,7 @@ def get_student_branch_counts():
             func.sum(case((latest_offer_subq.c.offer_id.isnot(None), 1), else_=0)).label('placed_students')
         ).select_from(Department).outerjoin(
             Student,
-            or_(Student.branch == Department.code, Student.branch == Department.name)
+            Student.branch_code == Department.code
         ).outerjoin(
             latest_offer_subq,
             latest_offer_subq.c.student_id == Student.id
@@ -153,14 +145,10 @@ def get_student_branch_counts():
 
 
 @admin_bp.route('/students', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_students_list():
     """List students (optionally filtered by branch) with placement stats."""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-
         branch = request.args.get('branch')
 
         latest_offer_subq = db.session.query(
@@ -181,12 +169,8 @@ def get_students_list():
         )
 
         if branch:
-            # Accept either Department.name or Department.code.
-            dept = Department.query.filter(or_(Department.name == branch, Department.code == branch)).first()
-            if dept:
-                q = q.filter(or_(Student.branch == dept.name, Student.branch == dept.code))
-            else:
-                q = q.filter(Student.branch == branch)
+            # Accept Department.name, Department.code or any spelling of the branch
+            q = q.filter(Student.branch_code == normalize_branch(branch))
 
         q = q.order_by(Student.full_name.asc())
 
@@ -212,14 +196,10 @@ def get_students_list():
 # ==================== STUDENT VERIFICATION ENDPOINTS ====================
 
 @admin_bp.route('/verification-queue', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_verification_queue():
     """Get paginated list of students pending document verification"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         status_filter = request.args.get('status', 'Pending')
@@ -248,13 +228,11 @@ def get_verification_queue():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/verification/<int:verification_id>/approve', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def approve_student_verification(verification_id):
     """Approve student document verification and activate account"""
     try:
         user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
         
         verification = StudentVerification.query.get(verification_id)
         if not verification:
@@ -281,13 +259,11 @@ def approve_student_verification(verification_id):
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/verification/<int:verification_id>/reject', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def reject_student_verification(verification_id):
     """Reject student documents with reason"""
     try:
         user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
         
         data = request.get_json()
         rejection_reason = data.get('rejection_reason', '')
@@ -314,14 +290,10 @@ def reject_student_verification(verification_id):
 # ==================== BLACKLIST MANAGEMENT ENDPOINTS ====================
 
 @admin_bp.route('/blacklist/students', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_blacklisted_students():
     """Get list of blacklisted students"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         blacklisted = StudentBlacklist.query.filter_by(is_blacklisted=True).all()
         
         return jsonify({
@@ -332,13 +304,11 @@ def get_blacklisted_students():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/blacklist/add', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def blacklist_student():
     """Blacklist a student (freeze account)"""
     try:
         user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
         
         data = request.get_json()
         student_id = data.get('student_id')
@@ -377,14 +347,10 @@ def blacklist_student():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/blacklist/remove/<int:blacklist_id>', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def remove_student_blacklist(blacklist_id):
     """Remove student from blacklist"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         blacklist = StudentBlacklist.query.get(blacklist_id)
         if not blacklist:
             return jsonify({'error': 'Blacklist record not found'}), 404
@@ -403,14 +369,10 @@ def remove_student_blacklist(blacklist_id):
 
 # DEPARTMENTS
 @admin_bp.route('/departments', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_departments():
     """Get all departments"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         departments = Department.query.all()
         return jsonify({
             'success': True,
@@ -420,14 +382,10 @@ def get_departments():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/departments', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def add_department():
     """Add new department"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         
         # Check if exists
@@ -442,7 +400,10 @@ def add_department():
         )
         
         db.session.add(dept)
+        db.session.flush()
+        refresh_branch_codes()  # The department may claim an alias group
         db.session.commit()
+        submit_job('eligibility_rebuild', {})
         
         return jsonify({
             'success': True,
@@ -453,14 +414,10 @@ def add_department():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/departments/<int:dept_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def update_department(dept_id):
     """Update department"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         dept = Department.query.get(dept_id)
         if not dept:
             return jsonify({'error': 'Department not found'}), 404
@@ -471,7 +428,10 @@ def update_department(dept_id):
         dept.is_active = data.get('is_active', dept.is_active)
         dept.updated_at = datetime.utcnow()
         
+        db.session.flush()
+        refresh_branch_codes()
         db.session.commit()
+        submit_job('eligibility_rebuild', {})
         return jsonify({'success': True, 'data': dept.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -480,14 +440,10 @@ def update_department(dept_id):
 
 # BATCH YEARS
 @admin_bp.route('/batch-years', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_batch_years():
     """Get all batch years"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         years = BatchYear.query.all()
         return jsonify({
             'success': True,
@@ -497,14 +453,10 @@ def get_batch_years():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/batch-years', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def add_batch_year():
     """Add new batch year"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         
         if BatchYear.query.filter_by(year=data.get('year')).first():
@@ -527,14 +479,10 @@ def add_batch_year():
 
 # SKILLS
 @admin_bp.route('/skills', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_skills():
     """Get all skills"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         skills = Skill.query.all()
         return jsonify({
             'success': True,
@@ -544,14 +492,10 @@ def get_skills():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/skills', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def add_skill():
     """Add new skill"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         
         if Skill.query.filter_by(name=data.get('name')).first():
@@ -576,65 +520,11 @@ def add_skill():
 # ==================== ANALYTICS ENDPOINTS ====================
 
 @admin_bp.route('/analytics/placement-stats', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_placement_stats():
-    """Get current placement statistics"""
+    """Get current placement statistics (latest daily snapshot, see placement_snapshots.py)"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Get latest stats or calculate
-        stats = PlacementStats.query.order_by(PlacementStats.date.desc()).first()
-        
-        if not stats:
-            # Calculate from current data
-            total_students = Student.query.count()
-            
-            # Count placed students (those with selected offers)
-            placed_students = db.session.query(func.count(func.distinct(OfferLetter.student_id))).filter(
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).scalar() or 0
-            
-            unplaced = total_students - placed_students
-            
-            # Calculate package stats
-            offers = OfferLetter.query.filter(OfferLetter.status.in_(['Sent', 'Accepted'])).all()
-            packages = [float(o.annual_ctc) if o.annual_ctc else 0 for o in offers]
-            
-            highest_package = max(packages) if packages else 0
-            average_package = sum(packages) / len(packages) if packages else 0
-            
-            # Department-wise stats
-            dept_stats = {}
-            departments = Department.query.all()
-            for dept in departments:
-                dept_total = Student.query.filter_by(branch=dept.name).count()
-                dept_placed = db.session.query(func.count(func.distinct(OfferLetter.student_id))).join(
-                    Student, OfferLetter.student_id == Student.id
-                ).filter(
-                    Student.branch == dept.name,
-                    OfferLetter.status.in_(['Sent', 'Accepted'])
-                ).scalar() or 0
-                
-                dept_stats[dept.name] = {
-                    'total': dept_total,
-                    'placed': dept_placed,
-                    'placement_rate': (dept_placed / dept_total * 100) if dept_total > 0 else 0
-                }
-            
-            stats = PlacementStats(
-                date=datetime.utcnow().date(),
-                total_students=total_students,
-                placed_students=placed_students,
-                unplaced_students=unplaced,
-                highest_package=highest_package,
-                average_package=average_package,
-                department_stats=dept_stats,
-                total_companies_visiting=Job.query.filter(Job.status == 'Approved').count()
-            )
-            db.session.add(stats)
-            db.session.commit()
+        stats = latest_placement_snapshot()
         
         return jsonify({
             'success': True,
@@ -644,15 +534,50 @@ def get_placement_stats():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/analytics/placement-stats/refresh', methods=['POST'])
+@roles_required(ROLE_ADMIN)
+def refresh_placement_stats():
+    """
+    Queue a refresh of today's placement snapshot
+    
+    Expected payload (optional):
+    {
+        "full": true   // recompute every student instead of changes since the last snapshot
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        job = submit_job('placement_snapshot', {'full': bool(data.get('full'))}, user_id=get_user_id())
+        return job_accepted(job)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/analytics/placement-trend', methods=['GET'])
+@roles_required(ROLE_ADMIN)
+def get_placement_trend():
+    """
+    Placement % over time, overall and per department, from the daily snapshots
+    
+    Query params: days (default 90, max 730), department (name) to limit the series
+    """
+    try:
+        days = max(1, min(request.args.get('days', 90, type=int), 730))
+        trend = placement_trend(days, request.args.get('department'))
+        
+        return jsonify({
+            'success': True,
+            'days': days,
+            'data': trend
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/analytics/company-visits', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_company_visits():
     """Get current company visits and their status"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Get active company visits
         visits = CompanyVisit.query.filter(
             CompanyVisit.status.in_(['Scheduled', 'Ongoing'])
@@ -666,86 +591,46 @@ def get_company_visits():
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/analytics/conflict-check', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def check_scheduling_conflicts():
-    """Check for conflicting company visits (same date/time)"""
+    """
+    Check for conflicting company visits, hiring rounds and interview slots
+    
+    Query params: from / to (YYYY-MM-DD, optional) to limit the dates,
+    students=false to skip the student double-booking check.
+    """
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
+        try:
+            start_date = parse_date(request.args['from'], 'from') if request.args.get('from') else None
+            end_date = parse_date(request.args['to'], 'to') if request.args.get('to') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        include_students = request.args.get('students', 'true').lower() != 'false'
         
-        # Get all scheduled visits
-        visits = CompanyVisit.query.filter(
-            CompanyVisit.status.in_(['Scheduled', 'Ongoing'])
-        ).all()
-        
-        conflicts = []
-        
-        # Find conflicts (visits within 2 hours on same date)
-        for i, v1 in enumerate(visits):
-            for v2 in visits[i+1:]:
-                if not v1.visit_date or not v2.visit_date:
-                    continue
-
-                if v1.visit_date != v2.visit_date:
-                    continue
-
-                if v1.visit_time and v2.visit_time:
-                    dt1 = datetime.combine(v1.visit_date, v1.visit_time)
-                    dt2 = datetime.combine(v2.visit_date, v2.visit_time)
-                    time_diff_hours = abs((dt1 - dt2).total_seconds() / 3600)
-
-                    if time_diff_hours < 2:
-                        conflicts.append({
-                            'company1': v1.company.company_name if v1.company else None,
-                            'company2': v2.company.company_name if v2.company else None,
-                            'scheduled_date': v1.visit_date.isoformat(),
-                            'severity': 'Critical' if time_diff_hours < 1 else 'Warning'
-                        })
-                else:
-                    conflicts.append({
-                        'company1': v1.company.company_name if v1.company else None,
-                        'company2': v2.company.company_name if v2.company else None,
-                        'scheduled_date': v1.visit_date.isoformat(),
-                        'severity': 'Warning'
-                    })
+        result = find_conflicts(start_date, end_date, include_students)
         
         return jsonify({
             'success': True,
-            'conflicts_found': len(conflicts) > 0,
-            'conflicts': conflicts
+            'conflicts_found': len(result['conflicts']) > 0 or len(result['student_conflicts']) > 0,
+            'conflicts': result['conflicts'],
+            'student_conflicts': result['student_conflicts']
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/analytics/department-stats', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_department_stats():
     """Get placement stats by department"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        departments = Department.query.all()
-        stats = []
-        
-        for dept in departments:
-            total = Student.query.filter_by(branch=dept.name).count()
-            placed = db.session.query(func.count(func.distinct(OfferLetter.student_id))).join(
-                Student, OfferLetter.student_id == Student.id
-            ).filter(
-                Student.branch == dept.name,
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).scalar() or 0
-            
-            stats.append({
-                'department': dept.name,
-                'total_students': total,
-                'placed': placed,
-                'unplaced': total - placed,
-                'placement_rate': (placed / total * 100) if total > 0 else 0
-            })
+        placement = placement_analytics(departments=True)
+        stats = [{
+            'department': dept['name'],
+            'total_students': dept['total'],
+            'placed': dept['placed'],
+            'unplaced': dept['unplaced'],
+            'placement_rate': dept['placement_rate']
+        } for dept in placement['departments']]
         
         return jsonify({
             'success': True,
@@ -758,89 +643,60 @@ def get_department_stats():
 # ==================== REPORTS & EXPORT ====================
 
 @admin_bp.route('/reports/student-data', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def export_student_data():
-    """Export student data (for Excel or PDF)"""
+    """
+    Export student data (for Excel or PDF)
+    
+    Query params: format=json (default)|csv|xlsx, columns=comma separated
+    keys of STUDENT_EXPORT_COLUMNS. Rows come from one streamed query.
+    """
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        students = Student.query.all()
+        export_format = request.args.get('format', 'json').lower()
+        if export_format != 'json' and export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format must be one of: json, {", ".join(EXPORT_FORMATS)}'}), 400
+        try:
+            keys = parse_columns(request.args.get('columns'), STUDENT_EXPORT_COLUMNS, DEFAULT_STUDENT_COLUMNS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        data = []
-        for student in students:
-            user = User.query.get(student.user_id)
-            placed = OfferLetter.query.filter_by(student_id=student.id).first() is not None
-            
-            data.append({
-                'enrollment_number': student.enrollment_number,
-                'full_name': student.full_name,
-                'email': user.email if user else '',
-                'branch': student.branch,
-                'cgpa': float(student.cgpa),
-                'graduation_year': student.graduation_year,
-                'is_placed': 'Yes' if placed else 'No',
-                'profile_completed': 'Yes' if student.profile_completed else 'No'
-            })
+        columns = {key: STUDENT_EXPORT_COLUMNS[key] for key in keys}
+        rows = student_placement_snapshot()
+        if export_format != 'json':
+            return export_response(export_format, 'student_data', 'Students', columns, rows)
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'total_records': len(data)
-        }), 200
+        data = ({key: get(row) for key, (_, get) in columns.items()} for row in rows)
+        return json_stream_response({'success': True}, 'data', data, count_key='total_records')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/reports/placement-report', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_placement_report():
     """Get comprehensive placement report"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Calculate all stats
-        total_students = Student.query.count()
-        placed_students = db.session.query(func.count(func.distinct(OfferLetter.student_id))).filter(
-            OfferLetter.status.in_(['Sent', 'Accepted'])
-        ).scalar() or 0
-        
-        offers = OfferLetter.query.filter(OfferLetter.status.in_(['Sent', 'Accepted'])).all()
-        packages = [float(o.annual_ctc) if o.annual_ctc else 0 for o in offers]
-        
-        highest = max(packages) if packages else 0
-        average = sum(packages) / len(packages) if packages else 0
+        placement = placement_analytics(departments=True)
+        overall = placement['overall']
         
         # Department breakdown
-        dept_stats = []
-        for dept in Department.query.all():
-            total = Student.query.filter_by(branch=dept.name).count()
-            placed = db.session.query(func.count(func.distinct(OfferLetter.student_id))).join(
-                Student, OfferLetter.student_id == Student.id
-            ).filter(
-                Student.branch == dept.name,
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).scalar() or 0
-            
-            dept_stats.append({
-                'department': dept.name,
-                'total': total,
-                'placed': placed,
-                'rate': (placed / total * 100) if total > 0 else 0
-            })
+        dept_stats = [{
+            'department': dept['name'],
+            'total': dept['total'],
+            'placed': dept['placed'],
+            'rate': dept['placement_rate']
+        } for dept in placement['departments']]
         
         return jsonify({
             'success': True,
             'report': {
                 'timestamp': datetime.utcnow().isoformat(),
-                'total_students': total_students,
-                'placed_students': placed_students,
-                'unplaced_students': total_students - placed_students,
-                'placement_rate': (placed_students / total_students * 100) if total_students > 0 else 0,
-                'highest_package': float(highest),
-                'average_package': float(average),
+                'total_students': overall['total'],
+                'placed_students': overall['placed'],
+                'unplaced_students': overall['unplaced'],
+                'placement_rate': overall['placement_rate'],
+                'highest_package': overall['highest_package'],
+                'average_package': overall['average_package'],
                 'total_companies': Job.query.filter(Job.status == 'Approved').count(),
                 'department_breakdown': dept_stats
             }
@@ -852,84 +708,43 @@ def get_placement_report():
 # ==================== MISSING ENDPOINTS FOR NEW ANALYTICS ====================
 
 @admin_bp.route('/analytics', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
+@cached_view('admin_analytics')
 def get_comprehensive_analytics():
     """Get comprehensive analytics data for admin dashboard"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Calculate overall stats
-        total_students = Student.query.count()
-        placed_students = db.session.query(func.count(func.distinct(OfferLetter.student_id))).filter(
-            OfferLetter.status.in_(['Sent', 'Accepted'])
-        ).scalar() or 0
-        
-        placement_percentage = (placed_students / total_students * 100) if total_students > 0 else 0
-        
-        # Get offers data
-        offers = OfferLetter.query.filter(OfferLetter.status.in_(['Sent', 'Accepted'])).all()
-        packages = [float(o.annual_ctc) if o.annual_ctc else 0 for o in offers]
-        
-        highest_package = max(packages) if packages else 0
-        average_package = sum(packages) / len(packages) if packages else 0
+        # Overall and branch-wise placement in one GROUP BY
+        placement = placement_analytics()
+        overall = placement['overall']
+        total_students = overall['total']
+        placed_students = overall['placed']
+        placement_percentage = overall['placement_rate']
+        highest_package = overall['highest_package']
+        average_package = overall['average_package']
         
         # Get unique companies count
         total_companies = db.session.query(func.count(func.distinct(Job.company_id))).filter(
             Job.status == 'Approved'
         ).scalar() or 0
         
-        # Branch-wise stats - get unique branches from students
-        branch_wise_stats = []
-        try:
-            # First try to get from departments table
-            departments = Department.query.all()
-            branch_names = [dept.name for dept in departments] if departments else []
-        except Exception:
-            branch_names = []
-        
-        # If no departments, get unique branches from students
-        if not branch_names:
-            branch_result = db.session.query(Student.branch).distinct().all()
-            branch_names = [b[0] for b in branch_result if b[0]]
-        
-        for branch_name in branch_names:
-            total = Student.query.filter_by(branch=branch_name).count()
-            if total == 0:
-                continue
-            placed = db.session.query(func.count(func.distinct(OfferLetter.student_id))).join(
-                Student, OfferLetter.student_id == Student.id
-            ).filter(
-                Student.branch == branch_name,
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).scalar() or 0
-            
-            branch_wise_stats.append({
-                'branch': branch_name,
-                'total': total,
-                'placed': placed,
-                'percentage': (placed / total * 100) if total > 0 else 0
-            })
-        
-        # Get all students with placement info
-        students = Student.query.all()
-        students_data = []
-        for s in students:
-            offer = OfferLetter.query.filter_by(student_id=s.id).filter(
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).first()
-            
-            students_data.append({
-                'id': s.id,
-                'full_name': s.full_name,
-                'branch': s.branch,
-                'cgpa': float(s.cgpa) if s.cgpa else 0,
-                'placement_status': 'Placed' if offer else 'Unplaced',
-                'package_lpa': float(offer.annual_ctc) if offer and offer.annual_ctc else 0
-            })
-        
-        return jsonify({
+        branch_wise_stats = [{
+            'branch': branch['name'],
+            'total': branch['total'],
+            'placed': branch['placed'],
+            'percentage': branch['placement_rate']
+        } for branch in placement['branches']]
+        
+        # All students with their best offer, streamed from one query
+        students_data = ({
+            'id': s.id,
+            'full_name': s.full_name,
+            'branch': s.branch,
+            'cgpa': float(s.cgpa) if s.cgpa else 0,
+            'placement_status': 'Placed' if s.offer_id else 'Unplaced',
+            'package_lpa': float(s.package) if s.package else 0
+        } for s in student_placement_snapshot())
+        
+        return json_stream_response({
             'success': True,
             'overall': {
                 'total_students': total_students,
@@ -940,22 +755,17 @@ def get_comprehensive_analytics():
                 'average_package': round(average_package, 2),
                 'total_companies': total_companies
             },
-            'branch_wise': branch_wise_stats,
-            'students': students_data
-        }), 200
+            'branch_wise': branch_wise_stats
+        }, 'students', students_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @admin_bp.route('/applications', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_all_applications():
     """Get all applications for analytics"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         applications = Application.query.all()
         
         apps_data = []
@@ -987,14 +797,10 @@ def get_all_applications():
 
 
 @admin_bp.route('/jobs', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_all_jobs():
     """Get all jobs for analytics"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         jobs = Job.query.all()
         
         jobs_data = []
@@ -1023,14 +829,10 @@ def get_all_jobs():
 
 
 @admin_bp.route('/companies', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_all_companies():
     """Get all companies for analytics"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         from models import Company
         companies = Company.query.all()
         
@@ -1053,14 +855,10 @@ def get_all_companies():
 
 
 @admin_bp.route('/pending-jobs', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_pending_jobs():
     """Get jobs pending admin approval"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         pending_jobs = Job.query.filter_by(status='Pending').all()
         
         jobs_data = []
@@ -1087,14 +885,10 @@ def get_pending_jobs():
 
 
 @admin_bp.route('/approve-job/<int:job_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def approve_or_reject_job(job_id):
     """Approve or reject a job posting"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         new_status = data.get('status')  # 'Approved' or 'Rejected'
         
@@ -1103,6 +897,8 @@ def approve_or_reject_job(job_id):
             return jsonify({'error': 'Job not found'}), 404
         
         job.status = new_status
+        if new_status == 'Approved':
+            refresh_job_eligibility(job)
         db.session.commit()
         
         return jsonify({
@@ -1115,14 +911,10 @@ def approve_or_reject_job(job_id):
 
 
 @admin_bp.route('/announcements', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_announcements():
     """Get all announcements"""
     try:
-        user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         from models import Announcement
         announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
         
@@ -1145,13 +937,11 @@ def get_announcements():
 
 
 @admin_bp.route('/announcements', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def create_announcement():
     """Create a new announcement"""
     try:
         user_id = get_user_id()
-        if not check_admin(user_id):
-            return jsonify({'error': 'Unauthorized'}), 403
         
         data = request.get_json()
         
@@ -1174,3 +964,56 @@ def create_announcement():
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+
+# ==================== LLM RESPONSE CACHE ====================
+
+@admin_bp.route('/llm-cache/stats', methods=['GET'])
+@roles_required(ROLE_ADMIN)
+def get_llm_cache_stats():
+    """Hit/miss metrics for the Gemini response cache"""
+    try:
+        import llm_cache
+        return jsonify({'success': True, 'data': llm_cache.get_stats()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/analytics-cache/stats', methods=['GET'])
+@roles_required(ROLE_ADMIN)
+def get_analytics_cache_stats():
+    """Per key family hit/miss/invalidation metrics for the dashboard cache"""
+    try:
+        import analytics_cache
+        return jsonify({'success': True, 'data': analytics_cache.get_stats()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/analytics-cache/clear', methods=['POST'])
+@roles_required(ROLE_ADMIN)
+def clear_analytics_cache():
+    """Drop every cached dashboard (optional JSON body: {"families": [...]})"""
+    try:
+        import analytics_cache
+        families = (request.get_json(silent=True) or {}).get('families') or []
+        unknown = [f for f in families if f not in analytics_cache.FAMILY_MODELS]
+        if unknown:
+            return jsonify({'error': f'Unknown cache families: {", ".join(map(str, unknown))}'}), 400
+        analytics_cache.invalidate(*families)
+        return jsonify({'success': True, 'cleared': families or list(analytics_cache.FAMILY_MODELS)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/llm-cache/purge', methods=['POST'])
+@roles_required(ROLE_ADMIN)
+def purge_llm_cache():
+    """Delete expired Gemini cache entries"""
+    try:
+        import llm_cache
+        removed = llm_cache.purge_expired()
+        return jsonify({'success': True, 'removed': removed}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
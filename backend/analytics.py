@@ -0,0 +1,179 @@
+"""
+Placement analytics aggregates shared by the admin dashboards
+
+Every figure comes from one GROUP BY over students left-joined with their
+best placed offer (one row per student), grouped by canonical branch code,
+so the cost is one statement however many branches or departments exist.
+Overall totals are sums of the branch rows.
+
+A student is placed when they hold an offer in PLACED_OFFER_STATUSES; their
+package is the highest annual CTC among those offers. Average package is
+over placed students with a known CTC. student_placement_snapshot lists every
+student with that best offer for exports and dashboards.
+"""
+
+from sqlalchemy import and_, func
+
+from models import db, Student, User, Company, OfferLetter, Department
+
+PLACED_OFFER_STATUSES = ('Sent', 'Accepted')
+SNAPSHOT_CHUNK_ROWS = 1000
+
+
+def best_offer_subquery(student_ids=None):
+    """Per placed student (limited to student_ids when given): offer count, latest offer id and best annual CTC"""
+    query = db.session.query(
+        OfferLetter.student_id.label('student_id'),
+        func.count(OfferLetter.id).label('offers'),
+        func.max(OfferLetter.id).label('latest_offer_id'),
+        func.max(OfferLetter.annual_ctc).label('best_ctc')
+    ).filter(OfferLetter.status.in_(PLACED_OFFER_STATUSES))
+    if student_ids is not None:
+        query = query.filter(OfferLetter.student_id.in_(student_ids))
+    return query.group_by(OfferLetter.student_id).subquery()
+
+
+def _number(value):
+    return float(value) if value is not None else 0
+
+
+def _rate(placed, total):
+    return (placed / total * 100) if total > 0 else 0
+
+
+def _summary(total, placed, offers, highest, package_sum, package_count):
+    return {
+        'total': total,
+        'placed': placed,
+        'unplaced': total - placed,
+        'placement_rate': _rate(placed, total),
+        'offers': offers,
+        'highest_package': highest,
+        'average_package': package_sum / package_count if package_count else 0,
+        'package_sum': package_sum,
+        'package_count': package_count
+    }
+
+
+def placement_by_branch():
+    """
+    Placement summary per branch that has students, in one GROUP BY
+
+    Each entry: code, name (Department name when the code has one),
+    total, placed, unplaced, placement_rate, offers, highest_package and
+    average_package.
+    """
+    offers = best_offer_subquery()
+    rows = db.session.query(
+        Student.branch_code.label('code'),
+        Department.name.label('department_name'),
+        func.max(Student.branch).label('branch'),
+        func.count(Student.id).label('total'),
+        func.count(offers.c.student_id).label('placed'),
+        func.coalesce(func.sum(offers.c.offers), 0).label('offers'),
+        func.max(offers.c.best_ctc).label('highest'),
+        func.sum(offers.c.best_ctc).label('package_sum'),
+        func.count(offers.c.best_ctc).label('package_count')
+    ).outerjoin(
+        offers, offers.c.student_id == Student.id
+    ).outerjoin(
+        Department, Department.code == Student.branch_code
+    ).group_by(Student.branch_code, Department.name).order_by(Student.branch_code).all()
+    return branch_summaries(rows)
+
+
+def branch_summaries(rows):
+    """
+    Summaries from grouped rows labelled code, department_name, branch, total,
+    placed, offers, highest, package_sum and package_count
+    """
+    branches = []
+    for row in rows:
+        summary = _summary(int(row.total), int(row.placed), int(row.offers), _number(row.highest),
+                           _number(row.package_sum), int(row.package_count))
+        summary['code'] = row.code
+        summary['name'] = row.department_name or row.branch or row.code or 'Unknown'
+        branches.append(summary)
+    return branches
+
+
+def overall_placement(branches):
+    """Campus-wide summary from placement_by_branch() rows"""
+    return _summary(
+        sum(b['total'] for b in branches),
+        sum(b['placed'] for b in branches),
+        sum(b['offers'] for b in branches),
+        max((b['highest_package'] for b in branches), default=0),
+        sum(b['package_sum'] for b in branches),
+        sum(b['package_count'] for b in branches)
+    )
+
+
+def placement_by_department(branches):
+    """One entry per Department (zeros when it has no students), from placement_by_branch() rows"""
+    by_code = {b['code']: b for b in branches}
+    result = []
+    for dept in Department.query.order_by(Department.name).all():
+        summary = by_code.get(dept.code) or _summary(0, 0, 0, 0, 0, 0)
+        result.append(dict(summary, code=dept.code, name=dept.name))
+    return result
+
+
+def placement_analytics(departments=False):
+    """
+    {'overall', 'branches'} and, with departments=True, 'departments'
+
+    Two statements at most: the branch GROUP BY and the department list.
+    """
+    branches = placement_by_branch()
+    result = {'overall': overall_placement(branches), 'branches': branches}
+    if departments:
+        result['departments'] = placement_by_department(branches)
+    return result
+
+
+def student_placement_snapshot():
+    """
+    Every student with their email and best placed offer, in one statement
+
+    Row columns: id, full_name, enrollment_number, branch, branch_code, cgpa,
+    graduation_year, profile_completed, email, offer_id, package (annual
+    CTC), designation, offer_status and company_name; the offer columns are
+    NULL for unplaced students. The best offer is the highest annual CTC
+    (latest offer on a tie). Rows are streamed in SNAPSHOT_CHUNK_ROWS batches.
+    """
+    ranked = db.session.query(
+        OfferLetter.id.label('offer_id'),
+        OfferLetter.student_id.label('student_id'),
+        OfferLetter.company_id.label('company_id'),
+        OfferLetter.annual_ctc.label('package'),
+        OfferLetter.designation.label('designation'),
+        OfferLetter.status.label('offer_status'),
+        func.row_number().over(
+            partition_by=OfferLetter.student_id,
+            order_by=[OfferLetter.annual_ctc.is_(None), OfferLetter.annual_ctc.desc(), OfferLetter.id.desc()]
+        ).label('offer_rank')
+    ).filter(OfferLetter.status.in_(PLACED_OFFER_STATUSES)).subquery()
+
+    return db.session.query(
+        Student.id,
+        Student.full_name,
+        Student.enrollment_number,
+        Student.branch,
+        Student.branch_code,
+        Student.cgpa,
+        Student.graduation_year,
+        Student.profile_completed,
+        User.email,
+        ranked.c.offer_id,
+        ranked.c.package,
+        ranked.c.designation,
+        ranked.c.offer_status,
+        Company.company_name
+    ).outerjoin(
+        User, Student.user_id == User.id
+    ).outerjoin(
+        ranked, and_(ranked.c.student_id == Student.id, ranked.c.offer_rank == 1)
+    ).outerjoin(
+        Company, Company.id == ranked.c.company_id
+    ).order_by(Student.id).yield_per(SNAPSHOT_CHUNK_ROWS)
@@ -0,0 +1,377 @@
+"""
+Read-through cache for the admin analytics dashboards
+
+Dashboard views are cached whole (their 200 response bodies) per key family
+under a generation number. Writing one of a family's FAMILY_MODELS bumps the
+family's generation, so its old entries can no longer be found and simply
+age out of the backend. Writes are noticed in after_flush (new, dirty and
+deleted instances) and the generations are bumped after the commit, so a
+dashboard recomputed between the flush and the commit cannot store
+pre-commit figures under the new generation. Bulk writes that bypass the
+unit of work (bulk_update_mappings, Query.update) call mark_changed().
+
+Backends (ANALYTICS_CACHE_BACKEND):
+- memory: TTL-LRU in this process (default); other gunicorn workers keep
+  their entries until the TTL runs out
+- redis: a Redis-protocol server at ANALYTICS_CACHE_URL shared by every
+  worker (fake_redis.py is a local stand-in)
+- off: no caching
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from urllib.parse import urlparse
+
+from flask import Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Student, User, Company, Job, Application, OfferLetter, Department
+
+ANALYTICS_CACHE_BACKEND = os.getenv('ANALYTICS_CACHE_BACKEND', 'memory')
+ANALYTICS_CACHE_URL = os.getenv('ANALYTICS_CACHE_URL', 'redis://localhost:6379/0')
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv('ANALYTICS_CACHE_TTL_SECONDS', '600'))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYTICS_CACHE_MAX_ENTRIES', '256'))
+ANALYTICS_CACHE_TIMEOUT_SECONDS = float(os.getenv('ANALYTICS_CACHE_TIMEOUT_SECONDS', '0.5'))
+
+KEY_PREFIX = 'analytics'
+
+# Key family -> models whose writes make its cached views stale
+FAMILY_MODELS = {
+    'admin_analytics': (Student, Application, OfferLetter, Job, Department, Company, User),
+    'company_progress': (Company, Job, Application, OfferLetter),
+    'branch_counts': (Student, OfferLetter, Department),
+}
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'errors': 0})
+
+
+def _count(family, field):
+    with _stats_lock:
+        _stats[family][field] += 1
+
+
+class CacheBackendError(Exception):
+    """The cache server answered with an error"""
+
+
+class MemoryBackend:
+    """TTL-LRU of up to max_entries values; generation counters are kept apart and never evicted"""
+    name = 'memory'
+
+    def __init__(self, max_entries=ANALYTICS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def info(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+class RedisBackend:
+    """
+    Redis-protocol (RESP) client over a plain socket, one connection per thread
+
+    Uses only GET, SET ... EX, INCR and PING, so any Redis-compatible server
+    works. url: redis://[:password@]host:port/db.
+    """
+    name = 'redis'
+
+    def __init__(self, url=ANALYTICS_CACHE_URL, timeout=ANALYTICS_CACHE_TIMEOUT_SECONDS):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db_index = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._send('AUTH', self.password)
+        if self.db_index:
+            self._send('SELECT', self.db_index)
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _send(self, *args):
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._local.sock.sendall(b''.join(parts))
+        return self._reply()
+
+    def _reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Cache server closed the connection')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise CacheBackendError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError('Cache server closed the connection')
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self._reply() for _ in range(length)]
+        raise CacheBackendError(f'Unexpected reply {line[:20]!r}')
+
+    def command(self, *args):
+        """Send one command and return its reply, reconnecting once on a dropped connection"""
+        for attempt in (1, 2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._send(*args)
+            except CacheBackendError:
+                raise
+            except OSError:
+                self._close()
+                if attempt == 2:
+                    raise
+
+    def get(self, key):
+        return self.command('GET', key)
+
+    def set(self, key, value, ttl):
+        self.command('SET', key, value, 'EX', max(1, int(ttl)))
+
+    def counter(self, key):
+        value = self.command('GET', key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        return self.command('INCR', key)
+
+    def info(self):
+        return {'url': f'redis://{self.host}:{self.port}/{self.db_index}', 'ping': self.command('PING')}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(name=ANALYTICS_CACHE_BACKEND):
+    """Backend for name ('memory', 'redis' or 'off'/'none', which returns None)"""
+    if name == 'memory':
+        return MemoryBackend()
+    if name == 'redis':
+        return RedisBackend()
+    if name in ('off', 'none', ''):
+        return None
+    raise ValueError(f'Unknown ANALYTICS_CACHE_BACKEND {name!r}')
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_backend() or False
+    return _backend or None
+
+
+def use_backend(backend):
+    """Replace the process backend (None turns caching off)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend or False
+
+
+def _generation_key(family):
+    return f'{KEY_PREFIX}:gen:{family}'
+
+
+def _entry_key(family, generation, variant):
+    return f'{KEY_PREFIX}:{family}:{generation}:{variant}'
+
+
+def _encode(mimetype, body):
+    return mimetype.encode() + b'\n' + body
+
+
+def _cached_response(value):
+    mimetype, body = value.split(b'\n', 1)
+    response = Response(body, mimetype=mimetype.decode())
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+def _store(backend, family, key, value):
+    try:
+        backend.set(key, value, ANALYTICS_CACHE_TTL_SECONDS)
+        _count(family, 'stores')
+    except (OSError, CacheBackendError):
+        _count(family, 'errors')
+
+
+def _store_when_complete(chunks, backend, family, key, mimetype):
+    """Pass a streamed body through and store it once the last chunk went out"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk.encode() if isinstance(chunk, str) else chunk)
+        yield chunk
+    _store(backend, family, key, _encode(mimetype, b''.join(parts)))
+
+
+def cached_view(family):
+    """
+    Serve a view's 200 responses from the cache, keyed by family and the request path and query string
+
+    Goes below the auth decorator: every caller allowed in sees the same
+    body. Streamed responses are still streamed on a miss and stored once
+    complete. A cache server that is down only costs the lookup timeout.
+    """
+    if family not in FAMILY_MODELS:
+        raise ValueError(f'Unknown analytics cache family {family!r}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            if backend is None:
+                return view(*args, **kwargs)
+            try:
+                key = _entry_key(family, backend.counter(_generation_key(family)), request.full_path)
+                value = backend.get(key)
+            except (OSError, CacheBackendError):
+                _count(family, 'errors')
+                return view(*args, **kwargs)
+            if value is not None:
+                _count(family, 'hits')
+                return _cached_response(value)
+
+            _count(family, 'misses')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                response.response = _store_when_complete(response.response, backend, family, key, response.mimetype)
+            else:
+                _store(backend, family, key, _encode(response.mimetype, response.get_data()))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate(*families):
+    """Bump the generation of families (every family when none given) right away"""
+    backend = get_backend()
+    for family in families or FAMILY_MODELS:
+        _count(family, 'invalidations')
+        if backend is None:
+            continue
+        try:
+            backend.incr(_generation_key(family))
+        except (OSError, CacheBackendError):
+            _count(family, 'errors')
+
+
+def _families_for(models):
+    return {family for family, family_models in FAMILY_MODELS.items()
+            if any(issubclass(model, family_models) for model in models)}
+
+
+def mark_changed(*models, session=None):
+    """Invalidate the families reading models when session (db.session) commits; for bulk writes"""
+    session = session or db.session
+    session.info.setdefault('analytics_cache_families', set()).update(_families_for(models))
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_flushed_changes(session, flush_context):
+    models = {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    families = _families_for(models)
+    if families:
+        session.info.setdefault('analytics_cache_families', set()).update(families)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    families = session.info.pop('analytics_cache_families', None)
+    if families:
+        invalidate(*families)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('analytics_cache_families', None)
+
+
+def get_stats():
+    """Per-family hit/miss/store/invalidation counters for this process, current generations and backend info"""
+    with _stats_lock:
+        families = {family: dict(_stats[family]) for family in FAMILY_MODELS}
+    backend = get_backend()
+    for family, counts in families.items():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+        try:
+            counts['generation'] = backend.counter(_generation_key(family)) if backend else None
+        except (OSError, CacheBackendError):
+            counts['generation'] = None
+
+    info = {'name': backend.name if backend else 'off'}
+    if backend:
+        try:
+            info.update(backend.info())
+        except (OSError, CacheBackendError) as e:
+            info['error'] = str(e)
+    return {'backend': info, 'ttl_seconds': ANALYTICS_CACHE_TTL_SECONDS, 'families': families}
@@ -3,16 +3,22 @@ from datetime import timedelta, datetime
 from pathlib import Path
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
 from dotenv import load_dotenv
 from models import db, User, Student, Company, Job, Application, Announcement, StudentVerification
-from models import HiringRound, ApplicationRound, OfferLetter
+from models import HiringRound, ApplicationRound
 from sqlalchemy import func, or_, and_
-import openpyxl
-from io import BytesIO
 from werkzeug.security import generate_password_hash, check_password_hash
 from firebase_config import FirebaseConfig
 from firebase_adapter import FirebaseAdapter
+from branches import normalize_branch, format_eligible_branches, sync_job_branches
+from eligibility import (refresh_job_eligibility, refresh_student_eligibility, student_eligibility,
+                         student_reason_messages, REASON_BATCH)
+from job_feed import feed_query, feed_page, serialize_feed
+from analytics import placement_analytics
+from analytics_cache import cached_view
+from auth import (roles_required, create_user_token, get_user_id, get_role_id, get_student_id,
+                  get_company_id, current_student, current_company, ROLE_STUDENT, ROLE_COMPANY, ROLE_ADMIN)
 
 
 def _build_sqlalchemy_database_uri() -> str:
@@ -130,66 +136,93 @@ if USE_FIREBASE:
     FirebaseConfig.initialize()
     fb = FirebaseAdapter()
 
-# Helper function to get user ID from JWT
-def get_user_id():
-    identity = get_jwt_identity()
-    if isinstance(identity, str) and identity.isdigit():
-        return int(identity)
-    return identity
+def serialize_applications(applications):
+    """
+    Serialize applications with dynamic round progress for student UI.
+    
+    Jobs with their companies, hiring rounds and round progress are loaded
+    for the whole list in three queries and grouped in memory.
+    """
+    if not applications:
+        return []
+    job_ids = {app.job_id for app in applications}
+    
+    jobs = {
+        job_id: (title, company_name)
+        for job_id, title, company_name in db.session.query(Job.id, Job.title, Company.company_name).outerjoin(
+            Company, Job.company_id == Company.id
+        ).filter(Job.id.in_(job_ids)).all()
+    }
+    
+    rounds_by_job = {}
+    for hr in HiringRound.query.filter(HiringRound.job_id.in_(job_ids)).order_by(
+        HiringRound.job_id, HiringRound.round_number
+    ).all():
+        rounds_by_job.setdefault(hr.job_id, []).append(hr)
+    
+    progress_by_app = {}
+    for pr in ApplicationRound.query.filter(ApplicationRound.application_id.in_([app.id for app in applications])).all():
+        progress_by_app.setdefault(pr.application_id, {})[pr.hiring_round_id] = pr
+    
+    payload = []
+    for app in applications:
+        job_title, company_name = jobs.get(app.job_id, (None, None))
+        hiring_rounds = rounds_by_job.get(app.job_id, [])
+        progress_map = progress_by_app.get(app.id, {})
+        
+        rounds = []
+        cleared = 0
+        for hr in hiring_rounds:
+            pr = progress_map.get(hr.id)
+            status = pr.status if pr else 'Pending'
+            cleared += 1 if status in ('Passed', 'Completed') else 0
+            rounds.append({
+                'round_id': hr.id,
+                'name': hr.round_name,
+                'sequence': hr.round_number,
+                'status': status,
+                'is_elimination_round': hr.is_elimination_round,
+                'scheduled_date': hr.scheduled_date.isoformat() if hr.scheduled_date else None,
+                'scheduled_time': str(hr.scheduled_time) if hasattr(hr, 'scheduled_time') and hr.scheduled_time else None,
+                'mode': hr.round_mode,
+                'type': hr.round_type,
+                'progress_id': pr.id if pr else None,
+            })
+        
+        total_rounds = len(hiring_rounds)
+        progress_pct = int((cleared / total_rounds) * 100) if total_rounds else 0
+        
+        payload.append({
+            'id': app.id,
+            'student_id': app.student_id,
+            'job_id': app.job_id,
+            'job_title': job_title,
+            'company_name': company_name,
+            'status': app.status,
+            'applied_at': app.applied_at.isoformat(),
+            'updated_at': app.updated_at.isoformat(),
+            'rounds': rounds,
+            'rounds_total': total_rounds,
+            'rounds_cleared': cleared,
+            'progress_pct': progress_pct,
+        })
+    return payload
 
 
 def serialize_application(app):
-    """Serialize an application with dynamic round progress for student UI."""
-    job = app.job
-    # Fetch rounds defined for this job
-    hiring_rounds = HiringRound.query.filter_by(job_id=app.job_id).order_by(HiringRound.round_number).all()
-    progress_map = {p.hiring_round_id: p for p in app.round_progresses}
-
-    rounds = []
-    cleared = 0
-    for hr in hiring_rounds:
-        pr = progress_map.get(hr.id)
-        status = pr.status if pr else 'Pending'
-        cleared += 1 if status in ('Passed', 'Completed') else 0
-        rounds.append({
-            'round_id': hr.id,
-            'name': hr.round_name,
-            'sequence': hr.round_number,
-            'status': status,
-            'is_elimination_round': hr.is_elimination_round,
-            'scheduled_date': hr.scheduled_date.isoformat() if hr.scheduled_date else None,
-            'scheduled_time': str(hr.scheduled_time) if hasattr(hr, 'scheduled_time') and hr.scheduled_time else None,
-            'mode': hr.round_mode,
-            'type': hr.round_type,
-            'progress_id': pr.id if pr else None,
-        })
-
-    total_rounds = len(hiring_rounds)
-    progress_pct = int((cleared / total_rounds) * 100) if total_rounds else 0
-
-    return {
-        'id': app.id,
-        'student_id': app.student_id,
-        'job_id': app.job_id,
-        'job_title': job.title if job else None,
-        'company_name': job.company.company_name if job and job.company else None,
-        'status': app.status,
-        'applied_at': app.applied_at.isoformat(),
-        'updated_at': app.updated_at.isoformat(),
-        'rounds': rounds,
-        'rounds_total': total_rounds,
-        'rounds_cleared': cleared,
-        'progress_pct': progress_pct,
-    }
+    """Serialize a single application (see serialize_applications)."""
+    return serialize_applications([app])[0]
 
 
 # Register blueprints
 from company_advanced_routes import company_bp
 from admin_routes import admin_bp
-from resume_routes import resume_bp, get_resume_text
+from resume_routes import resume_bp
 from learning_guide_routes import learning_guide_bp
 from hiring_rounds_routes import hiring_rounds_bp
 from session_routes import session_bp
+from job_routes import jobs_bp
+from job_queue import job_queue
 
 app.register_blueprint(company_bp)
 app.register_blueprint(admin_bp)
@@ -197,6 +230,8 @@ app.register_blueprint(resume_bp)
 app.register_blueprint(learning_guide_bp)
 app.register_blueprint(hiring_rounds_bp)
 app.register_blueprint(session_bp)
+app.register_blueprint(jobs_bp)
+job_queue.init_app(app)
 
 # ==================== Authentication Routes ====================
 
@@ -256,6 +291,7 @@ def register():
                 full_name=data['full_name'],
                 enrollment_number=data['enrollment_number'],
                 branch=data['branch'],
+                branch_code=normalize_branch(data['branch']),
                 cgpa=data['cgpa'],
                 graduation_year=data['graduation_year'],
                 current_year=data.get('current_year'),
@@ -264,6 +300,7 @@ def register():
             )
             db.session.add(student)
             db.session.flush()
+            refresh_student_eligibility(student)
             verification = StudentVerification(student_id=student.id, status='Pending')
             db.session.add(verification)
         elif data['role_id'] == 2:
@@ -297,12 +334,16 @@ def login():
             if not user.get('is_verified', False) and user.get('role_id') != 3:
                 return jsonify({'error': 'Account not verified by admin'}), 403
 
-            access_token = create_access_token(identity=str(user['id']))
             profile = None
             if user.get('role_id') == 1:
                 profile = fb.get_student_by_user_id(user['id'])
             elif user.get('role_id') == 2:
                 profile = fb.get_company_by_user_id(user['id'])
+            access_token = create_access_token(identity=str(user['id']), additional_claims={
+                'role_id': user.get('role_id'),
+                'student_id': profile.get('id') if profile and user.get('role_id') == 1 else None,
+                'company_id': profile.get('id') if profile and user.get('role_id') == 2 else None
+            })
             return jsonify({'access_token': access_token, 'user': user, 'profile': profile}), 200
 
         user = User.query.filter_by(email=data['email']).first()
@@ -310,7 +351,7 @@ def login():
             return jsonify({'error': 'Invalid email or password'}), 401
         if not user.is_verified and user.role_id != 3:
             return jsonify({'error': 'Account not verified by admin'}), 403
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_user_token(user)
         profile = None
         if user.role_id == 1:
             profile = user.student.to_dict() if user.student else None
@@ -324,7 +365,7 @@ def login():
 # ==================== Student Routes ====================
 
 @app.route('/api/student/profile', methods=['GET', 'PUT'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def student_profile():
     try:
         user_id = get_user_id()
@@ -357,10 +398,7 @@ def student_profile():
             refreshed = fb.get_student_by_user_id(str(user_id))
             return jsonify(refreshed), 200
 
-        user = User.query.get(user_id)
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        student = user.student
+        student = current_student()
         if request.method == 'GET':
             return jsonify(student.to_dict()), 200
         data = request.get_json()
@@ -386,138 +424,46 @@ def student_profile():
 
 
 @app.route('/api/student/jobs', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_student_jobs():
-    """Get all jobs with eligibility status for the student - SESSION AWARE"""
+    """
+    Approved jobs of the active session with the student's eligibility - SESSION AWARE
+    
+    Filters: job_type, eligible_only, not_applied, deadline_from/deadline_to
+    (YYYY-MM-DD), q (title, company or location). With limit or cursor the
+    response is one keyset page {jobs, next_cursor, has_more}; without them
+    it is the full list, as before.
+    """
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
-        student_branch = student.branch.lower() if student.branch else ''
-        student_cgpa = student.cgpa or 0
+        student = current_student()
         
         # Get active placement session
-        from models import PlacementSession, BatchSessionMapping
+        from models import PlacementSession
         active_session = PlacementSession.query.filter_by(status='Active').first()
         
         if not active_session:
             # Fallback to default session
             active_session = PlacementSession.query.filter_by(is_default=True).first()
         
-        # Build query with session filter
-        query = Job.query.filter(Job.status == 'Approved')
+        session_id = active_session.id if active_session else None
         
-        if active_session:
-            query = query.filter(Job.session_id == active_session.id)
-            
-            # Also filter by batch eligibility
-            if student.batch_id:
-                # Check if student's batch is eligible for this session
-                batch_eligible = BatchSessionMapping.query.filter_by(
-                    batch_id=student.batch_id,
-                    session_id=active_session.id,
-                    is_eligible=True
-                ).first()
-                
-                if not batch_eligible:
-                    # Student's batch not eligible for active session
-                    return jsonify([]), 200
-        
-        jobs = query.order_by(Job.application_deadline.asc()).all()
-        
-        # Check which jobs student has already applied to
-        applied_job_ids = [app.job_id for app in student.applications]
-        
-        jobs_data = []
-        for job in jobs:
-            job_dict = job.to_dict()
-            job_dict['has_applied'] = job.id in applied_job_ids
-            
-            # Check eligibility
-            is_eligible = True
-            eligibility_reasons = []
-            
-            # Check CGPA requirement
-            if job.min_cgpa and student_cgpa < job.min_cgpa:
-                is_eligible = False
-                eligibility_reasons.append(f"Min CGPA required: {job.min_cgpa} (Your CGPA: {student_cgpa})")
-            
-            # Check branch requirement
-            if job.eligible_branches:
-                # If branches is set to "All", skip branch check
-                if job.eligible_branches.strip().lower() != 'all':
-                    branches_list = [b.strip().lower() for b in job.eligible_branches.split(',')]
-                    student_branch_lower = student_branch.lower()
-                    
-                    # Flexible branch matching:
-                    # 1. Exact match
-                    # 2. Student branch contains any eligible branch
-                    # 3. Any eligible branch contains student branch
-                    # 4. Common abbreviations (IT = Information Technology, CS = Computer Science, ECE = Electronics)
-                    branch_aliases = {
-                        'it': ['information technology', 'it', 'i.t.', 'i.t'],
-                        'cs': ['computer science', 'cs', 'c.s.', 'cse', 'computer science and engineering'],
-                        'ece': ['electronics', 'electronics and communication', 'ece', 'e.c.e.'],
-                        'ee': ['electrical', 'electrical engineering', 'ee', 'e.e.'],
-                        'me': ['mechanical', 'mechanical engineering', 'me', 'm.e.'],
-                        'ce': ['civil', 'civil engineering', 'ce', 'c.e.'],
-                    }
-                    
-                    branch_match = False
-                    
-                    # Direct check
-                    for eligible_branch in branches_list:
-                        if student_branch_lower == eligible_branch:
-                            branch_match = True
-                            break
-                        if student_branch_lower in eligible_branch or eligible_branch in student_branch_lower:
-                            branch_match = True
-                            break
-                    
-                    # Alias check if no direct match
-                    if not branch_match:
-                        for alias_key, aliases in branch_aliases.items():
-                            # If student branch matches any alias
-                            student_in_alias = student_branch_lower in aliases or any(a in student_branch_lower for a in aliases)
-                            if student_in_alias:
-                                # Check if any eligible branch matches the same alias group
-                                for eligible_branch in branches_list:
-                                    if eligible_branch in aliases or any(a in eligible_branch for a in aliases):
-                                        branch_match = True
-                                        break
-                            if branch_match:
-                                break
-                    
-                    if not branch_match:
-                        is_eligible = False
-                        eligibility_reasons.append(f"Branch not eligible. Required: {job.eligible_branches}")
-            
-            job_dict['is_eligible'] = is_eligible
-            job_dict['eligibility_reasons'] = eligibility_reasons
-            jobs_data.append(job_dict)
-        
-        return jsonify(jobs_data), 200
+        try:
+            if 'limit' in request.args or 'cursor' in request.args:
+                return jsonify(feed_page(student, session_id, request.args)), 200
+            return jsonify(serialize_feed(student, feed_query(student, session_id, request.args).all(), request.args)), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/student/apply/<int:job_id>', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def apply_to_job(job_id):
     """Apply to a job - SESSION AWARE"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         # Check if profile is completed
         if not student.profile_completed:
@@ -528,17 +474,15 @@ def apply_to_job(job_id):
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
-        # SESSION VALIDATION: Check if student's batch is eligible for this job's session
-        if job.session_id and student.batch_id:
-            from models import BatchSessionMapping
-            batch_eligible = BatchSessionMapping.query.filter_by(
-                batch_id=student.batch_id,
-                session_id=job.session_id,
-                is_eligible=True
-            ).first()
-            
-            if not batch_eligible:
-                return jsonify({'error': 'Your batch is not eligible for this placement session'}), 403
+        # SESSION VALIDATION and CGPA/branch criteria, from the eligibility table
+        reasons = student_eligibility(student, [job])[job.id]
+        if reasons & REASON_BATCH:
+            return jsonify({'error': 'Your batch is not eligible for this placement session'}), 403
+        if reasons:
+            return jsonify({
+                'error': 'You are not eligible for this job',
+                'reasons': student_reason_messages(reasons, job, student)
+            }), 403
         
         # Check if already applied
         existing = Application.query.filter_by(
@@ -584,19 +528,13 @@ def apply_to_job(job_id):
 
 
 @app.route('/api/student/applications', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_student_applications():
     """Get all applications of the student"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        applications = user.student.applications
-        # Serialize with dynamic round progress
-        payload = [serialize_application(app) for app in applications]
+        applications = current_student().applications
+        # Serialize with dynamic round progress (fixed number of queries)
+        payload = serialize_applications(applications)
         return jsonify(payload), 200
         
     except Exception as e:
@@ -604,16 +542,10 @@ def get_student_applications():
 
 
 @app.route('/api/student/company-visits', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_company_visits():
     """Get upcoming company visits/drives"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Try to get from database, return empty list if table doesn't exist
         try:
             from models import CompanyVisit
@@ -629,21 +561,15 @@ def get_company_visits():
 
 
 @app.route('/api/student/notifications', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_student_notifications():
     """Get student's notifications"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Try to get from database, return empty list if table doesn't exist
         try:
             from models import Notification
             notifications = Notification.query.filter_by(
-                student_id=user.student.id
+                student_id=get_student_id()
             ).order_by(Notification.created_at.desc()).limit(20).all()
             return jsonify([n.to_dict() for n in notifications]), 200
         except:
@@ -654,16 +580,10 @@ def get_student_notifications():
 
 
 @app.route('/api/student/interview-experiences', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_interview_experiences():
     """Get community shared interview experiences"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Try to get from database, return empty list if table doesn't exist
         try:
             from models import InterviewExperience
@@ -681,17 +601,11 @@ def get_interview_experiences():
 # ==================== Company Routes ====================
 
 @app.route('/api/company/profile', methods=['GET', 'PUT'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def company_profile():
     """Get or update company profile"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        company = user.company
+        company = current_company()
         
         if request.method == 'GET':
             return jsonify(company.to_dict()), 200
@@ -715,17 +629,11 @@ def company_profile():
 
 
 @app.route('/api/company/jobs', methods=['GET', 'POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def company_jobs():
     """Get all jobs posted by company or create new job"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        company = user.company
+        company = current_company()
         
         if request.method == 'GET':
             # GET: Filter jobs by session if provided
@@ -780,11 +688,12 @@ def company_jobs():
             location=data.get('location', ''),
             salary_range=data.get('salary_range', ''),
             min_cgpa=float(data.get('min_cgpa', 0.0) or 0.0),
-            eligible_branches=data.get('eligible_branches', ''),
+            eligible_branches=format_eligible_branches(data.get('eligible_branches', '')),
             application_deadline=deadline_date,
             session_id=session_id,
             status='Pending'  # Needs admin approval
         )
+        sync_job_branches(job)
         db.session.add(job)
         db.session.commit()
         
@@ -799,17 +708,11 @@ def company_jobs():
 
 
 @app.route('/api/company/jobs/<int:job_id>', methods=['PUT', 'DELETE'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def update_or_delete_job(job_id):
     """Update or delete a specific job posting"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        company = user.company
+        company = current_company()
         if not company:
             return jsonify({'error': 'Company profile not found'}), 404
         
@@ -841,7 +744,8 @@ def update_or_delete_job(job_id):
             if 'min_cgpa' in data:
                 job.min_cgpa = float(data['min_cgpa'] or 0.0)
             if 'eligible_branches' in data:
-                job.eligible_branches = data['eligible_branches']
+                job.eligible_branches = format_eligible_branches(data['eligible_branches'])
+                sync_job_branches(job)
             if 'application_deadline' in data:
                 try:
                     job.application_deadline = datetime.strptime(data['application_deadline'], '%Y-%m-%d').date()
@@ -852,6 +756,11 @@ def update_or_delete_job(job_id):
             if job.status == 'Approved':
                 job.status = 'Pending'
             
+            # Rescore stored ATS results only if the JD text actually changed
+            from ats_store import refresh_job_scores
+            refresh_job_scores(job)
+            refresh_job_eligibility(job)
+            
             db.session.commit()
             
             return jsonify({
@@ -874,19 +783,13 @@ def update_or_delete_job(job_id):
 
 
 @app.route('/api/company/job/<int:job_id>/applicants', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_job_applicants(job_id):
     """Get all applicants for a specific job with ATS scores"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         # Verify job belongs to this company
         job = Job.query.get(job_id)
-        if not job or job.company_id != user.company.id:
+        if not job or job.company_id != get_company_id():
             return jsonify({'error': 'Job not found'}), 404
         
         applications = Application.query.filter_by(job_id=job_id).all()
@@ -910,16 +813,10 @@ def get_job_applicants(job_id):
 
 
 @app.route('/api/company/applicant-status', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def update_applicant_status():
     """Update applicant status (Applied -> Shortlisted -> Interview -> Selected/Rejected)"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         application = Application.query.get(data['application_id'])
         
@@ -927,7 +824,7 @@ def update_applicant_status():
             return jsonify({'error': 'Application not found'}), 404
         
         # Verify job belongs to this company
-        if application.job.company_id != user.company.id:
+        if application.job.company_id != get_company_id():
             return jsonify({'error': 'Unauthorized'}), 403
         
         application.status = data['status']
@@ -946,54 +843,33 @@ def update_applicant_status():
 
 
 @app.route('/api/company/export-applicants/<int:job_id>', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def export_applicants(job_id):
-    """Export applicants to Excel"""
+    """
+    Export applicants as a streamed Excel (default) or CSV file
+    
+    Query params: format=xlsx|csv, columns=comma separated keys of
+    APPLICANT_EXPORT_COLUMNS (e.g. name,email,ats_score,round_progress).
+    """
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized'}), 403
+        from exports import (APPLICANT_EXPORT_COLUMNS, DEFAULT_APPLICANT_COLUMNS, EXPORT_FORMATS,
+                             parse_columns, applicant_export_rows, export_response)
         
         job = Job.query.get(job_id)
-        if not job or job.company_id != user.company.id:
+        if not job or job.company_id != get_company_id():
             return jsonify({'error': 'Job not found'}), 404
         
-        applications = Application.query.filter_by(job_id=job_id).all()
-        
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Applicants"
-        
-        # Headers
-        headers = ['Name', 'Enrollment No', 'Branch', 'CGPA', 'Phone', 'Email', 'Status', 'Applied Date']
-        ws.append(headers)
-        
-        # Data
-        for app in applications:
-            student = app.student
-            ws.append([
-                student.full_name,
-                student.enrollment_number,
-                student.branch,
-                float(student.cgpa),
-                student.phone,
-                student.user.email,
-                app.status,
-                app.applied_at.strftime('%Y-%m-%d')
-            ])
-        
-        # Save to bytes
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+        try:
+            keys = parse_columns(request.args.get('columns'), APPLICANT_EXPORT_COLUMNS, DEFAULT_APPLICANT_COLUMNS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'message': 'Export ready',
-            'filename': f'applicants_{job_id}.xlsx'
-        }), 200
+        columns = {key: APPLICANT_EXPORT_COLUMNS[key] for key in keys}
+        return export_response(export_format, f'applicants_{job_id}', 'Applicants', columns,
+                               applicant_export_rows(job_id))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1002,16 +878,10 @@ def export_applicants(job_id):
 # ==================== Admin Routes ====================
 
 @app.route('/api/admin/pending-users', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_pending_users():
     """Get all unverified users"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         users = User.query.filter_by(is_verified=False).all()
         
         users_data = []
@@ -1030,16 +900,10 @@ def get_pending_users():
 
 
 @app.route('/api/admin/verify-user/<int:user_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def verify_user(user_id):
     """Verify a user account"""
     try:
-        admin_id = get_user_id()
-        admin = User.query.get(admin_id)
-        
-        if admin.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -1055,16 +919,10 @@ def verify_user(user_id):
 
 
 @app.route('/api/admin/pending-jobs', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def get_pending_jobs():
     """Get all jobs pending approval"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         jobs = Job.query.filter_by(status='Pending').all()
         return jsonify([job.to_dict() for job in jobs]), 200
         
@@ -1073,16 +931,10 @@ def get_pending_jobs():
 
 
 @app.route('/api/admin/approve-job/<int:job_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def approve_job(job_id):
     """Approve or reject a job posting"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
         data = request.get_json()
         job = Job.query.get(job_id)
         
@@ -1090,6 +942,8 @@ def approve_job(job_id):
             return jsonify({'error': 'Job not found'}), 404
         
         job.status = data['status']  # 'Approved' or 'Rejected'
+        if job.status == 'Approved':
+            refresh_job_eligibility(job)
         db.session.commit()
         
         return jsonify({
@@ -1103,45 +957,24 @@ def approve_job(job_id):
 
 
 @app.route('/api/admin/analytics', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
+@cached_view('admin_analytics')
 def get_analytics():
     """Get placement statistics and analytics"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Overall statistics
-        total_students = Student.query.count()
+        # Overall and branch-wise placement in one GROUP BY
+        placement = placement_analytics()
+        total_students = placement['overall']['total']
+        placed_students = placement['overall']['placed']
         total_companies = Company.query.filter_by().join(User).filter(User.is_verified == True).count()
         total_jobs = Job.query.filter_by(status='Approved').count()
         
-        # Placement statistics - using OfferLetter for consistency
-        placed_students = db.session.query(func.count(func.distinct(OfferLetter.student_id))).filter(
-            OfferLetter.status.in_(['Sent', 'Accepted'])
-        ).scalar() or 0
-        
-        # Branch-wise statistics - ALL branches with placement data
-        branch_data = []
-        branches = db.session.query(Student.branch).distinct().all()
-        for (branch,) in branches:
-            total = Student.query.filter_by(branch=branch).count()
-            # Count students with offer letters
-            placed = db.session.query(func.count(func.distinct(OfferLetter.student_id))).join(
-                Student, OfferLetter.student_id == Student.id
-            ).filter(
-                Student.branch == branch,
-                OfferLetter.status.in_(['Sent', 'Accepted'])
-            ).scalar() or 0
-            
-            branch_data.append({
-                'branch': branch,
-                'total': total,
-                'placed': placed,
-                'percentage': round(placed * 100 / total, 2) if total > 0 else 0
-            })
+        branch_data = [{
+            'branch': branch['name'],
+            'total': branch['total'],
+            'placed': branch['placed'],
+            'percentage': round(branch['placement_rate'], 2)
+        } for branch in placement['branches']]
         
         # Job type distribution
         job_type_stats = db.session.query(
@@ -1168,15 +1001,11 @@ def get_analytics():
 
 
 @app.route('/api/admin/announcements', methods=['GET', 'POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def announcements():
     """Get all announcements or create new one"""
     try:
         user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 3:
-            return jsonify({'error': 'Unauthorized'}), 403
         
         if request.method == 'GET':
             announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
@@ -1208,13 +1037,10 @@ def announcements():
 def get_announcements():
     """Get announcements for the current user's role"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
         # Get announcements for this role or all roles
         announcements = Announcement.query.filter(
             or_(
-                Announcement.target_role == user.role_id,
+                Announcement.target_role == get_role_id(),
                 Announcement.target_role == None
             )
         ).order_by(Announcement.created_at.desc()).limit(10).all()
@@ -1228,17 +1054,11 @@ def get_announcements():
 # ==================== ATS Scoring Integration ====================
 
 @app.route('/api/student/ats-score/<int:job_id>', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_ats_score_for_job(job_id):
     """Calculate ATS score for a specific job"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         # Check if student has resume
         if not student.resume_url:
@@ -1249,34 +1069,13 @@ def get_ats_score_for_job(job_id):
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
-        # Extract resume text (Drive/local aware)
-        from ats_scorer import calculate_ats_score
-        resume_text, error = get_resume_text(student)
+        # Served from the resume_scores store; scored and persisted on a miss
+        from ats_store import get_or_compute_score
+        result, error = get_or_compute_score(student, job)
         if error:
             status = 404 if 'not found' in error.lower() else 400
             return jsonify({'error': error}), status
         
-        # Build JD text from job details
-        jd_text = f"""
-{job.title}
-
-Company: {job.company.company_name if job.company else 'N/A'}
-Location: {job.location or 'N/A'}
-
-Job Description:
-{job.description}
-
-Required Skills:
-{job.requirements or 'Not specified'}
-
-Minimum CGPA: {job.min_cgpa}
-Eligible Branches: {job.eligible_branches or 'All'}
-Experience Required: Check description
-        """.strip()
-        
-        # Calculate ATS score
-        result = calculate_ats_score(resume_text, jd_text)
-        
         return jsonify({
             'success': True,
             'job_id': job_id,
@@ -1294,17 +1093,11 @@ Experience Required: Check description
 
 
 @app.route('/api/student/ats-analysis/<int:job_id>', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_ats_analysis_for_job(job_id):
     """Get detailed ATS analysis with heatmap data for a specific job"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         # Check if student has resume
         if not student.resume_url:
@@ -1315,33 +1108,12 @@ def get_ats_analysis_for_job(job_id):
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
-        # Extract resume text (Drive/local aware)
-        from ats_scorer import calculate_ats_score
-        resume_text, error = get_resume_text(student)
+        # Served from the resume_scores store; scored and persisted on a miss
+        from ats_store import get_or_compute_score
+        result, error = get_or_compute_score(student, job)
         if error:
             status = 404 if 'not found' in error.lower() else 400
             return jsonify({'error': error}), status
-        
-        # Build JD text from job details
-        jd_text = f"""
-{job.title}
-
-Company: {job.company.company_name if job.company else 'N/A'}
-Location: {job.location or 'N/A'}
-
-Job Description:
-{job.description}
-
-Required Skills:
-{job.requirements or 'Not specified'}
-
-Minimum CGPA: {job.min_cgpa}
-Eligible Branches: {job.eligible_branches or 'All'}
-Experience Required: Check description
-        """.strip()
-        
-        # Calculate ATS score with full details
-        result = calculate_ats_score(resume_text, jd_text)
         report = result['report']
         
         # Build recommendations
@@ -3,9 +3,12 @@ ATS Scoring Engine - Extracted from ATS_Score_Checker.ipynb
 Calculates resume-JD matching scores for job applications
 """
 
+import os
 import re
 import PyPDF2
+from math import ceil
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuration - DO NOT MODIFY WEIGHTS
 SCORING_WEIGHTS = {
@@ -15,6 +18,9 @@ SCORING_WEIGHTS = {
     'bonus_signals': 0.10
 }
 
+# Bump whenever parser output changes so stored resume features get re-parsed
+PARSER_VERSION = 1
+
 # Comprehensive skill database with variations
 SKILL_DATABASE = {
     # Programming Languages
@@ -67,6 +73,86 @@ SKILL_DATABASE = {
     'testing': ['testing', 'unit test', 'pytest', 'jest', 'junit'],
 }
 
+# Batch scoring: lists at least this long are spread over a process pool
+BATCH_POOL_THRESHOLD = int(os.getenv('ATS_BATCH_POOL_THRESHOLD', '200'))
+BATCH_MAX_WORKERS = int(os.getenv('ATS_BATCH_MAX_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+
+
+class SkillIndex:
+    """Compiled skill matcher - finds every variation in a single scan of the text"""
+
+    def __init__(self, skill_db):
+        self.skill_db = skill_db
+        self.skills_by_variation = {}
+        for skill_name, variations in skill_db.items():
+            for variation in variations:
+                self.skills_by_variation.setdefault(variation, []).append(skill_name)
+
+        # One trie-shaped alternation, wrapped in a lookahead so that overlapping
+        # variations (e.g. "react.js" and "js") are all reported
+        self._pattern = re.compile(r'(?=\b(' + self._trie_regex(self.skills_by_variation) + r')\b)')
+
+        # The scan reports the longest variation at each position; shorter ones
+        # sharing the same prefix (e.g. "py" under "pytest") are re-checked here
+        self._prefixes = {}
+        for longer in self.skills_by_variation:
+            for shorter in self.skills_by_variation:
+                if shorter != longer and longer.startswith(shorter):
+                    self._prefixes.setdefault(longer, []).append(
+                        (shorter, re.compile(r'\b' + re.escape(shorter) + r'\b'))
+                    )
+
+    @staticmethod
+    def _trie_regex(words):
+        """Build a prefix-trie regex so the engine dispatches on the first character"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # Greedy optional group: try the longer variation first, backtrack on \b failure
+            return '(?:' + body + ')?' if '' in node else body
+
+        return build(trie)
+
+    def find_variations(self, text):
+        """Return the set of variations that occur in text with word boundaries"""
+        found = set()
+        for match in self._pattern.finditer(text):
+            variation = match.group(1)
+            found.add(variation)
+            for shorter, pattern in self._prefixes.get(variation, ()):
+                if shorter not in found and pattern.match(text, match.start()):
+                    found.add(shorter)
+        return found
+
+    def find_skills(self, text):
+        """Return the set of canonical skill names present in text"""
+        return {
+            skill_name
+            for variation in self.find_variations(text)
+            for skill_name in self.skills_by_variation[variation]
+        }
+
+
+_SKILL_INDEXES = {}
+
+
+def get_skill_index(skill_db=SKILL_DATABASE):
+    """Return the process-wide SkillIndex for a skill database, building it once"""
+    key = tuple((skill_name, tuple(variations)) for skill_name, variations in skill_db.items())
+    index = _SKILL_INDEXES.get(key)
+    if index is None:
+        index = _SKILL_INDEXES[key] = SkillIndex(skill_db)
+    return index
+
 
 def extract_text_from_pdf(file_path):
     """Extract text from PDF file"""
@@ -111,6 +197,7 @@ class EnhancedResumeParser:
     
     def __init__(self, skill_db):
         self.skill_db = skill_db
+        self.skill_index = get_skill_index(skill_db)
     
     def parse(self, text):
         text_lower = text.lower()
@@ -125,17 +212,7 @@ class EnhancedResumeParser:
     
     def _extract_skills(self, text):
         """Extract skills using comprehensive database"""
-        found_skills = set()
-        
-        for skill_name, variations in self.skill_db.items():
-            for variation in variations:
-                # Use word boundaries for accurate matching
-                pattern = r'\b' + re.escape(variation) + r'\b'
-                if re.search(pattern, text):
-                    found_skills.add(skill_name)
-                    break
-        
-        return list(found_skills)
+        return list(self.skill_index.find_skills(text))
     
     def _extract_years(self, text):
         """Extract years of experience with multiple patterns"""
@@ -207,6 +284,7 @@ class EnhancedJDParser:
     
     def __init__(self, skill_db):
         self.skill_db = skill_db
+        self.skill_index = get_skill_index(skill_db)
     
     def parse(self, text):
         text_lower = text.lower()
@@ -229,25 +307,21 @@ class EnhancedJDParser:
         req_section = re.search(r'(?:required|must have|essential)[\s\S]*?(?:preferred|nice|optional|$)', text)
         pref_section = re.search(r'(?:preferred|nice to have|optional|bonus)[\s\S]*?(?:$)', text)
         
+        # Scan each section once; the first variation (in database order) found
+        # in either section decides where the skill is filed
+        req_found = self.skill_index.find_variations(req_section.group()) if req_section else set()
+        pref_found = self.skill_index.find_variations(pref_section.group()) if pref_section else set()
+        if not req_section and not pref_section:
+            req_found = self.skill_index.find_variations(text)
+        
         for skill_name, variations in self.skill_db.items():
             for variation in variations:
-                pattern = r'\b' + re.escape(variation) + r'\b'
-                
-                # Check in required section
-                if req_section and re.search(pattern, req_section.group()):
+                if variation in req_found:
                     required.add(skill_name)
                     break
-                
-                # Check in preferred section
-                if pref_section and re.search(pattern, pref_section.group()):
+                if variation in pref_found:
                     preferred.add(skill_name)
                     break
-                
-                # If no sections found, check in full text
-                if not req_section and not pref_section:
-                    if re.search(pattern, text):
-                        required.add(skill_name)
-                        break
         
         return list(required), list(preferred)
     
@@ -400,6 +474,11 @@ class ATSMatcher:
         resume = self.resume_parser.parse(resume_text)
         jd = self.jd_parser.parse(jd_text)
         
+        return self.match_parsed(resume, jd)
+    
+    def match_parsed(self, resume, jd):
+        """Match already-parsed resume and JD features"""
+        
         # Calculate skill matches
         matched_skills = list(set(resume["skills"]) & set(jd["required_skills"]))
         missing_skills = list(set(jd["required_skills"]) - set(resume["skills"]))
@@ -497,19 +576,23 @@ class ATSMatcher:
         return skills_data
 
 
-def calculate_ats_score(resume_text, jd_text):
+def calculate_ats_score(resume_text, jd_text, resume_features=None):
     """
     Main function to calculate ATS score
     
     Args:
         resume_text: Text content of resume
         jd_text: Text content of job description
+        resume_features: Stored EnhancedResumeParser.parse output; skips re-parsing resume_text
     
     Returns:
         Dictionary containing score and detailed analysis
     """
     matcher = ATSMatcher()
-    report = matcher.match(resume_text, jd_text)
+    if resume_features is not None:
+        report = matcher.match_parsed(resume_features, matcher.jd_parser.parse(jd_text))
+    else:
+        report = matcher.match(resume_text, jd_text)
     heatmap_data = matcher.generate_heatmap_data(report)
     
     return {
@@ -519,3 +602,72 @@ def calculate_ats_score(resume_text, jd_text):
         'report': report,
         'heatmap_data': heatmap_data
     }
+
+
+def build_jd_text(job):
+    """Build the JD text that ATS scoring uses for a Job row"""
+    return f"""
+{job.title}
+
+Company: {job.company.company_name if job.company else 'N/A'}
+Location: {job.location or 'N/A'}
+
+Job Description:
+{job.description}
+
+Required Skills:
+{job.requirements or 'Not specified'}
+
+Minimum CGPA: {job.min_cgpa}
+Eligible Branches: {job.eligible_branches or 'All'}
+Experience Required: Check description
+        """.strip()
+
+
+def _score_resume_chunk(jd, items):
+    """Score (key, resume text or features) pairs against a parsed JD - runs inside pool workers"""
+    matcher = ATSMatcher()
+    results = []
+    for key, resume in items:
+        if not isinstance(resume, dict):
+            resume = matcher.resume_parser.parse(resume)
+        report = matcher.match_parsed(resume, jd)
+        results.append((key, {
+            'score': report['final_score'],
+            'level': report['readiness_level'],
+            'summary': report['summary'],
+            'report': report
+        }))
+    return results
+
+
+def calculate_ats_scores_batch(resume_texts, jd_text, max_workers=None):
+    """
+    Score many resumes against one job description
+    
+    The JD is parsed once. Large batches are split into chunks and scored
+    on a process pool; small ones are scored inline.
+    
+    Args:
+        resume_texts: Dict mapping a caller-chosen key (e.g. application id) to resume
+            text, or to already-parsed resume features
+        jd_text: Text content of job description
+        max_workers: Process count override (defaults to BATCH_MAX_WORKERS)
+    
+    Returns:
+        Dict mapping each key to its score, level, summary and report
+    """
+    jd = EnhancedJDParser(SKILL_DATABASE).parse(jd_text)
+    items = list(resume_texts.items())
+    workers = max_workers or BATCH_MAX_WORKERS
+    
+    if len(items) < BATCH_POOL_THRESHOLD or workers <= 1:
+        return dict(_score_resume_chunk(jd, items))
+    
+    chunk_size = ceil(len(items) / (workers * 4))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(_score_resume_chunk, [jd] * len(chunks), chunks):
+            results.update(chunk_results)
+    return results
@@ -0,0 +1,168 @@
+"""
+Materialized ATS score store backed by the resume_scores table
+
+A row is valid while both its resume_hash matches the student's current
+resume and its jd_hash matches the job's current JD text. Uploads refresh
+the student's rows, deletes drop them and job edits rescore the rows whose
+JD changed from the stored resume features, so reads only rescore what is
+actually stale.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+from models import db, Application, Job, ResumeScore, ResumeDocument
+from ats_scorer import ATSMatcher, calculate_ats_score, build_jd_text
+
+
+def content_hash(text):
+    """sha256 hex digest of a text document"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def jd_hash(job):
+    """Hash of the JD text ATS scoring sees for a job"""
+    return content_hash(build_jd_text(job))
+
+
+def result_from_row(row):
+    """Rebuild the calculate_ats_score result dict from a stored row"""
+    return {
+        'score': row.report['final_score'],
+        'level': row.level,
+        'summary': row.summary,
+        'report': row.report,
+        'heatmap_data': row.heatmap_data
+    }
+
+
+def score_features(matcher, resume_features, jd):
+    """Score parsed resume features against a parsed JD"""
+    report = matcher.match_parsed(resume_features, jd)
+    return {
+        'score': report['final_score'],
+        'level': report['readiness_level'],
+        'summary': report['summary'],
+        'report': report,
+        'heatmap_data': matcher.generate_heatmap_data(report)
+    }
+
+
+def store_score(student, job, result, jd_digest=None, row=None):
+    """Insert or update the score row for (student, job)"""
+    if row is None:
+        row = ResumeScore.query.filter_by(student_id=student.id, job_id=job.id).first()
+    if row is None:
+        row = ResumeScore(student_id=student.id, job_id=job.id)
+        db.session.add(row)
+
+    report = result['report']
+    row.resume_url = student.resume_url
+    row.resume_hash = student.resume_hash
+    row.jd_hash = jd_digest or jd_hash(job)
+    row.overall_match_percentage = round(result['score'])
+    row.skills_match_percentage = round(report['scores']['skill_match'])
+    row.experience_match_percentage = round(report['scores']['experience_fit'])
+    row.matched_keywords = json.dumps(sorted(report['strengths']))
+    row.missing_keywords = json.dumps(sorted(report['missing_required']))
+    row.level = result['level']
+    row.summary = result['summary']
+    row.report = report
+    row.heatmap_data = result.get('heatmap_data')
+    row.assessed_at = datetime.utcnow()
+    return row
+
+
+def get_stored_score(student, job, jd_digest=None):
+    """Return the fresh score row for (student, job), or None if missing/stale"""
+    if not student.resume_hash:
+        return None
+    return ResumeScore.query.filter_by(
+        student_id=student.id,
+        job_id=job.id,
+        resume_hash=student.resume_hash,
+        jd_hash=jd_digest or jd_hash(job)
+    ).first()
+
+
+def get_or_compute_score(student, job):
+    """
+    Serve the ATS result for (student, job) from the store, scoring and
+    persisting it first on a miss
+
+    Returns:
+        (result, error) - result is the calculate_ats_score dict
+    """
+    from resume_routes import get_resume_features
+
+    row = get_stored_score(student, job)
+    if row:
+        return result_from_row(row), None
+
+    # Stored features set/backfill student.resume_hash before the JD hash is taken
+    features, error = get_resume_features(student)
+    if error:
+        return None, error
+
+    digest = jd_hash(job)
+    result = calculate_ats_score(None, build_jd_text(job), resume_features=features)
+    store_score(student, job, result, digest)
+    db.session.commit()
+    return result, None
+
+
+def refresh_student_scores(student, resume_features):
+    """
+    Rescore a student's new resume against the jobs they applied to or
+    already have scores for. Rows whose hashes still match are left alone.
+    Caller commits.
+    """
+    existing = {row.job_id: row for row in ResumeScore.query.filter_by(student_id=student.id).all()}
+    applied_ids = [job_id for (job_id,) in db.session.query(Application.job_id).filter_by(student_id=student.id)]
+    job_ids = set(existing) | set(applied_ids)
+    if not job_ids:
+        return 0
+
+    matcher = ATSMatcher()
+    refreshed = 0
+    for job in Job.query.filter(Job.id.in_(job_ids)).all():
+        digest = jd_hash(job)
+        row = existing.get(job.id)
+        if row and row.resume_hash == student.resume_hash and row.jd_hash == digest:
+            continue
+        jd = matcher.jd_parser.parse(build_jd_text(job))
+        store_score(student, job, score_features(matcher, resume_features, jd), digest, row)
+        refreshed += 1
+    return refreshed
+
+
+def clear_student_scores(student):
+    """Drop all stored scores for a student whose resume was removed. Caller commits."""
+    student.resume_hash = None
+    return ResumeScore.query.filter_by(student_id=student.id).delete(synchronize_session=False)
+
+
+def refresh_job_scores(job):
+    """
+    Rescore the job's rows that were scored against an older JD, using the
+    stored resume features. The JD is parsed once; rows without a current
+    resume document are dropped and rescored on their next read. Caller commits.
+    """
+    digest = jd_hash(job)
+    stale = db.session.query(ResumeScore, ResumeDocument).outerjoin(
+        ResumeDocument,
+        (ResumeDocument.student_id == ResumeScore.student_id) &
+        (ResumeDocument.content_hash == ResumeScore.resume_hash)
+    ).filter(ResumeScore.job_id == job.id, ResumeScore.jd_hash != digest).all()
+    if not stale:
+        return 0
+
+    matcher = ATSMatcher()
+    jd = matcher.jd_parser.parse(build_jd_text(job))
+    for row, doc in stale:
+        if doc is None or not doc.features:
+            db.session.delete(row)
+            continue
+        store_score(doc.student, job, score_features(matcher, doc.features, jd), digest, row)
+    return len(stale)
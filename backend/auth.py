@@ -0,0 +1,122 @@
+"""
+Token claims and request-scoped identity for route authorization
+
+Access tokens carry role_id, student_id and company_id as claims (set at login),
+so @roles_required can authorize without touching the database. Routes that
+need the rows call current_user()/current_student()/current_company(), which
+load them at most once per request and keep them in flask.g (keyed to the
+decoded token, so a reused app context never leaks another request's user).
+
+Tokens issued before the claims existed still work: their claims are derived
+from the user row the first time they are needed in a request.
+"""
+
+from functools import wraps
+
+from flask import g, jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+
+from models import db, User, Student, Company
+
+ROLE_STUDENT = 1
+ROLE_COMPANY = 2
+ROLE_ADMIN = 3
+
+
+def user_claims(user):
+    """Authorization claims for a User row"""
+    return {
+        'role_id': user.role_id,
+        'student_id': user.student.id if user.role_id == ROLE_STUDENT and user.student else None,
+        'company_id': user.company.id if user.role_id == ROLE_COMPANY and user.company else None
+    }
+
+
+def create_user_token(user):
+    """Access token for a User row, with its authorization claims"""
+    return create_access_token(identity=str(user.id), additional_claims=user_claims(user))
+
+
+def get_user_id():
+    """User id from the JWT identity (issued as a string)"""
+    identity = get_jwt_identity()
+    if isinstance(identity, str) and identity.isdigit():
+        return int(identity)
+    return identity
+
+
+def _request_cache():
+    """Per-request memo in flask.g, tied to the decoded token it was built for"""
+    token = get_jwt()
+    cache = g.get('auth_cache')
+    if cache is None or cache['token'] is not token:
+        cache = g.auth_cache = {'token': token}
+    return cache
+
+
+def get_claims():
+    """role_id/student_id/company_id for the current request"""
+    cache = _request_cache()
+    if 'claims' not in cache:
+        token = cache['token']
+        if 'role_id' in token:
+            cache['claims'] = {key: token.get(key) for key in ('role_id', 'student_id', 'company_id')}
+        else:
+            user = current_user()
+            cache['claims'] = user_claims(user) if user else {'role_id': None, 'student_id': None, 'company_id': None}
+    return cache['claims']
+
+
+def get_role_id():
+    return get_claims()['role_id']
+
+
+def get_student_id():
+    return get_claims()['student_id']
+
+
+def get_company_id():
+    return get_claims()['company_id']
+
+
+def current_user():
+    """The authenticated User, loaded once per request"""
+    cache = _request_cache()
+    if 'user' not in cache:
+        cache['user'] = db.session.get(User, get_user_id())
+    return cache['user']
+
+
+def current_student():
+    """The authenticated student's Student row (None for other roles)"""
+    cache = _request_cache()
+    if 'student' not in cache:
+        student_id = get_student_id()
+        cache['student'] = db.session.get(Student, student_id) if student_id else None
+    return cache['student']
+
+
+def current_company():
+    """The authenticated company user's Company row (None for other roles)"""
+    cache = _request_cache()
+    if 'company' not in cache:
+        company_id = get_company_id()
+        cache['company'] = db.session.get(Company, company_id) if company_id else None
+    return cache['company']
+
+
+def is_admin():
+    return get_role_id() == ROLE_ADMIN
+
+
+def roles_required(*roles):
+    """jwt_required() that also answers 403 unless the token's role is one of roles"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_role_id() not in roles:
+                return jsonify({'error': 'Unauthorized'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,156 @@
+"""
+Check the analytics dashboard cache against both backends
+
+Seeds a small campus in a throwaway SQLite database unless
+BENCHMARK_DATABASE_URL is set (never point it at a database you care about:
+it creates and drops tables), then for the in-process backend and the redis
+backend (against fake_redis.py, or ANALYTICS_CACHE_URL when set) checks that
+a repeated dashboard view runs no statements and returns the same body, and
+that a committed write to each family's models serves fresh figures on the
+next view while a rolled-back one does not. Exits non-zero on any failure.
+
+    python benchmark_analytics_cache.py [students]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / 'benchmark_analytics_cache.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from sqlalchemy import event
+from app import app, db
+from auth import create_user_token
+from models import User, Company, Student, Job, Application, OfferLetter, Department
+import analytics_cache
+from fake_redis import start_fake_redis
+
+STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+BRANCHES = [('CSE', 'Computer Science'), ('IT', 'Information Technology'), ('ECE', 'Electronics')]
+DASHBOARDS = ['/api/admin/analytics', '/api/admin/company-progress', '/api/admin/students/branch-counts']
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    admin = User(email='bench-admin@example.com', role_id=3, is_verified=True, password_hash='x')
+    company_user = User(email='bench-company@example.com', role_id=2, is_verified=True, password_hash='x')
+    db.session.add_all([admin, company_user])
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name='Bench Corp', hr_name='HR')
+    db.session.add(company)
+    db.session.add_all([Department(code=code, name=name) for code, name in BRANCHES])
+    db.session.flush()
+    job = Job(company_id=company.id, title='Benchmark Engineer', job_type='Full-Time', description='Benchmark',
+              application_deadline=date.today() + timedelta(days=30), status='Approved')
+    db.session.add(job)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(User, [
+        {'email': f'bench{i}@example.com', 'role_id': 1, 'is_verified': True, 'password_hash': 'x'}
+        for i in range(STUDENTS)
+    ])
+    user_ids = [u for (u,) in db.session.query(User.id).filter(User.role_id == 1).order_by(User.id)]
+    db.session.bulk_insert_mappings(Student, [
+        {'user_id': user_id, 'full_name': f'Student {i:05d}', 'enrollment_number': f'BENCH{i:05d}',
+         'branch': BRANCHES[i % 3][1], 'branch_code': BRANCHES[i % 3][0], 'cgpa': 6 + (i % 40) / 10,
+         'graduation_year': 2025}
+        for i, user_id in enumerate(user_ids)
+    ])
+    student_ids = [s for (s,) in db.session.query(Student.id).order_by(Student.id)]
+    db.session.bulk_insert_mappings(Application, [
+        {'student_id': student_id, 'job_id': job.id, 'status': 'Applied'} for student_id in student_ids
+    ])
+    db.session.commit()
+    return admin, company, job
+
+
+def timed(client, url, headers):
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    body = response.get_data()
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    return response, body, elapsed, len(statements)
+
+
+def add_offer(company, job):
+    application = Application.query.filter_by(job_id=job.id, status='Applied').first()
+    application.status = 'Selected'
+    db.session.add(OfferLetter(application_id=application.id, company_id=company.id,
+                               student_id=application.student_id, designation='Engineer', ctc='12 LPA',
+                               annual_ctc=12, offer_content='Benchmark', status='Sent'))
+
+
+def run(backend, client, headers, company, job):
+    analytics_cache.use_backend(backend)
+    failures = []
+
+    def check(label, ok):
+        print(f"  {label:62} {'ok' if ok else 'FAIL'}")
+        if not ok:
+            failures.append(label)
+
+    bodies = {}
+    for url in DASHBOARDS:
+        miss, body, miss_ms, miss_statements = timed(client, url, headers)
+        hit, hit_body, hit_ms, hit_statements = timed(client, url, headers)
+        print(f"  {url:40} miss {miss_ms:7.1f} ms {miss_statements:2} stmts  hit {hit_ms:6.1f} ms {hit_statements} stmts")
+        check(f'{url} cached', miss.headers.get('X-Cache') == 'MISS' and hit.headers.get('X-Cache') == 'HIT')
+        check(f'{url} hit runs no statements', hit_statements == 0)
+        check(f'{url} hit body matches', hit_body == body and hit.mimetype == miss.mimetype)
+        bodies[url] = body
+
+    add_offer(company, job)
+    db.session.rollback()
+    for url in DASHBOARDS:
+        response, body, _, _ = timed(client, url, headers)
+        check(f'{url} still cached after a rollback', response.headers.get('X-Cache') == 'HIT')
+
+    add_offer(company, job)
+    db.session.commit()
+    for url in DASHBOARDS:
+        response, body, _, _ = timed(client, url, headers)
+        check(f'{url} fresh after an offer commit', response.headers.get('X-Cache') == 'MISS' and body != bodies[url])
+
+    db.session.add(Department(code=backend.name.upper(), name=f'Department {backend.name}'))
+    db.session.commit()
+    states = {url: timed(client, url, headers)[0].headers.get('X-Cache') for url in DASHBOARDS}
+    check('department write skips company progress only',
+          states == {DASHBOARDS[0]: 'MISS', DASHBOARDS[1]: 'HIT', DASHBOARDS[2]: 'MISS'})
+
+    stats = analytics_cache.get_stats()
+    check('stats per family', all(stats['families'][f]['hits'] >= 1 for f in analytics_cache.FAMILY_MODELS))
+    return failures
+
+
+with app.app_context():
+    print(f"Seeding {STUDENTS} students...")
+    admin, company, job = seed()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+    client = app.test_client()
+
+    server = None
+    url = os.getenv('ANALYTICS_CACHE_URL')
+    if not url:
+        server = start_fake_redis()
+        url = f'redis://127.0.0.1:{server.server_address[1]}/0'
+
+    failed = []
+    for backend in [analytics_cache.MemoryBackend(), analytics_cache.RedisBackend(url)]:
+        print(f"{backend.name} backend")
+        failed += run(backend, client, headers, company, job)
+
+    if server:
+        server.shutdown()
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
+    sys.exit(1 if failed else 0)
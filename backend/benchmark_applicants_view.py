@@ -0,0 +1,104 @@
+"""
+Benchmark the company applicants view on a seeded 20k-applicant job
+
+Runs against a throwaway SQLite database unless BENCHMARK_DATABASE_URL is
+set (never point it at a database you care about: it creates and drops
+tables). Compares the full list with keyset pages for each sort key.
+
+    python benchmark_applicants_view.py [applicants]
+"""
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / 'benchmark_applicants.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from sqlalchemy import event
+from app import app, db
+from auth import create_user_token
+from models import User, Company, Student, Job, Application
+from eligibility import refresh_job_eligibility
+
+APPLICANTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+BRANCHES = ['CSE', 'IT', 'ECE', 'ME', 'CE']
+STATUSES = ['Applied', 'Shortlisted', 'Interview', 'Selected', 'Rejected']
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    company_user = User(email='bench-company@example.com', role_id=2, is_verified=True, password_hash='x')
+    db.session.add(company_user)
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name='Bench Corp', hr_name='HR')
+    db.session.add(company)
+    db.session.flush()
+    job = Job(company_id=company.id, title='Benchmark Engineer', job_type='Full-Time', description='Benchmark',
+              min_cgpa=7.0, eligible_branches='CSE, IT', application_deadline=date.today() + timedelta(days=30),
+              status='Approved')
+    db.session.add(job)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(User, [
+        {'email': f'bench{i}@example.com', 'role_id': 1, 'is_verified': True, 'password_hash': 'x'}
+        for i in range(APPLICANTS)
+    ])
+    user_ids = [u for (u,) in db.session.query(User.id).filter(User.role_id == 1).order_by(User.id)]
+    db.session.bulk_insert_mappings(Student, [
+        {'user_id': user_id, 'full_name': f'Student {i:05d}', 'enrollment_number': f'BENCH{i:05d}',
+         'branch': BRANCHES[i % 5], 'branch_code': BRANCHES[i % 5], 'cgpa': 6 + (i % 40) / 10,
+         'graduation_year': 2025, 'ats_score': None if i % 7 == 0 else i % 100}
+        for i, user_id in enumerate(user_ids)
+    ])
+    student_ids = [s for (s,) in db.session.query(Student.id).order_by(Student.id)]
+    start = datetime.utcnow() - timedelta(days=10)
+    db.session.bulk_insert_mappings(Application, [
+        {'student_id': student_id, 'job_id': job.id, 'status': STATUSES[i % 5],
+         'applied_at': start + timedelta(seconds=i * 30), 'updated_at': start}
+        for i, student_id in enumerate(student_ids)
+    ])
+    refresh_job_eligibility(job)
+    db.session.commit()
+    return company_user, job
+
+
+def timed(client, url, headers):
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    return response.get_json(), elapsed, len(statements)
+
+
+with app.app_context():
+    print(f"Seeding {APPLICANTS} applicants...")
+    company_user, job = seed()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_user_token(company_user)}'}
+    client = app.test_client()
+    base = f'/api/company/job/{job.id}/applicants/advanced'
+
+    data, ms, statements = timed(client, f'{base}?hide_ineligible=true', headers)
+    print(f"{'full list (hide_ineligible)':40} {ms:8.1f} ms  {statements:3} stmts  {len(data['applicants'])} rows")
+
+    for sort_by in ['applied_at', 'cgpa', 'name', 'ats_score']:
+        data, ms, statements = timed(client, f'{base}?sort_by={sort_by}&limit=50', headers)
+        print(f"{'first page sort_by=' + sort_by:40} {ms:8.1f} ms  {statements:3} stmts  total={data['total']}")
+        for _ in range(20):
+            data, _, _ = timed(client, f'{base}?sort_by={sort_by}&limit=50&cursor={data["next_cursor"]}', headers)
+        data, ms, statements = timed(client, f'{base}?sort_by={sort_by}&limit=50&cursor={data["next_cursor"]}', headers)
+        print(f"{'page 22 sort_by=' + sort_by:40} {ms:8.1f} ms  {statements:3} stmts")
+
+    data, ms, statements = timed(client, f'{base}?status=Shortlisted&hide_ineligible=true&limit=50', headers)
+    print(f"{'status + hide_ineligible page':40} {ms:8.1f} ms  {statements:3} stmts  total={data['total']}")
+
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
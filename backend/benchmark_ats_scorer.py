@@ -0,0 +1,106 @@
+"""
+Benchmark the compiled SkillIndex against the legacy per-variation regex loop
+Run: python benchmark_ats_scorer.py
+"""
+
+import random
+import re
+import time
+
+from ats_scorer import SKILL_DATABASE, EnhancedResumeParser, EnhancedJDParser, get_skill_index
+
+FILLER = [
+    'developed', 'designed', 'implemented', 'scalable', 'services', 'team', 'delivered', 'platform',
+    'optimized', 'latency', 'customers', 'pipeline', 'dashboards', 'reporting', 'mentored', 'interns',
+    'migrated', 'legacy', 'systems', 'improved', 'throughput', 'percent', 'worked', 'across', 'modules',
+]
+
+
+def legacy_extract_skills(skill_db, text):
+    """Original EnhancedResumeParser._extract_skills implementation"""
+    found_skills = set()
+    for skill_name, variations in skill_db.items():
+        for variation in variations:
+            pattern = r'\b' + re.escape(variation) + r'\b'
+            if re.search(pattern, text):
+                found_skills.add(skill_name)
+                break
+    return found_skills
+
+
+def legacy_categorize_skills(skill_db, text):
+    """Original EnhancedJDParser._categorize_skills implementation"""
+    required = set()
+    preferred = set()
+    req_section = re.search(r'(?:required|must have|essential)[\s\S]*?(?:preferred|nice|optional|$)', text)
+    pref_section = re.search(r'(?:preferred|nice to have|optional|bonus)[\s\S]*?(?:$)', text)
+    for skill_name, variations in skill_db.items():
+        for variation in variations:
+            pattern = r'\b' + re.escape(variation) + r'\b'
+            if req_section and re.search(pattern, req_section.group()):
+                required.add(skill_name)
+                break
+            if pref_section and re.search(pattern, pref_section.group()):
+                preferred.add(skill_name)
+                break
+            if not req_section and not pref_section:
+                if re.search(pattern, text):
+                    required.add(skill_name)
+                    break
+    return required, preferred
+
+
+def make_resume(words, rng):
+    """Generate a long resume-like text with a sprinkling of skill variations"""
+    variations = [v for vs in SKILL_DATABASE.values() for v in vs]
+    tokens = []
+    for i in range(words):
+        if rng.random() < 0.03:
+            tokens.append(rng.choice(variations))
+        else:
+            tokens.append(rng.choice(FILLER))
+        if i % 12 == 11:
+            tokens.append('\n')
+    return ' '.join(tokens).lower()
+
+
+def time_per_doc(fn, docs, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, (time.perf_counter() - start) / len(docs))
+    return best * 1000
+
+
+def main():
+    rng = random.Random(42)
+    index = get_skill_index(SKILL_DATABASE)
+    resume_parser = EnhancedResumeParser(SKILL_DATABASE)
+    jd_parser = EnhancedJDParser(SKILL_DATABASE)
+
+    # Equivalence check on short, edge-case heavy documents
+    for _ in range(500):
+        doc = make_resume(rng.randint(5, 60), rng)
+        assert index.find_skills(doc) == legacy_extract_skills(SKILL_DATABASE, doc), doc
+        jd = 'required: ' + doc + ' preferred: ' + make_resume(20, rng)
+        new_req, new_pref = jd_parser._categorize_skills(jd)
+        assert (set(new_req), set(new_pref)) == legacy_categorize_skills(SKILL_DATABASE, jd), jd
+    print('Equivalence check passed (500 resumes, 500 JDs)')
+
+    print(f"\n{'words':>8} {'legacy ms/doc':>15} {'indexed ms/doc':>15} {'speedup':>9}")
+    for words in (500, 2000, 8000):
+        docs = [make_resume(words, rng) for _ in range(20)]
+        legacy = time_per_doc(lambda d: legacy_extract_skills(SKILL_DATABASE, d), docs)
+        indexed = time_per_doc(resume_parser._extract_skills, docs)
+        print(f'{words:>8} {legacy:>15.3f} {indexed:>15.3f} {legacy / indexed:>8.1f}x')
+
+    jds = ['required: ' + make_resume(400, rng) + '\npreferred: ' + make_resume(200, rng) for _ in range(20)]
+    legacy = time_per_doc(lambda d: legacy_categorize_skills(SKILL_DATABASE, d), jds)
+    indexed = time_per_doc(jd_parser._categorize_skills, jds)
+    print(f"{'JD':>8} {legacy:>15.3f} {indexed:>15.3f} {legacy / indexed:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
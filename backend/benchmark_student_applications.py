@@ -0,0 +1,122 @@
+"""
+Statement counts for the student applications view
+
+Seeds students with a growing number of applications (default 5, 50 and
+200), each job with hiring rounds and round progress, in a throwaway SQLite
+database unless BENCHMARK_DATABASE_URL is set (never point it at a database
+you care about: it creates and drops tables). /api/student/applications must
+run the same number of statements however many applications a student has;
+the script exits non-zero when the count grows or exceeds MAX_STATEMENTS.
+
+    python benchmark_student_applications.py [applications ...]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / 'benchmark_student_applications.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from sqlalchemy import event
+from app import app, db
+from auth import create_user_token
+from models import User, Company, Student, Job, Application, HiringRound, ApplicationRound
+
+SIZES = [int(n) for n in sys.argv[1:]] or [5, 50, 200]
+ROUNDS_PER_JOB = 3
+MAX_STATEMENTS = 8
+ROUND_STATUSES = ['Passed', 'Completed', 'Scheduled', 'Pending', 'Failed']
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    company_user = User(email='bench-company@example.com', role_id=2, is_verified=True, password_hash='x')
+    db.session.add(company_user)
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name='Bench Corp', hr_name='HR')
+    db.session.add(company)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(Job, [
+        {'company_id': company.id, 'title': f'Benchmark Role {i}', 'job_type': 'Full-Time', 'description': 'Benchmark',
+         'application_deadline': date.today() + timedelta(days=30), 'status': 'Approved'}
+        for i in range(max(SIZES))
+    ])
+    job_ids = [j for (j,) in db.session.query(Job.id).order_by(Job.id)]
+    db.session.bulk_insert_mappings(HiringRound, [
+        {'job_id': job_id, 'round_number': number, 'round_name': f'Round {number}', 'round_type': 'Online',
+         'round_mode': 'Interview', 'scheduled_date': date.today() + timedelta(days=number)}
+        for job_id in job_ids for number in range(1, ROUNDS_PER_JOB + 1)
+    ])
+    rounds = {}
+    for round_id, job_id in db.session.query(HiringRound.id, HiringRound.job_id).order_by(HiringRound.round_number):
+        rounds.setdefault(job_id, []).append(round_id)
+
+    users = []
+    for size in SIZES:
+        user = User(email=f'bench-student-{size}@example.com', role_id=1, is_verified=True, password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, full_name=f'Student {size}', enrollment_number=f'BENCH{size:05d}',
+                          branch='CSE', branch_code='CSE', cgpa=8, graduation_year=2025)
+        db.session.add(student)
+        db.session.flush()
+        db.session.bulk_insert_mappings(Application, [
+            {'student_id': student.id, 'job_id': job_id, 'status': 'Shortlisted'} for job_id in job_ids[:size]
+        ])
+        applications = db.session.query(Application.id, Application.job_id).filter(
+            Application.student_id == student.id
+        ).all()
+        db.session.bulk_insert_mappings(ApplicationRound, [
+            {'application_id': app_id, 'hiring_round_id': round_id,
+             'status': ROUND_STATUSES[(app_id + number) % len(ROUND_STATUSES)]}
+            for app_id, job_id in applications
+            for number, round_id in enumerate(rounds[job_id])
+            if number < 2
+        ])
+        users.append((size, user))
+    db.session.commit()
+    return users
+
+
+def timed(client, url, headers):
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    return response, elapsed, len(statements)
+
+
+with app.app_context():
+    print(f"Seeding students with {', '.join(map(str, SIZES))} applications...")
+    users = seed()
+    client = app.test_client()
+
+    counts = set()
+    failed = False
+    for size, user in users:
+        with app.test_request_context():
+            headers = {'Authorization': f'Bearer {create_user_token(user)}'}
+        response, ms, statements = timed(client, '/api/student/applications', headers)
+        data = response.get_json()
+        ok = (response.status_code == 200 and len(data) == size and statements <= MAX_STATEMENTS
+              and all(len(app['rounds']) == ROUNDS_PER_JOB for app in data))
+        counts.add(statements)
+        failed = failed or not ok
+        print(f"{size:5} applications  {ms:8.1f} ms  {statements:3} stmts  {'ok' if ok else 'FAIL'}")
+
+    if len(counts) > 1:
+        print(f"Statement count grows with the number of applications: {sorted(counts)}")
+        failed = True
+
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,108 @@
+"""
+Statement counts for the admin analytics dashboard and student export
+
+Seeds a campus of students (default 5,000) with offers in a throwaway
+SQLite database unless BENCHMARK_DATABASE_URL is set (never point it at a
+database you care about: it creates and drops tables). Each endpoint must
+run a fixed number of statements however many students exist; the script
+exits non-zero when one exceeds MAX_STATEMENTS.
+
+    python benchmark_student_snapshot.py [students]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / 'benchmark_student_snapshot.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from sqlalchemy import event
+from app import app, db
+from auth import create_user_token
+from models import User, Company, Student, Job, Application, OfferLetter, Department
+
+STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+MAX_STATEMENTS = 10
+BRANCHES = [('CSE', 'Computer Science'), ('IT', 'Information Technology'), ('ECE', 'Electronics'),
+            ('ME', 'Mechanical'), ('CE', 'Civil')]
+OFFER_STATUSES = ['Generated', 'Sent', 'Accepted', 'Rejected']
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    admin = User(email='bench-admin@example.com', role_id=3, is_verified=True, password_hash='x')
+    company_user = User(email='bench-company@example.com', role_id=2, is_verified=True, password_hash='x')
+    db.session.add_all([admin, company_user])
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name='Bench Corp', hr_name='HR')
+    db.session.add(company)
+    db.session.add_all([Department(code=code, name=name) for code, name in BRANCHES])
+    db.session.flush()
+    job = Job(company_id=company.id, title='Benchmark Engineer', job_type='Full-Time', description='Benchmark',
+              application_deadline=date.today() + timedelta(days=30), status='Approved')
+    db.session.add(job)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(User, [
+        {'email': f'bench{i}@example.com', 'role_id': 1, 'is_verified': True, 'password_hash': 'x'}
+        for i in range(STUDENTS)
+    ])
+    user_ids = [u for (u,) in db.session.query(User.id).filter(User.role_id == 1).order_by(User.id)]
+    db.session.bulk_insert_mappings(Student, [
+        {'user_id': user_id, 'full_name': f'Student {i:05d}', 'enrollment_number': f'BENCH{i:05d}',
+         'branch': BRANCHES[i % 5][1], 'branch_code': BRANCHES[i % 5][0], 'cgpa': 6 + (i % 40) / 10,
+         'graduation_year': 2025, 'profile_completed': i % 3 != 0}
+        for i, user_id in enumerate(user_ids)
+    ])
+    student_ids = [s for (s,) in db.session.query(Student.id).order_by(Student.id)]
+    db.session.bulk_insert_mappings(Application, [
+        {'student_id': student_id, 'job_id': job.id, 'status': 'Selected'} for student_id in student_ids
+    ])
+    applications = db.session.query(Application.id, Application.student_id).order_by(Application.id).all()
+    db.session.bulk_insert_mappings(OfferLetter, [
+        {'application_id': app_id, 'company_id': company.id, 'student_id': student_id, 'designation': 'Engineer',
+         'ctc': 'Benchmark', 'annual_ctc': 3 + (i * offer) % 25, 'offer_content': 'Benchmark',
+         'status': OFFER_STATUSES[(i + offer) % 4]}
+        for i, (app_id, student_id) in enumerate(applications) if i % 2 == 0
+        for offer in range(1 + i % 3)
+    ])
+    db.session.commit()
+    return admin
+
+
+def timed(client, url, headers):
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    body = response.get_data()  # Streamed responses run their queries here
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    db.session.commit()
+    return response.status_code, len(body), elapsed, len(statements)
+
+
+with app.app_context():
+    print(f"Seeding {STUDENTS} students...")
+    admin = seed()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+    client = app.test_client()
+
+    failed = False
+    for url in ['/api/admin/analytics', '/api/admin/reports/student-data',
+                '/api/admin/reports/student-data?format=csv', '/api/admin/reports/student-data?format=xlsx',
+                '/api/admin/analytics/department-stats', '/api/admin/reports/placement-report']:
+        status, size, ms, statements = timed(client, url, headers)
+        ok = status == 200 and statements <= MAX_STATEMENTS
+        failed = failed or not ok
+        print(f"{url:50} {status} {ms:8.1f} ms  {statements:3} stmts  {size:9} bytes  {'ok' if ok else 'FAIL'}")
+
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,170 @@
+"""
+Canonical branch codes shared by students, job eligibility and the Department table
+
+Student.branch and Job.eligible_branches are free text ("CSE", "Computer
+Science", "I.T.", a JSON array from the drive wizard...). normalize_branch maps
+them to one code, so eligibility is a set lookup / SQL join on
+Student.branch_code and job_eligible_branches instead of alias scans.
+
+Department rows take precedence: if the TPO has a department whose code or
+name matches an alias group, every alias in that group maps to its code.
+"""
+
+import json
+import re
+
+from models import db, Department, Job, JobEligibleBranch, Student
+from analytics_cache import mark_changed
+
+# Common spellings per branch (matched after normalize_text)
+BRANCH_ALIASES = {
+    'CSE': ['cse', 'cs', 'computer science', 'computer science and engineering', 'computer engineering'],
+    'IT': ['it', 'information technology'],
+    'ECE': ['ece', 'electronics', 'electronics and communication', 'electronics and communication engineering'],
+    'EE': ['ee', 'eee', 'electrical', 'electrical engineering', 'electrical and electronics engineering'],
+    'ME': ['me', 'mech', 'mechanical', 'mechanical engineering'],
+    'CE': ['ce', 'civil', 'civil engineering'],
+}
+
+# Aliases shorter than this match only as whole words: "B.Tech IT" but not "Architecture"
+MIN_SUBSTRING_ALIAS = 4
+
+
+def normalize_text(name):
+    """Lowercase, drop dots, '&' -> 'and', collapse whitespace"""
+    text = (name or '').lower().replace('.', '').replace('&', ' and ')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def alias_lookup():
+    """normalized name -> canonical code from BRANCH_ALIASES alone"""
+    return {alias: code for code, aliases in BRANCH_ALIASES.items() for alias in aliases}
+
+
+def branch_lookup():
+    """normalized name -> canonical code, from BRANCH_ALIASES overlaid with Department rows"""
+    lookup = alias_lookup()
+    for dept in Department.query.all():
+        dept_code = dept.code.strip()
+        keys = [normalize_text(dept.code), normalize_text(dept.name)]
+        # The department owns its alias group, so "Computer Science" maps to its code
+        groups = {lookup[key] for key in keys if key in lookup}
+        for alias, code in list(lookup.items()):
+            if code in groups:
+                lookup[alias] = dept_code
+        for key in keys:
+            lookup[key] = dept_code
+    return lookup
+
+
+def normalize_branch(name, lookup=None):
+    """Canonical code for a branch name, or None for a blank name"""
+    text = normalize_text(name)
+    if not text:
+        return None
+    if lookup is None:
+        lookup = branch_lookup()
+    if text in lookup:
+        return lookup[text]
+    # "B.Tech Computer Science", "ECE Dept" and similar: longest contained alias wins
+    for alias in sorted(lookup, key=len, reverse=True):
+        if len(alias) >= MIN_SUBSTRING_ALIAS:
+            if alias in text:
+                return lookup[alias]
+        elif re.search(rf'\b{re.escape(alias)}\b', text):
+            return lookup[alias]
+    return text.upper()[:20]
+
+
+def parse_eligible_branches(value):
+    """Branch names from a CSV string, a JSON array string or a list; None means all branches"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        stripped = value.strip()
+        try:
+            parsed = json.loads(stripped) if stripped.startswith('[') else None
+        except ValueError:
+            parsed = None
+        names = parsed if parsed is not None else stripped.split(',')
+    else:
+        names = value
+    names = [str(name).strip() for name in names if str(name).strip()]
+    if not names or any(name.lower() == 'all' for name in names):
+        return None
+    return names
+
+
+def format_eligible_branches(value):
+    """Storage form of Job.eligible_branches: comma separated, as the job forms send it"""
+    names = parse_eligible_branches(value)
+    return ', '.join(names) if names else ('All' if value else '')
+
+
+def eligible_branch_codes(value, lookup=None):
+    """Canonical codes for an eligible_branches value; None means all branches"""
+    names = parse_eligible_branches(value)
+    if names is None:
+        return None
+    if lookup is None:
+        lookup = branch_lookup()
+    return {normalize_branch(name, lookup) for name in names}
+
+
+def sync_job_branches(job, lookup=None):
+    """Rewrite job_eligible_branches for job from its eligible_branches (caller commits)"""
+    codes = eligible_branch_codes(job.eligible_branches, lookup) or set()
+    existing = {row.branch_code: row for row in job.eligible_branch_rows}
+    for code, row in existing.items():
+        if code not in codes:
+            job.eligible_branch_rows.remove(row)
+    for code in codes - set(existing):
+        job.eligible_branch_rows.append(JobEligibleBranch(branch_code=code))
+    return codes
+
+
+def set_student_branch(student, branch, lookup=None):
+    """Assign a student's branch together with its canonical code"""
+    student.branch = branch
+    student.branch_code = normalize_branch(branch, lookup)
+
+
+def job_branch_codes(jobs, lookup=None):
+    """job id -> eligible code set (None: all branches) for loaded jobs, in one query"""
+    codes = {job.id: None for job in jobs}
+    if not codes:
+        return codes
+    rows = db.session.query(JobEligibleBranch.job_id, JobEligibleBranch.branch_code).filter(
+        JobEligibleBranch.job_id.in_(list(codes))
+    ).all()
+    for job_id, code in rows:
+        codes[job_id] = (codes[job_id] or set()) | {code}
+    # Jobs written by SQL seed scripts have text but no rows yet
+    for job in jobs:
+        if codes[job.id] is None and parse_eligible_branches(job.eligible_branches):
+            if lookup is None:
+                lookup = branch_lookup()
+            codes[job.id] = eligible_branch_codes(job.eligible_branches, lookup)
+    return codes
+
+
+def branch_eligible(student_code, codes):
+    """codes is a job's eligible set (None/empty: open to all branches)"""
+    return not codes or student_code in codes
+
+
+def student_branch_code(student, lookup=None):
+    """Stored code, computed for rows saved before branch codes existed"""
+    return student.branch_code or normalize_branch(student.branch, lookup)
+
+
+def refresh_branch_codes():
+    """Recompute every student and job code (after Department changes); caller commits"""
+    lookup = branch_lookup()
+    for (branch,) in db.session.query(Student.branch).distinct().all():
+        Student.query.filter(Student.branch == branch).update(
+            {'branch_code': normalize_branch(branch, lookup)}, synchronize_session=False
+        )
+    mark_changed(Student)
+    for job in Job.query.filter(Job.eligible_branches.isnot(None)).all():
+        sync_job_branches(job, lookup)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Check normalize_branch on common free-text branch spellings
+
+Uses the built-in alias table only (no database). Exits non-zero when a
+spelling maps to the wrong code.
+
+    python check_branches.py
+"""
+import sys
+
+from branches import alias_lookup, normalize_branch
+
+CASES = [
+    ('CSE', 'CSE'),
+    ('cs', 'CSE'),
+    ('Computer Science & Engineering', 'CSE'),
+    ('B.Tech Computer Science', 'CSE'),
+    ('B.Tech CSE', 'CSE'),
+    ('B.Tech IT', 'IT'),
+    ('I.T.', 'IT'),
+    ('Information Technology', 'IT'),
+    ('ECE Dept', 'ECE'),
+    ('B.E. ECE', 'ECE'),
+    ('Electronics and Communication', 'ECE'),
+    ('EEE', 'EE'),
+    ('B.Tech EE', 'EE'),
+    ('Electrical Engineering', 'EE'),
+    ('B.Tech ME', 'ME'),
+    ('Mech', 'ME'),
+    ('Mechanical Engineering', 'ME'),
+    ('B.Tech CE', 'CE'),
+    ('Civil', 'CE'),
+    # Short aliases only match whole words
+    ('Architecture', 'ARCHITECTURE'),
+    ('Chemical', 'CHEMICAL'),
+    ('Biotechnology', 'BIOTECHNOLOGY'),
+    ('', None),
+]
+
+lookup = alias_lookup()
+failures = 0
+for name, expected in CASES:
+    code = normalize_branch(name, lookup)
+    ok = code == expected
+    failures += not ok
+    print(f"{name!r:36} -> {code!r:18} {'ok' if ok else f'FAIL (expected {expected!r})'}")
+
+sys.exit(1 if failures else 0)
@@ -0,0 +1,168 @@
+"""
+Check the Drive client reuse and the resume byte cache against fake_drive.py
+
+Points GOOGLE_DRIVE_FAKE_DIR and the resume cache at temporary directories
+and seeds one student in a throwaway SQLite database unless
+BENCHMARK_DATABASE_URL is set (never point it at a database you care about:
+it creates and drops tables). Checks that each thread builds one Drive
+service, that a cached resume is served without a media GET, that the cache
+evicts least recently used entries beyond its size limit, and that uploading
+or deleting a resume drops the cached copy. Exits non-zero on any failure.
+
+    python check_resume_cache.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from io import BytesIO
+from pathlib import Path
+
+TMP = tempfile.TemporaryDirectory()
+DB_PATH = Path(__file__).parent / 'check_resume_cache.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+os.environ['GOOGLE_DRIVE_FAKE_DIR'] = str(Path(TMP.name) / 'drive')
+
+from app import app, db
+from auth import create_user_token
+from models import User, Student, BackgroundJob
+import resume_routes
+from resume_cache import DiskLRUCache
+
+THREADS = 4
+JOB_WAIT_SECONDS = 10
+
+resume_routes.RESUME_CACHE = DiskLRUCache(Path(TMP.name) / 'drive_cache', 1024 * 1024)
+builds = Counter()
+build_drive_service = resume_routes.build_drive_service
+
+
+def counting_build():
+    builds[threading.get_ident()] += 1
+    return build_drive_service()
+
+
+resume_routes.build_drive_service = counting_build
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    user = User(email='check-student@example.com', role_id=1, is_verified=True, password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, full_name='Check Student', enrollment_number='CHECK00001',
+                      branch='CSE', branch_code='CSE', cgpa=8, graduation_year=2025)
+    db.session.add(student)
+    db.session.commit()
+    return user, student
+
+
+def drive_upload(data):
+    """Store data on the fake Drive and return its file id"""
+    return resume_routes.upload_file_to_drive(data, 'resume.pdf', 'application/pdf')['id']
+
+
+def cached(file_id):
+    return resume_routes.RESUME_CACHE.get(file_id) is not None
+
+
+def wait_for_job(job_id):
+    deadline = time.monotonic() + JOB_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        job = db.session.get(BackgroundJob, job_id)
+        if job.status in ('Succeeded', 'Failed'):
+            return job
+        time.sleep(0.05)
+    return job
+
+
+failures = []
+
+
+def check(label, ok):
+    print(f"  {label:62} {'ok' if ok else 'FAIL'}")
+    if not ok:
+        failures.append(label)
+
+
+print("Drive service")
+services = {}
+barrier = threading.Barrier(THREADS)
+
+
+def use_service(wait=True):
+    seen = {id(resume_routes.get_drive_service()) for _ in range(3)}
+    services[threading.get_ident()] = seen
+    if wait:
+        barrier.wait()  # Keeps thread idents distinct
+
+
+threads = [threading.Thread(target=use_service) for _ in range(THREADS)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+use_service(wait=False)
+check(f'one build per thread ({THREADS + 1} threads)',
+      len(builds) == THREADS + 1 and set(builds.values()) == {1})
+check('same service within a thread', all(len(seen) == 1 for seen in services.values()))
+
+print("Download cache")
+service = resume_routes.get_drive_service()
+file_id = drive_upload(b'%PDF-1.4 first resume')
+before = service.calls['get_media']
+first = resume_routes.download_drive_file(file_id)
+second = resume_routes.download_drive_file(file_id)
+check('miss fetches once from Drive', service.calls['get_media'] - before == 1)
+check('hit skips the media GET and returns the same bytes', first == second == b'%PDF-1.4 first resume')
+
+print("Eviction")
+lru = DiskLRUCache(Path(TMP.name) / 'evict', 3000)
+for key in ['a', 'b', 'c']:
+    lru.put(key, key.encode() * 1000)
+    time.sleep(0.02)
+lru.get('a')
+time.sleep(0.02)
+lru.put('d', b'd' * 1000)
+check('least recently used entry evicted', lru.get('b') is None)
+check('recently read entry kept', all(lru.get(key) for key in ['a', 'c', 'd']))
+check('size stays within max_bytes', lru.size() <= lru.max_bytes)
+lru.put('e', b'e' * 4000)
+check('entry larger than max_bytes not stored', lru.get('e') is None)
+
+with app.app_context():
+    user, student = seed()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_user_token(user)}'}
+    client = app.test_client()
+
+    print("Invalidation")
+    old_id = drive_upload(b'%PDF-1.4 old resume')
+    student.resume_url = f'https://drive.google.com/file/d/{old_id}/view'
+    db.session.commit()
+    resume_routes.download_drive_file(old_id)
+    response = client.post('/api/student/upload-resume', headers=headers,
+                           data={'resume': (BytesIO(b'replacement resume'), 'resume.docx')})
+    check('upload accepted', response.status_code == 202)
+    check('upload drops the previous copy', not cached(old_id))
+
+    job = wait_for_job(response.get_json()['job_id'])
+    db.session.refresh(student)
+    new_id = resume_routes.extract_drive_file_id(student.resume_url)
+    check('upload job moves the resume to Drive', job.status == 'Succeeded' and new_id and new_id != old_id)
+    check('upload job caches the new copy', new_id and cached(new_id))
+
+    response = client.delete('/api/student/delete-resume', headers=headers)
+    check('delete removes the Drive copy', response.status_code == 200 and response.get_json()['drive_deleted'])
+    check('delete drops the cached copy', not cached(new_id))
+
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
+
+TMP.cleanup()
+sys.exit(1 if failures else 0)
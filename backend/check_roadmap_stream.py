@@ -0,0 +1,111 @@
+"""
+Check the streaming roadmap endpoint against fake_groq.py
+
+Seeds one student application in a throwaway SQLite database unless
+BENCHMARK_DATABASE_URL is set (never point it at a database you care about:
+it creates and drops tables), patches learning_guide_routes.get_groq_client
+to return a FakeGroq, and streams /generate-roadmap/stream twice. Checks the
+event order (meta, tokens, done), that sections 1-4 arrive in order with the
+company sections spliced before the day plan, and that the second stream
+reuses the cached company sections without asking Groq for them again.
+Exits non-zero on any failure.
+
+    python check_roadmap_stream.py
+"""
+import json
+import os
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / 'check_roadmap_stream.db'
+os.environ['DATABASE_URL'] = os.getenv('BENCHMARK_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from app import app, db
+from auth import create_user_token
+from models import User, Company, Student, Job, Application
+import learning_guide_routes
+from fake_groq import FakeGroq
+
+URL = '/api/student/learning-guide/generate-roadmap/stream'
+HEADING = re.compile(r'^## (\d)\.', re.MULTILINE)
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    company_user = User(email='check-company@example.com', role_id=2, is_verified=True, password_hash='x')
+    student_user = User(email='check-student@example.com', role_id=1, is_verified=True, password_hash='x')
+    db.session.add_all([company_user, student_user])
+    db.session.flush()
+    company = Company(user_id=company_user.id, company_name='Check Corp', hr_name='HR')
+    student = Student(user_id=student_user.id, full_name='Check Student', enrollment_number='CHECK00001',
+                      branch='CSE', branch_code='CSE', cgpa=8, graduation_year=2025)
+    db.session.add_all([company, student])
+    db.session.flush()
+    job = Job(company_id=company.id, title='Check Engineer', job_type='Full-Time', description='Check',
+              application_deadline=date.today() + timedelta(days=30), status='Approved')
+    db.session.add(job)
+    db.session.flush()
+    application = Application(student_id=student.id, job_id=job.id, status='Applied')
+    db.session.add(application)
+    db.session.commit()
+    return student_user, application
+
+
+def parse_events(body):
+    events = []
+    for block in body.split('\n\n'):
+        if not block.strip():
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def stream(client, headers, application_id):
+    groq = FakeGroq()
+    learning_guide_routes.get_groq_client = lambda: groq
+    response = client.post(URL, headers=headers, json={'application_id': application_id})
+    events = parse_events(response.get_data(as_text=True))
+    return response, events, groq.calls
+
+
+with app.app_context():
+    user, application = seed()
+    with app.test_request_context():
+        headers = {'Authorization': f'Bearer {create_user_token(user)}'}
+    client = app.test_client()
+
+    failures = []
+
+    def check(label, ok):
+        print(f"  {label:62} {'ok' if ok else 'FAIL'}")
+        if not ok:
+            failures.append(label)
+
+    contents = []
+    for attempt, cached in [('first', False), ('second', True)]:
+        print(f"{attempt} stream")
+        response, events, calls = stream(client, headers, application.id)
+        names = [name for name, _ in events]
+        content = ''.join(data['content'] for name, data in events if name == 'token')
+        contents.append(content)
+        check('200 text/event-stream', response.status_code == 200 and response.mimetype == 'text/event-stream')
+        check('meta, tokens, done', len(names) > 2 and names[0] == 'meta' and names[-1] == 'done'
+              and set(names[1:-1]) == {'token'})
+        check(f'sections_cached is {cached}', events[0][1].get('sections_cached') is cached)
+        check('headings 1, 2, 3, 4 in order', HEADING.findall(content) == ['1', '2', '3', '4'])
+        check('sections separated by a blank line', all(
+            content[m.start() - 2:m.start()] == '\n\n' for m in HEADING.finditer(content) if m.start()))
+        expected_calls = [True] if cached else [True, False]
+        check('company sections ' + ('taken from the cache' if cached else 'requested once'),
+              sorted((call['stream'] for call in calls), reverse=True) == expected_calls)
+
+    check('cached splice matches the first stream', contents[0] == contents[1])
+
+    db.session.remove()
+    if 'BENCHMARK_DATABASE_URL' not in os.environ:
+        DB_PATH.unlink(missing_ok=True)
+    sys.exit(1 if failures else 0)
@@ -3,23 +3,29 @@ Advanced Company Dashboard Routes
 Includes: Create Drive Wizard, Advanced Applicant Management, Interview Scheduling, Offer Letters
 """
 
-from flask import jsonify, request, Blueprint
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Company, Job, Student, Application, HiringRound, ApplicationRound, InterviewSlot, InterviewBooking, OfferLetter
+from flask import jsonify, request, Blueprint, Response, send_file
+from flask_jwt_extended import jwt_required
+from models import db, Company, Job, Student, Application, HiringRound, ApplicationRound, InterviewSlot, InterviewBooking, OfferLetter, ResumeScore, StudentJobEligibility, BackgroundJob
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
-import json
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import selectinload
 import re
-from io import BytesIO
+from io import TextIOWrapper
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
 import csv
+from branches import format_eligible_branches, sync_job_branches
+from eligibility import refresh_job_eligibility, applicant_eligibility, applicant_reason_messages
+from auth import roles_required, get_user_id, get_company_id, current_company, ROLE_COMPANY
+from job_queue import submit_job, job_accepted
+from analytics_cache import mark_changed
+from pagination import encode_cursor, decode_cursor, keyset_order, keyset_after
+from resume_bundle import bundle_students, stream_resume_bundle, new_bundle_token, bundle_path
 
 company_bp = Blueprint('company_advanced', __name__, url_prefix='/api/company')
 
-def get_user_id():
-    """Get user ID from JWT identity"""
-    identity = get_jwt_identity()
-    return int(identity) if isinstance(identity, str) else identity
-
+# Concurrent resume downloads when scoring a whole applicant list
+RESUME_FETCH_WORKERS = 8
 
 def extract_round_number(status):
     """Extract round number from status string like 'Round 1: Technical' -> 1"""
@@ -33,13 +39,11 @@ def extract_round_number(status):
 # ==================== CREATE DRIVE WIZARD ====================
 
 @company_bp.route('/create-drive/step1', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def create_drive_step1():
     """Step 1: Basic Job Details"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company = current_company()
         
         if not company:
             return jsonify({'error': 'Company profile not found'}), 404
@@ -78,15 +82,13 @@ def create_drive_step1():
 
 
 @company_bp.route('/create-drive/<int:job_id>/step2', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def create_drive_step2(job_id):
     """Step 2: Eligibility Criteria"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
@@ -94,9 +96,11 @@ def create_drive_step2(job_id):
         
         # Update eligibility criteria
         job.min_cgpa = data.get('min_cgpa', 0.0)
-        job.eligible_branches = json.dumps(data.get('eligible_branches', []))
+        job.eligible_branches = format_eligible_branches(data.get('eligible_branches', []))
+        sync_job_branches(job)
         job.min_10th_percentage = data.get('min_10th_percentage')
         job.min_12th_percentage = data.get('min_12th_percentage')
+        refresh_job_eligibility(job)
         
         db.session.commit()
         
@@ -112,15 +116,13 @@ def create_drive_step2(job_id):
 
 
 @company_bp.route('/create-drive/<int:job_id>/step3', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def create_drive_step3(job_id):
     """Step 3: Hiring Process Configuration"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
@@ -143,6 +145,7 @@ def create_drive_step3(job_id):
         
         # Publish the job
         job.status = 'Approved'
+        refresh_job_eligibility(job)
         db.session.commit()
         
         return jsonify({
@@ -159,16 +162,32 @@ def create_drive_step3(job_id):
 
 # ==================== ADVANCED APPLICANT MANAGEMENT ====================
 
+# sort_by -> (sort column, unique tie-break column) for the applicants view
+APPLICANT_SORT_KEYS = {
+    'applied_at': (Application.applied_at, Application.id),
+    'cgpa': (Student.cgpa, Student.id),
+    'name': (Student.full_name, Student.id),
+    'ats_score': (Student.ats_score, Student.id),
+}
+APPLICANTS_MAX_LIMIT = 200
+
+
 @company_bp.route('/job/<int:job_id>/applicants/advanced', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_applicants_advanced(job_id):
-    """Get applicants with advanced filtering and eligibility checking"""
+    """
+    Get applicants with advanced filtering and eligibility checking
+    
+    With limit (max APPLICANTS_MAX_LIMIT) the response is one keyset page:
+    pass next_cursor back as cursor for the following one. total counts all
+    matching applicants either way (window function over the filtered rows).
+    Read-only: applicants without a stored eligibility row are evaluated for
+    the page, so with hide_ineligible a page can hold fewer than limit rows.
+    """
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
@@ -179,9 +198,66 @@ def get_applicants_advanced(job_id):
         filter_cgpa = request.args.get('min_cgpa')
         filter_branch = request.args.get('branch')
         filter_status = request.args.get('status')
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        
+        if sort_by not in APPLICANT_SORT_KEYS:
+            sort_by = 'applied_at'
+        descending = sort_order == 'desc'
+        sort_column, id_column = APPLICANT_SORT_KEYS[sort_by]
+        if limit is not None:
+            limit = max(1, min(limit, APPLICANTS_MAX_LIMIT))
+        
+        # Matching applications with their sort key and the total match count
+        ranked = db.session.query(
+            Application.id.label('app_id'),
+            sort_column.label('sort_value'),
+            id_column.label('sort_id'),
+            func.count().over().label('total')
+        ).join(Student, Application.student_id == Student.id).outerjoin(
+            StudentJobEligibility, and_(
+                StudentJobEligibility.student_id == Student.id,
+                StudentJobEligibility.job_id == Application.job_id
+            )
+        ).filter(
+            Application.job_id == job_id
+        )
+        
+        # Apply filters
+        if hide_ineligible:
+            # Eligibility is one indexed predicate; applicants without a row are evaluated below
+            ranked = ranked.filter(or_(
+                StudentJobEligibility.student_id.is_(None),
+                StudentJobEligibility.is_eligible == True
+            ))
+        
+        if filter_cgpa:
+            ranked = ranked.filter(Student.cgpa >= float(filter_cgpa))
+        
+        if filter_branch:
+            ranked = ranked.filter(Student.branch == filter_branch)
         
-        # Base query
-        query = db.session.query(
+        if filter_status:
+            ranked = ranked.filter(Application.status == filter_status)
+        
+        ranked = ranked.subquery()
+        
+        # Apply sorting and the page window
+        page = db.session.query(ranked)
+        if cursor:
+            try:
+                cursor_sort, last_value, last_id = decode_cursor(cursor, 3)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if cursor_sort != f'{sort_by}:{sort_order}':
+                return jsonify({'error': 'Cursor does not match sort_by/sort_order'}), 400
+            page = page.filter(keyset_after(ranked.c.sort_value, ranked.c.sort_id, last_value, last_id, descending))
+        page = page.order_by(*keyset_order(ranked.c.sort_value, ranked.c.sort_id, descending))
+        if limit is not None:
+            page = page.limit(limit + 1)
+        page = page.subquery()
+        
+        applicants = db.session.query(
             Application.id,
             Application.status,
             Application.applied_at,
@@ -189,55 +265,44 @@ def get_applicants_advanced(job_id):
             Student.full_name,
             Student.enrollment_number,
             Student.branch,
+            Student.branch_code,
             Student.cgpa,
             Student.phone,
             Student.skills,
             Student.ats_score,
             Student.ats_feedback,
-            Student.ats_calculated_at
-        ).join(Student, Application.student_id == Student.id).filter(
-            Application.job_id == job_id
-        )
-        
-        # Apply filters
-        if hide_ineligible:
-            job_branches = json.loads(job.eligible_branches) if job.eligible_branches else []
-            # Check if branches is set to "All"
-            branches_is_all = False
-            if job_branches:
-                if 'All' in job_branches or 'all' in [str(b).lower() for b in job_branches]:
-                    branches_is_all = True
-            # Only apply branch filter if not "All"
-            if job_branches and not branches_is_all:
-                query = query.filter(Student.branch.in_(job_branches))
-            if job.min_cgpa:
-                query = query.filter(Student.cgpa >= float(job.min_cgpa))
-        
-        if filter_cgpa:
-            query = query.filter(Student.cgpa >= float(filter_cgpa))
-        
-        if filter_branch:
-            query = query.filter(Student.branch == filter_branch)
-        
-        if filter_status:
-            query = query.filter(Application.status == filter_status)
-        
-        # Apply sorting
-        if sort_by == 'cgpa':
-            query = query.order_by(Student.cgpa.desc() if sort_order == 'desc' else Student.cgpa.asc())
-        elif sort_by == 'name':
-            query = query.order_by(Student.full_name.asc() if sort_order == 'asc' else Student.full_name.desc())
-        elif sort_by == 'ats_score':
-            query = query.order_by(Student.ats_score.desc() if sort_order == 'desc' else Student.ats_score.asc())
+            Student.ats_calculated_at,
+            Student.batch_id,
+            StudentJobEligibility.reasons,
+            page.c.sort_value,
+            page.c.sort_id,
+            page.c.total
+        ).join(page, Application.id == page.c.app_id).join(
+            Student, Application.student_id == Student.id
+        ).outerjoin(
+            StudentJobEligibility, and_(
+                StudentJobEligibility.student_id == Student.id,
+                StudentJobEligibility.job_id == Application.job_id
+            )
+        ).order_by(*keyset_order(page.c.sort_value, page.c.sort_id, descending)).all()
+        
+        has_more = limit is not None and len(applicants) > limit
+        if has_more:
+            applicants = applicants[:limit]
+        if applicants:
+            total = applicants[0].total
+        elif cursor:
+            total = db.session.query(func.count()).select_from(ranked).scalar()
         else:
-            query = query.order_by(Application.applied_at.desc() if sort_order == 'desc' else Application.applied_at.asc())
-        
-        applicants = query.all()
+            total = 0
+        reasons = applicant_eligibility(job, applicants)
         
         # Format response
         result = []
         for app in applicants:
-            eligibility = check_eligibility(app, job)
+            eligibility = check_eligibility(app, job, reasons[app.student_id])
+            if hide_ineligible and not eligibility['is_eligible']:
+                continue
             result.append({
                 'application_id': app.id,
                 'student_id': app.student_id,
@@ -257,9 +322,12 @@ def get_applicants_advanced(job_id):
                 'current_round_number': extract_round_number(app.status)
             })
         
+        last = applicants[-1] if has_more else None
         return jsonify({
-            'total': len(result),
+            'total': total,
             'applicants': result,
+            'next_cursor': encode_cursor(f'{sort_by}:{sort_order}', last.sort_value, last.sort_id) if last else None,
+            'has_more': has_more,
             'filters_applied': {
                 'hide_ineligible': hide_ineligible,
                 'sort_by': sort_by,
@@ -271,102 +339,278 @@ def get_applicants_advanced(job_id):
         return jsonify({'error': str(e)}), 500
 
 
-def check_eligibility(applicant, job):
-    """Check if an applicant meets job eligibility criteria"""
-    reasons = []
-    
+@company_bp.route('/job/<int:job_id>/applicants/ats-ranking', methods=['GET'])
+@roles_required(ROLE_COMPANY)
+def get_applicants_ats_ranking(job_id):
+    """Score every applicant's resume against the job's JD and return a ranked, paginated list"""
     try:
-        job_branches = json.loads(job.eligible_branches) if job.eligible_branches else []
-    except:
-        job_branches = []
-    
-    # Check if branches is set to "All" (skip branch check if so)
-    branches_is_all = False
-    if job.eligible_branches:
-        try:
-            # Check if it's a JSON array containing "All"
-            if 'All' in job_branches or 'all' in [str(b).lower() for b in job_branches]:
-                branches_is_all = True
-        except:
-            # Check if it's a plain string "All"
-            if job.eligible_branches.strip().lower() == 'all':
-                branches_is_all = True
-    
-    if job_branches and applicant.branch not in job_branches and not branches_is_all:
-        reasons.append(f'Branch {applicant.branch} not in eligible branches: {", ".join(job_branches)}')
-    
-    if job.min_cgpa and float(applicant.cgpa) < float(job.min_cgpa):
-        reasons.append(f'CGPA {applicant.cgpa} below minimum {job.min_cgpa}')
-    
+        from ats_scorer import ATSMatcher, calculate_ats_scores_batch, build_jd_text
+        from ats_store import jd_hash, result_from_row, store_score
+        from resume_routes import fetch_resume_text, store_resume_document, current_resume_document
+
+        company_id = get_company_id()
+
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+
+        rows = db.session.query(Application, Student).join(
+            Student, Application.student_id == Student.id
+        ).options(selectinload(Student.resume_document)).filter(Application.job_id == job_id).all()
+
+        # Reuse stored scores whose resume and JD hashes are still current
+        digest = jd_hash(job)
+        stored = {row.student_id: row for row in ResumeScore.query.filter_by(job_id=job_id).all()}
+        results = {}
+        resume_features = {}
+        missing_text = []
+        unscored = {}
+        for app, student in rows:
+            row = stored.get(student.id)
+            if not student.resume_url:
+                unscored[app.id] = 'No resume uploaded'
+            elif row and row.jd_hash == digest and student.resume_hash and row.resume_hash == student.resume_hash:
+                results[app.id] = result_from_row(row)
+            else:
+                doc = current_resume_document(student)
+                if doc:
+                    resume_features[app.id] = doc.features
+                else:
+                    missing_text.append((app, student))
+
+        # Only resumes never extracted need a download; overlap those on threads
+        with ThreadPoolExecutor(max_workers=RESUME_FETCH_WORKERS) as executor:
+            fetched = list(executor.map(lambda pair: fetch_resume_text(pair[1]), missing_text))
+        for (app, student), (text, error) in zip(missing_text, fetched):
+            if error:
+                unscored[app.id] = error
+            else:
+                resume_features[app.id] = store_resume_document(student, text).features
+
+        # JD is parsed once; large applicant lists are scored on a process pool
+        fresh = calculate_ats_scores_batch(resume_features, build_jd_text(job))
+        if fresh:
+            matcher = ATSMatcher()
+            for app, student in rows:
+                result = fresh.get(app.id)
+                if result:
+                    result['heatmap_data'] = matcher.generate_heatmap_data(result['report'])
+                    store_score(student, job, result, digest, stored.get(student.id))
+        if db.session.dirty or db.session.new:
+            db.session.commit()
+        results.update(fresh)
+
+        ranking = []
+        for app, student in rows:
+            result = results.get(app.id)
+            ranking.append({
+                'application_id': app.id,
+                'student_id': student.id,
+                'name': student.full_name,
+                'enrollment': student.enrollment_number,
+                'branch': student.branch,
+                'cgpa': float(student.cgpa) if student.cgpa is not None else None,
+                'status': app.status,
+                'ats_score': round(result['score'], 2) if result else None,
+                'level': result['level'] if result else None,
+                'matched_skills': sorted(result['report']['strengths']) if result else [],
+                'missing_required': sorted(result['report']['missing_required']) if result else [],
+                'error': unscored.get(app.id)
+            })
+
+        # Scored applicants first (highest score first), unscored ones last
+        ranking.sort(key=lambda r: (r['ats_score'] is None, -(r['ats_score'] or 0), r['name'] or ''))
+        for rank, entry in enumerate(ranking, 1):
+            entry['rank'] = rank if entry['ats_score'] is not None else None
+
+        total = len(ranking)
+        start = (page - 1) * per_page
+
+        return jsonify({
+            'job_id': job.id,
+            'job_title': job.title,
+            'scored_count': len(results),
+            'unscored_count': len(unscored),
+            'applicants': ranking[start:start + per_page],
+            'pagination': {
+                'total': total,
+                'pages': ceil(total / per_page) if per_page > 0 else 0,
+                'current_page': page,
+                'per_page': per_page
+            }
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def check_eligibility(applicant, job, reasons):
+    """Eligibility of an applicant from its REASON_* bitmask (see eligibility.py)"""
     return {
-        'is_eligible': len(reasons) == 0,
-        'reasons': reasons
+        'is_eligible': reasons == 0,
+        'reasons': applicant_reason_messages(reasons, job, applicant)
     }
 
 
 @company_bp.route('/job/<int:job_id>/applicants/download-resumes', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def download_resumes_zip(job_id):
-    """Download all applicant resumes as a ZIP file"""
+    """Download applicant resumes (student_ids, default all applicants) as a streamed ZIP file"""
     try:
-        import zipfile
-        from io import BytesIO
+        company_id = get_company_id()
         
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
-        
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
-        data = request.get_json()
-        student_ids = data.get('student_ids', [])
+        data = request.get_json(silent=True) or {}
+        students = bundle_students(job_id, data.get('student_ids'))
+        if not students:
+            return jsonify({'error': 'No resumes found for the selected applicants'}), 404
         
-        # Create in-memory ZIP file
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            students = Student.query.filter(Student.id.in_(student_ids)).all()
-            
-            for student in students:
-                # Add mock resume data
-                resume_content = f"""
-RESUME - {student.full_name}
+        return Response(stream_resume_bundle(students), mimetype='application/zip', headers={
+            'Content-Disposition': f'attachment; filename="resumes_job_{job_id}.zip"'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-Contact Information:
-Email: {student.user.email if student.user else 'N/A'}
-Phone: {student.phone}
-Branch: {student.branch}
 
-CGPA: {student.cgpa}
-Graduation Year: {student.graduation_year}
+@company_bp.route('/job/<int:job_id>/applicants/resume-bundle', methods=['POST'])
+@roles_required(ROLE_COMPANY)
+def prepare_resume_bundle(job_id):
+    """Prepare a large resume ZIP in the background; download it from the job's result when it succeeds"""
+    try:
+        company_id = get_company_id()
+        
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        bundle_job = submit_job('resume_bundle', {
+            'job_id': job_id,
+            'student_ids': data.get('student_ids'),
+            'token': new_bundle_token(),
+            'filename': f'resumes_job_{job_id}.zip'
+        }, user_id=get_user_id())
+        return job_accepted(bundle_job, download_url=f'/api/company/resume-bundles/{bundle_job.id}')
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
-Skills: {student.skills}
-""".encode('utf-8')
-                
-                zip_file.writestr(f'{student.full_name}_{student.enrollment_number}_resume.txt', resume_content)
+
+@company_bp.route('/resume-bundles/<int:bundle_job_id>', methods=['GET'])
+@roles_required(ROLE_COMPANY)
+def download_resume_bundle(bundle_job_id):
+    """Download a ZIP prepared by prepare_resume_bundle"""
+    try:
+        bundle_job = db.session.get(BackgroundJob, bundle_job_id)
+        if not bundle_job or bundle_job.job_type != 'resume_bundle' or bundle_job.user_id != get_user_id():
+            return jsonify({'error': 'Bundle not found'}), 404
+        if bundle_job.status != 'Succeeded':
+            return jsonify({'error': f'Bundle is {bundle_job.status.lower()}', 'status': bundle_job.status}), 409
         
-        zip_buffer.seek(0)
+        path = bundle_path(bundle_job.payload['token'])
+        if not path.exists():
+            return jsonify({'error': 'Bundle has expired; prepare it again'}), 410
         
-        return {
-            'message': f'ZIP created with {len(students)} resumes',
-            'count': len(students)
-        }, 200
+        return send_file(path, mimetype='application/zip', as_attachment=True,
+                         download_name=bundle_job.payload['filename'])
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+APPLICATION_STATUSES = ['Applied', 'Shortlisted', 'Interview', 'Selected', 'Rejected']
+
+# Rows validated and resolved per IN query in bulk status uploads
+BULK_STATUS_CHUNK = 1000
+
+
+def iter_upload_rows(file):
+    """Yield (row_number, {header: value}) from an uploaded CSV or XLSX file without loading it whole"""
+    filename = (file.filename or '').lower()
+    if filename.endswith(('.xlsx', '.xlsm')):
+        import openpyxl
+        workbook = openpyxl.load_workbook(file.stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [str(h).strip().lower() if h is not None else '' for h in next(rows, ())]
+            for idx, values in enumerate(rows, 2):
+                if any(v not in (None, '') for v in values):
+                    yield idx, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        stream = TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+        reader = csv.DictReader(stream)
+        reader.fieldnames = [(h or '').strip().lower() for h in reader.fieldnames or []]
+        for idx, row in enumerate(reader, 2):
+            if any((v or '').strip() for v in row.values() if isinstance(v, str)):
+                yield idx, row
+
+
+def parse_student_id(raw_id):
+    """Student id from an upload cell: ints, whole-number XLSX floats and digit strings; None otherwise"""
+    if isinstance(raw_id, bool):
+        return None
+    if isinstance(raw_id, int):
+        return raw_id
+    if isinstance(raw_id, float):
+        return int(raw_id) if raw_id.is_integer() else None
+    try:
+        return int(str(raw_id).strip())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def apply_status_chunk(job_id, chunk, errors, now):
+    """Resolve a chunk of (row, student_id, status) with one IN query and bulk-update it per status"""
+    app_ids = dict(db.session.query(Application.student_id, Application.id).filter(
+        Application.job_id == job_id,
+        Application.student_id.in_({student_id for _, student_id, _ in chunk})
+    ).all())
+
+    by_status = {}
+    for idx, student_id, status in chunk:
+        app_id = app_ids.get(student_id)
+        if app_id is None:
+            errors.append({'row': idx, 'student_id': student_id, 'error': f'Student {student_id} application not found'})
+            continue
+        # A later row for the same student wins
+        for mappings in by_status.values():
+            mappings.pop(app_id, None)
+        by_status.setdefault(status, {})[app_id] = {'id': app_id, 'status': status, 'updated_at': now}
+
+    updated = 0
+    for mappings in by_status.values():
+        if mappings:
+            db.session.bulk_update_mappings(Application, list(mappings.values()))
+            updated += len(mappings)
+    if updated:
+        mark_changed(Application)  # Bulk updates skip the flush events
+    return updated
+
+
 @company_bp.route('/job/<int:job_id>/bulk-status-upload', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def bulk_status_upload(job_id):
-    """Upload CSV/Excel file to update application statuses in bulk"""
+    """
+    Upload CSV/Excel file to update application statuses in bulk
+    
+    Columns: student_id, status. Rows are streamed and applied in chunks of
+    BULK_STATUS_CHUNK; invalid rows are reported in errors and skipped.
+    """
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
@@ -374,45 +618,46 @@ def bulk_status_upload(job_id):
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
+        statuses = {status.lower(): status for status in APPLICATION_STATUSES}
+        now = datetime.utcnow()
         
-        # Parse CSV data
-        stream = file.stream.read().decode('utf8'), 
-        csv_data = csv.DictReader(stream)
-        
-        updates = []
+        updated_count = 0
+        rows_processed = 0
         errors = []
+        chunk = []
+        
+        for idx, row in iter_upload_rows(file):
+            rows_processed += 1
+            raw_id = row.get('student_id')
+            raw_status = str(row.get('status') or '').strip()
+            student_id = parse_student_id(raw_id)
+            if student_id is None:
+                shown = raw_id if raw_id is None or isinstance(raw_id, str) else str(raw_id)
+                errors.append({'row': idx, 'student_id': shown, 'error': f'Invalid student_id "{raw_id}"'})
+                continue
+            
+            new_status = statuses.get(raw_status.lower())
+            if not new_status:
+                errors.append({'row': idx, 'student_id': student_id, 'error': f'Invalid status "{raw_status}"'})
+                continue
+            
+            chunk.append((idx, student_id, new_status))
+            if len(chunk) >= BULK_STATUS_CHUNK:
+                updated_count += apply_status_chunk(job_id, chunk, errors, now)
+                chunk = []
         
-        for idx, row in enumerate(csv_data, 1):
-            try:
-                student_id = int(row.get('student_id', ''))
-                new_status = row.get('status', '')
-                
-                if not new_status in ['Applied', 'Shortlisted', 'Interview', 'Selected', 'Rejected']:
-                    errors.append(f'Row {idx}: Invalid status "{new_status}"')
-                    continue
-                
-                app = Application.query.filter_by(
-                    job_id=job_id,
-                    student_id=student_id
-                ).first()
-                
-                if app:
-                    app.status = new_status
-                    app.updated_at = datetime.utcnow()
-                    updates.append(student_id)
-                else:
-                    errors.append(f'Row {idx}: Student {student_id} application not found')
-                    
-            except Exception as e:
-                errors.append(f'Row {idx}: {str(e)}')
+        if chunk:
+            updated_count += apply_status_chunk(job_id, chunk, errors, now)
         
         db.session.commit()
         
+        errors.sort(key=lambda e: e['row'])
         return jsonify({
             'message': 'Bulk status update completed',
-            'updated_count': len(updates),
+            'rows_processed': rows_processed,
+            'updated_count': updated_count,
             'error_count': len(errors),
-            'errors': errors[:10]  # Return first 10 errors
+            'errors': errors
         }), 200
         
     except Exception as e:
@@ -423,22 +668,20 @@ def bulk_status_upload(job_id):
 # ==================== INTERVIEW SCHEDULING ====================
 
 @company_bp.route('/job/<int:job_id>/interview-slots', methods=['GET', 'POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def manage_interview_slots(job_id):
     """Get or create interview slots"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
         if request.method == 'GET':
             hiring_round_id = request.args.get('hiring_round_id')
             slots = InterviewSlot.query.filter(
-                InterviewSlot.company_id == company.id,
+                InterviewSlot.company_id == company_id,
                 InterviewSlot.hiring_round.has(HiringRound.job_id == job_id)
             )
             
@@ -460,7 +703,7 @@ def manage_interview_slots(job_id):
             for slot_data in slots_to_create:
                 slot = InterviewSlot(
                     hiring_round_id=hiring_round.id,
-                    company_id=company.id,
+                    company_id=company_id,
                     slot_date=datetime.strptime(slot_data['date'], '%Y-%m-%d').date(),
                     slot_time=datetime.strptime(slot_data['time'], '%H:%M').time(),
                     interviewer_name=slot_data.get('interviewer_name'),
@@ -486,15 +729,13 @@ def manage_interview_slots(job_id):
 
 
 @company_bp.route('/interview-slot/<int:slot_id>/bookings', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_slot_bookings(slot_id):
     """Get all bookings for an interview slot"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
         
         slot = InterviewSlot.query.get(slot_id)
-        if not slot or slot.company_id != user.company.id:
+        if not slot or slot.company_id != get_company_id():
             return jsonify({'error': 'Slot not found'}), 404
         
         bookings = InterviewBooking.query.filter_by(interview_slot_id=slot_id).all()
@@ -512,13 +753,11 @@ def get_slot_bookings(slot_id):
 # ==================== OFFER LETTER GENERATION ====================
 
 @company_bp.route('/application/<int:application_id>/generate-offer', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def generate_offer_letter(application_id):
     """Generate an offer letter for a selected candidate"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company = current_company()
         
         app = Application.query.get(application_id)
         if not app or app.job.company_id != company.id:
@@ -611,16 +850,14 @@ def generate_offer_letter_html(student_name, designation, ctc, location, joining
 
 
 @company_bp.route('/offer/<int:offer_id>/send', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def send_offer_letter(offer_id):
     """Send offer letter to student"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
         offer = OfferLetter.query.get(offer_id)
-        if not offer or offer.company_id != company.id:
+        if not offer or offer.company_id != company_id:
             return jsonify({'error': 'Offer not found'}), 404
         
         # Mark as sent (in production, actually send email)
@@ -642,15 +879,13 @@ def send_offer_letter(offer_id):
 # ==================== HIRING ROUNDS MANAGEMENT ====================
 
 @company_bp.route('/job/<int:job_id>/hiring-rounds', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_hiring_rounds(job_id):
     """Get all hiring rounds for a job"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        company = user.company
+        company_id = get_company_id()
         
-        job = Job.query.filter_by(id=job_id, company_id=company.id).first()
+        job = Job.query.filter_by(id=job_id, company_id=company_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
         
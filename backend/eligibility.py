@@ -0,0 +1,208 @@
+"""
+Materialized student-job eligibility (student_job_eligibility)
+
+Every student has one row per job with a REASON_* bitmask of the rules they
+fail (0: eligible). Rows are recomputed incrementally by the write paths:
+
+- refresh_job_eligibility: a job is approved or its criteria are edited
+- refresh_student_eligibility: a student registers or their CGPA/branch/batch changes
+- refresh_batch_session_eligibility: a BatchSessionMapping is added, changed or removed
+- rebuild_eligibility ('eligibility_rebuild' background job): Department changes
+
+so the student job list, the company applicant view and apply_to_job read an
+indexed table instead of re-evaluating the rules per request. Callers commit.
+"""
+
+from datetime import datetime
+
+from models import db, Job, Student, StudentJobEligibility, BatchSessionMapping
+from branches import branch_lookup, normalize_branch, job_branch_codes, branch_eligible, parse_eligible_branches
+from job_queue import job_handler
+
+REASON_CGPA = 1
+REASON_BRANCH = 2
+REASON_BATCH = 4  # Student's batch is not mapped eligible to the job's placement session
+
+# Columns needed to evaluate a student against a job
+STUDENT_COLUMNS = (Student.id, Student.cgpa, Student.branch, Student.branch_code, Student.batch_id)
+
+
+def eligible_batches(session_ids):
+    """session id -> batch ids mapped eligible to it"""
+    batches = {session_id: set() for session_id in session_ids if session_id}
+    if not batches:
+        return batches
+    rows = db.session.query(BatchSessionMapping.session_id, BatchSessionMapping.batch_id).filter(
+        BatchSessionMapping.session_id.in_(list(batches)),
+        BatchSessionMapping.is_eligible == True
+    ).all()
+    for session_id, batch_id in rows:
+        batches[session_id].add(batch_id)
+    return batches
+
+
+def compute_reasons(student, job, branch_codes, batches, lookup=None):
+    """REASON_* bitmask for a student row against a job (branch_codes: the job's codes, None for all)"""
+    reasons = 0
+    if job.min_cgpa and float(student.cgpa or 0) < float(job.min_cgpa):
+        reasons |= REASON_CGPA
+    student_code = student.branch_code or normalize_branch(student.branch, lookup)
+    if not branch_eligible(student_code, branch_codes):
+        reasons |= REASON_BRANCH
+    if job.session_id and student.batch_id and student.batch_id not in batches.get(job.session_id, ()):
+        reasons |= REASON_BATCH
+    return reasons
+
+
+def _row(student_id, job_id, reasons, now):
+    return {
+        'student_id': student_id,
+        'job_id': job_id,
+        'is_eligible': reasons == 0,
+        'reasons': reasons,
+        'computed_at': now
+    }
+
+
+def _student_lookup(students):
+    """Alias lookup, only built when a student row predates branch codes"""
+    return branch_lookup() if any(s.branch_code is None for s in students) else None
+
+
+def refresh_job_eligibility(job):
+    """Recompute every student's row for one job"""
+    db.session.flush()
+    students = db.session.query(*STUDENT_COLUMNS).all()
+    branch_codes = job_branch_codes([job])[job.id]
+    batches = eligible_batches([job.session_id])
+    lookup = _student_lookup(students)
+    now = datetime.utcnow()
+
+    StudentJobEligibility.query.filter_by(job_id=job.id).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(StudentJobEligibility, [
+        _row(s.id, job.id, compute_reasons(s, job, branch_codes, batches, lookup), now) for s in students
+    ])
+
+
+def refresh_student_eligibility(student):
+    """Recompute one student's rows for every job"""
+    db.session.flush()
+    jobs = Job.query.all()
+    lookup = _student_lookup([student])
+    branch_codes = job_branch_codes(jobs, lookup)
+    batches = eligible_batches({job.session_id for job in jobs})
+    now = datetime.utcnow()
+
+    StudentJobEligibility.query.filter_by(student_id=student.id).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(StudentJobEligibility, [
+        _row(student.id, job.id, compute_reasons(student, job, branch_codes[job.id], batches, lookup), now)
+        for job in jobs
+    ])
+
+
+def refresh_batch_session_eligibility(batch_id, session_id):
+    """Re-apply the batch rule for students of batch_id on jobs of session_id"""
+    db.session.flush()
+    mapped = db.session.query(BatchSessionMapping.id).filter_by(
+        batch_id=batch_id, session_id=session_id, is_eligible=True
+    ).first() is not None
+
+    scope = StudentJobEligibility.query.filter(
+        StudentJobEligibility.student_id.in_(db.session.query(Student.id).filter(Student.batch_id == batch_id)),
+        StudentJobEligibility.job_id.in_(db.session.query(Job.id).filter(Job.session_id == session_id))
+    )
+    batch_bit = StudentJobEligibility.reasons.op('&')(REASON_BATCH)
+    if mapped:
+        scope.filter(batch_bit != 0).update(
+            {'reasons': StudentJobEligibility.reasons - REASON_BATCH}, synchronize_session=False
+        )
+    else:
+        scope.filter(batch_bit == 0).update(
+            {'reasons': StudentJobEligibility.reasons + REASON_BATCH}, synchronize_session=False
+        )
+    # Separate statement: MySQL evaluates SET assignments left to right
+    scope.update(
+        {'is_eligible': StudentJobEligibility.reasons == 0, 'computed_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+
+
+def rebuild_eligibility():
+    """Recompute the whole table (after Department changes remap branch codes)"""
+    db.session.flush()
+    students = db.session.query(*STUDENT_COLUMNS).all()
+    jobs = Job.query.all()
+    branch_codes = job_branch_codes(jobs)
+    batches = eligible_batches({job.session_id for job in jobs})
+    lookup = _student_lookup(students)
+    now = datetime.utcnow()
+
+    StudentJobEligibility.query.delete(synchronize_session=False)
+    for job in jobs:
+        db.session.bulk_insert_mappings(StudentJobEligibility, [
+            _row(s.id, job.id, compute_reasons(s, job, branch_codes[job.id], batches, lookup), now)
+            for s in students
+        ])
+    return len(students) * len(jobs)
+
+
+@job_handler('eligibility_rebuild', concurrency=1, timeout=600, max_attempts=3)
+def run_eligibility_rebuild(payload):
+    """Background rebuild of student_job_eligibility"""
+    rows = rebuild_eligibility()
+    db.session.commit()
+    return {'rows': rows}
+
+
+def student_eligibility(student, jobs):
+    """job id -> reasons bitmask for one student, computing jobs with no stored row yet"""
+    reasons = dict(db.session.query(StudentJobEligibility.job_id, StudentJobEligibility.reasons).filter(
+        StudentJobEligibility.student_id == student.id,
+        StudentJobEligibility.job_id.in_([job.id for job in jobs])
+    ).all()) if jobs else {}
+    missing = [job for job in jobs if job.id not in reasons]
+    if missing:
+        lookup = _student_lookup([student])
+        branch_codes = job_branch_codes(missing, lookup)
+        batches = eligible_batches({job.session_id for job in missing})
+        for job in missing:
+            reasons[job.id] = compute_reasons(student, job, branch_codes[job.id], batches, lookup)
+    return reasons
+
+
+def applicant_eligibility(job, applicants):
+    """student id -> reasons bitmask for applicant rows of one job (STUDENT_COLUMNS plus .reasons, None if not stored)"""
+    reasons = {row.student_id: row.reasons for row in applicants}
+    missing = [row for row in applicants if row.reasons is None]
+    if missing:
+        branch_codes = job_branch_codes([job])[job.id]
+        batches = eligible_batches([job.session_id])
+        lookup = branch_lookup() if any(row.branch_code is None for row in missing) else None
+        for row in missing:
+            reasons[row.student_id] = compute_reasons(row, job, branch_codes, batches, lookup)
+    return reasons
+
+
+def student_reason_messages(reasons, job, student):
+    """Messages shown to the student for a reasons bitmask"""
+    messages = []
+    if reasons & REASON_CGPA:
+        messages.append(f"Min CGPA required: {job.min_cgpa} (Your CGPA: {student.cgpa or 0})")
+    if reasons & REASON_BRANCH:
+        messages.append(f"Branch not eligible. Required: {job.eligible_branches}")
+    if reasons & REASON_BATCH:
+        messages.append('Your batch is not eligible for this placement session')
+    return messages
+
+
+def applicant_reason_messages(reasons, job, applicant):
+    """Messages shown to the company for an applicant row (branch, cgpa)"""
+    messages = []
+    if reasons & REASON_BRANCH:
+        job_branches = parse_eligible_branches(job.eligible_branches) or []
+        messages.append(f'Branch {applicant.branch} not in eligible branches: {", ".join(job_branches)}')
+    if reasons & REASON_CGPA:
+        messages.append(f'CGPA {applicant.cgpa} below minimum {job.min_cgpa}')
+    if reasons & REASON_BATCH:
+        messages.append('Batch not eligible for this placement session')
+    return messages
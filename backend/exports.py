@@ -0,0 +1,199 @@
+"""
+Streaming spreadsheet exports
+
+CSV is generated row by row inside the response and JSON listings a chunk
+of array elements at a time. XLSX is written with an openpyxl write-only
+workbook to a temporary file (rows never accumulate in memory) and then
+streamed back in chunks. Query rows should be iterated with yield_per so the
+database driver streams them as well.
+"""
+
+import csv
+import json
+import tempfile
+from io import StringIO
+
+import openpyxl
+from flask import Response, stream_with_context
+from sqlalchemy import case, func, literal
+
+from models import db, Application, ApplicationRound, HiringRound, Student, User, ResumeScore
+
+EXPORT_FORMATS = ('xlsx', 'csv')
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_READ_BYTES = 64 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _iso_date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def _number(value):
+    return float(value) if value is not None else None
+
+
+# key -> (header, value from an applicant export row); order is the default column order
+APPLICANT_EXPORT_COLUMNS = {
+    'name': ('Name', lambda r: r.full_name),
+    'enrollment': ('Enrollment No', lambda r: r.enrollment_number),
+    'branch': ('Branch', lambda r: r.branch),
+    'cgpa': ('CGPA', lambda r: _number(r.cgpa)),
+    'phone': ('Phone', lambda r: r.phone),
+    'email': ('Email', lambda r: r.email),
+    'status': ('Status', lambda r: r.status),
+    'applied_at': ('Applied Date', lambda r: _iso_date(r.applied_at)),
+    'ats_score': ('ATS Score', lambda r: r.overall_match_percentage),
+    'ats_level': ('ATS Level', lambda r: r.level),
+    'profile_ats_score': ('Profile ATS Score', lambda r: _number(r.ats_score)),
+    'rounds_cleared': ('Rounds Cleared', lambda r: int(r.rounds_cleared or 0)),
+    'round_progress': ('Round Progress', lambda r: f'{int(r.rounds_cleared or 0)}/{r.rounds_total}'),
+    'skills': ('Skills', lambda r: r.skills),
+    'resume_url': ('Resume', lambda r: r.resume_url),
+}
+DEFAULT_APPLICANT_COLUMNS = ['name', 'enrollment', 'branch', 'cgpa', 'phone', 'email', 'status', 'applied_at']
+
+# key -> (header, value from a student_placement_snapshot row); keys are the JSON record keys
+STUDENT_EXPORT_COLUMNS = {
+    'enrollment_number': ('Enrollment No', lambda r: r.enrollment_number),
+    'full_name': ('Name', lambda r: r.full_name),
+    'email': ('Email', lambda r: r.email or ''),
+    'branch': ('Branch', lambda r: r.branch),
+    'cgpa': ('CGPA', lambda r: _number(r.cgpa)),
+    'graduation_year': ('Graduation Year', lambda r: r.graduation_year),
+    'is_placed': ('Placed', lambda r: 'Yes' if r.offer_id else 'No'),
+    'profile_completed': ('Profile Completed', lambda r: 'Yes' if r.profile_completed else 'No'),
+    'company_name': ('Company', lambda r: r.company_name),
+    'designation': ('Designation', lambda r: r.designation),
+    'package_lpa': ('Package', lambda r: _number(r.package)),
+}
+DEFAULT_STUDENT_COLUMNS = ['enrollment_number', 'full_name', 'email', 'branch', 'cgpa', 'graduation_year',
+                           'is_placed', 'profile_completed']
+
+
+def parse_columns(value, available, default):
+    """Column keys from a comma separated ?columns= value; ValueError on unknown keys"""
+    if not value:
+        return list(default)
+    keys = [key.strip().lower() for key in value.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in available]
+    if unknown:
+        raise ValueError(f'Unknown columns: {", ".join(unknown)}. Available: {", ".join(available)}')
+    return keys
+
+
+def applicant_export_rows(job_id):
+    """Applications of a job joined with student, user, job ATS score and cleared rounds, streamed"""
+    rounds_total = HiringRound.query.filter_by(job_id=job_id).count()
+    cleared = db.session.query(
+        ApplicationRound.application_id,
+        func.sum(case((ApplicationRound.status.in_(['Passed', 'Completed']), 1), else_=0)).label('rounds_cleared')
+    ).join(HiringRound, ApplicationRound.hiring_round_id == HiringRound.id).filter(
+        HiringRound.job_id == job_id
+    ).group_by(ApplicationRound.application_id).subquery()
+
+    query = db.session.query(
+        Application.status,
+        Application.applied_at,
+        Student.full_name,
+        Student.enrollment_number,
+        Student.branch,
+        Student.cgpa,
+        Student.phone,
+        Student.skills,
+        Student.resume_url,
+        Student.ats_score,
+        User.email,
+        ResumeScore.overall_match_percentage,
+        ResumeScore.level,
+        cleared.c.rounds_cleared,
+        literal(rounds_total).label('rounds_total')  # Same for every row of the job
+    ).join(Student, Application.student_id == Student.id).join(
+        User, Student.user_id == User.id
+    ).outerjoin(
+        ResumeScore, (ResumeScore.student_id == Student.id) & (ResumeScore.job_id == Application.job_id)
+    ).outerjoin(
+        cleared, cleared.c.application_id == Application.id
+    ).filter(Application.job_id == job_id).order_by(Application.applied_at.asc(), Application.id.asc())
+
+    return query.yield_per(EXPORT_CHUNK_ROWS)
+
+
+def csv_response(filename, headers, rows):
+    """Stream rows (lists of values) as a CSV attachment"""
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        for count, values in enumerate(rows, 1):
+            writer.writerow(values)
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+
+
+def xlsx_response(filename, title, headers, rows):
+    """Write rows with a write-only workbook to a temp file and stream it as an attachment"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    ws.append(headers)
+    for values in rows:
+        ws.append(values)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    size = output.tell()
+    output.seek(0)
+
+    def generate():
+        with output:
+            while True:
+                data = output.read(EXPORT_READ_BYTES)
+                if not data:
+                    break
+                yield data
+
+    return Response(generate(), mimetype=XLSX_MIMETYPE, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Content-Length': str(size)
+    })
+
+
+def json_stream_response(payload, key, records, count_key=None):
+    """
+    Stream payload as a JSON object whose key holds the records array
+
+    records is any iterable of JSON-serializable values; with count_key the
+    number of records is added after the array.
+    """
+    head = json.dumps(payload)
+    def generate():
+        yield head[:-1] + (', ' if payload else '') + json.dumps(key) + ': ['
+        count = 0
+        chunk = []
+        for count, record in enumerate(records, 1):
+            chunk.append(json.dumps(record))
+            if len(chunk) == EXPORT_CHUNK_ROWS:
+                yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+                chunk = []
+        if chunk:
+            yield (', ' if count > len(chunk) else '') + ', '.join(chunk)
+        yield ']' + (f', {json.dumps(count_key)}: {count}' if count_key else '') + '}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def export_response(export_format, filename_stem, title, columns, rows):
+    """CSV or XLSX attachment for rows; columns maps key -> (header, getter)"""
+    headers = [columns[key][0] for key in columns]
+    values = ([get(row) for _, get in columns.values()] for row in rows)
+    if export_format == 'csv':
+        return csv_response(f'{filename_stem}.csv', headers, values)
+    return xlsx_response(f'{filename_stem}.xlsx', title, headers, values)
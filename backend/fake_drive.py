@@ -0,0 +1,94 @@
+"""
+Local stand-in for the Google Drive v3 client used by resume_routes
+
+Set GOOGLE_DRIVE_FAKE_DIR to a directory and get_drive_service() builds a
+FakeDriveService per thread (like the real client) that stores files there,
+so upload/download/delete and the resume byte cache can be exercised offline
+(see check_resume_cache.py). Only the calls resume_routes makes are
+implemented: files().create/get_media/delete and permissions().create, each
+returning an object with execute().
+"""
+
+import uuid
+from collections import Counter
+from pathlib import Path
+
+
+class FakeDriveError(Exception):
+    """Raised where the real client would raise googleapiclient.errors.HttpError"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class _Files:
+    def __init__(self, service):
+        self._service = service
+
+    def create(self, body=None, media_body=None, fields=None):
+        def run():
+            self._service.calls['create'] += 1
+            file_id = 'fake' + uuid.uuid4().hex
+            data = media_body.getbytes(0, media_body.size()) if media_body is not None else b''
+            (self._service.root / file_id).write_bytes(data)
+            return {
+                'id': file_id,
+                'name': (body or {}).get('name'),
+                'webViewLink': f'https://drive.google.com/file/d/{file_id}/view',
+                'webContentLink': f'https://drive.google.com/uc?id={file_id}&export=download'
+            }
+        return _Request(run)
+
+    def get_media(self, fileId):
+        def run():
+            self._service.calls['get_media'] += 1
+            path = self._service.root / fileId
+            if not path.exists():
+                raise FakeDriveError(404, f'File not found: {fileId}')
+            return path.read_bytes()
+        return _Request(run)
+
+    def delete(self, fileId):
+        def run():
+            self._service.calls['delete'] += 1
+            path = self._service.root / fileId
+            if not path.exists():
+                raise FakeDriveError(404, f'File not found: {fileId}')
+            path.unlink()
+            return ''
+        return _Request(run)
+
+
+class _Permissions:
+    def __init__(self, service):
+        self._service = service
+
+    def create(self, fileId, body=None):
+        def run():
+            self._service.calls['permissions.create'] += 1
+            return {'id': 'anyoneWithLink', 'role': (body or {}).get('role')}
+        return _Request(run)
+
+
+class FakeDriveService:
+    """Drive v3 service backed by a local directory; calls counts API round-trips"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.calls = Counter()
+
+    def files(self):
+        return _Files(self)
+
+    def permissions(self):
+        return _Permissions(self)
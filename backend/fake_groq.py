@@ -0,0 +1,82 @@
+"""
+Local stand-in for the Groq chat completions client used by learning_guide_routes
+
+Answers with canned roadmap/tips text so the blocking and streaming (SSE)
+endpoints can be exercised offline; check_roadmap_stream.py patches
+learning_guide_routes.get_groq_client to return one. token_delay_ms slows the
+stream down to mimic a long generation. Only
+chat.completions.create(..., stream=...) is implemented.
+"""
+
+import re
+import time
+from types import SimpleNamespace
+
+FAKE_JOB_SECTIONS = """## 2. COMPANY REQUIREMENTS
+- Strong data structures and algorithms
+- Clear communication in technical discussions
+
+## 3. MAJOR TOPICS TO COVER
+- Arrays, hashing, trees and graphs
+- SQL joins and indexing
+- System design basics"""
+
+FAKE_PERSONAL_SECTIONS = """## 1. SKILL GAP ANALYSIS
+- Limited exposure to cloud deployment
+- No projects using C# or SQL window functions
+
+## 4. DAY-BY-DAY ROADMAP
+- Day 1-3: Arrays and hashing
+- Day 4-7: Trees and graphs
+- Day 8-14: SQL and a small deployed project"""
+
+FAKE_TIPS = """1. Revise the core data structures used in the job description.
+2. Prepare two project stories with measurable results.
+3. Practice timed coding problems daily.
+4. Research the company's products before the interview.
+5. Keep your resume consistent with your profile."""
+
+
+def _message(content):
+    return SimpleNamespace(message=SimpleNamespace(role='assistant', content=content))
+
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=None)])
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def _answer(self, messages):
+        prompt = messages[-1]['content']
+        if 'COMPANY REQUIREMENTS' in prompt:
+            return FAKE_JOB_SECTIONS
+        if 'SKILL GAP ANALYSIS' in prompt:
+            return FAKE_PERSONAL_SECTIONS
+        return FAKE_TIPS
+
+    def create(self, model, messages, temperature=None, max_tokens=None, stream=False, **kwargs):
+        self._client.calls.append({'model': model, 'stream': stream, 'max_tokens': max_tokens})
+        content = self._answer(messages)
+        if not stream:
+            return SimpleNamespace(model=model, choices=[_message(content)])
+        return self._stream(content)
+
+    def _stream(self, content):
+        # Word-sized tokens with their whitespace, like a real token stream
+        for token in re.findall(r'\s*\S+|\s+', content):
+            if self._client.token_delay:
+                time.sleep(self._client.token_delay)
+            yield _chunk(token)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason='stop')])
+
+
+class FakeGroq:
+    """Groq client stand-in; calls records every completion request"""
+
+    def __init__(self, api_key=None, token_delay_ms=0):
+        self.calls = []
+        self.token_delay = token_delay_ms / 1000
+        self.chat = SimpleNamespace(completions=_Completions(self))
@@ -0,0 +1,130 @@
+"""
+Local stand-in for a Redis server used by analytics_cache's redis backend
+
+Speaks enough of the Redis protocol (RESP) for the cache: PING, AUTH,
+SELECT, GET, SET (with EX/PX), INCR, DEL, EXISTS, DBSIZE, FLUSHDB and QUIT,
+with lazy key expiry and one shared keyspace. Run it and point the app at it
+to exercise the shared-cache path offline:
+
+    python fake_redis.py [port]
+    ANALYTICS_CACHE_BACKEND=redis ANALYTICS_CACHE_URL=redis://localhost:6390/0 python app.py
+
+start_fake_redis() runs one on a background thread (port 0 picks a free one).
+"""
+
+import socketserver
+import sys
+import threading
+import time
+
+
+class FakeRedisStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, name, args):
+        with self.lock:
+            if name == 'PING':
+                return ('+', 'PONG')
+            if name in ('AUTH', 'SELECT'):
+                return ('+', 'OK')
+            if name == 'GET':
+                entry = self._live(args[0])
+                return entry[0] if entry else None
+            if name == 'SET':
+                ttl = None
+                options = [a.decode().upper() if i % 2 == 0 else a for i, a in enumerate(args[2:])]
+                for option, value in zip(options[::2], options[1::2]):
+                    if option == 'EX':
+                        ttl = int(value)
+                    elif option == 'PX':
+                        ttl = int(value) / 1000
+                self.data[args[0]] = (args[1], time.monotonic() + ttl if ttl else None)
+                return ('+', 'OK')
+            if name == 'INCR':
+                entry = self._live(args[0])
+                try:
+                    value = int(entry[0]) + 1 if entry else 1
+                except ValueError:
+                    return ('-', 'ERR value is not an integer or out of range')
+                self.data[args[0]] = (str(value).encode(), entry[1] if entry else None)
+                return value
+            if name in ('DEL', 'EXISTS'):
+                found = [key for key in args if self._live(key)]
+                if name == 'DEL':
+                    for key in found:
+                        del self.data[key]
+                return len(found)
+            if name == 'DBSIZE':
+                return sum(1 for key in list(self.data) if self._live(key))
+            if name == 'FLUSHDB':
+                self.data.clear()
+                return ('+', 'OK')
+        return ('-', f"ERR unknown command '{name}'")
+
+
+def encode_reply(reply):
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, tuple):
+        return f'{reply[0]}{reply[1]}\r\n'.encode()
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()  # Inline command (redis-cli, telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            name = args[0].decode().upper()
+            if name == 'QUIT':
+                self.wfile.write(b'+OK\r\n')
+                return
+            self.wfile.write(encode_reply(self.server.store.execute(name, args[1:])))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, FakeRedisHandler)
+        self.store = FakeRedisStore()
+
+
+def start_fake_redis(port=0, host='127.0.0.1'):
+    """Serve on a daemon thread; returns the server (server.server_address[1] is the port)"""
+    server = FakeRedisServer((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 6390
+    print(f"Fake Redis listening on 127.0.0.1:{port}")
+    FakeRedisServer(('127.0.0.1', port)).serve_forever()
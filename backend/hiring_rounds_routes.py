@@ -4,26 +4,17 @@ Production-level endpoints for configuring recruitment workflows
 """
 
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, HiringRound, RoundCandidateProgress, Job, Company, Application
-from sqlalchemy import and_, or_
+from models import db, HiringRound, RoundCandidateProgress, Job, Application, Student
+from auth import roles_required, get_user_id, get_company_id, ROLE_COMPANY
+from pagination import encode_cursor, decode_cursor, keyset_order, keyset_after
+from sqlalchemy import and_, or_, case, func, update
+from sqlalchemy.orm import aliased, contains_eager
 from datetime import datetime
 import json
 
 hiring_rounds_bp = Blueprint('hiring_rounds', __name__, url_prefix='/api/company/hiring-rounds')
 
 
-def get_company_id_from_jwt():
-    """Extract company ID from JWT token"""
-    user_id = int(get_jwt_identity())
-    from models import User
-    user = User.query.get(user_id)
-    if not user or user.role_id != 2:
-        return None
-    company = Company.query.filter_by(user_id=user_id).first()
-    return company.id if company else None
-
-
 def verify_job_ownership(job_id, company_id):
     """Verify that the job belongs to the company"""
     job = Job.query.filter_by(id=job_id, company_id=company_id).first()
@@ -33,14 +24,14 @@ def verify_job_ownership(job_id, company_id):
 # ==================== ROUND CONFIGURATION ENDPOINTS ====================
 
 @hiring_rounds_bp.route('/job/<int:job_id>', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_job_rounds(job_id):
     """
     Get all hiring rounds for a specific job
     Returns rounds in order with their configurations
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -63,7 +54,7 @@ def get_job_rounds(job_id):
 
 
 @hiring_rounds_bp.route('/job/<int:job_id>', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def create_or_update_rounds(job_id):
     """
     Create or update hiring rounds for a job
@@ -87,7 +78,7 @@ def create_or_update_rounds(job_id):
     }
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         print(f"[DEBUG] Company ID from JWT: {company_id}")
         
         if not company_id:
@@ -144,7 +135,7 @@ def create_or_update_rounds(job_id):
                 min_passing_score=round_data.get('min_passing_score'),
                 max_score=round_data.get('max_score', 100.00),
                 configuration=json.dumps(round_data.get('configuration')) if round_data.get('configuration') else None,
-                created_by=int(get_jwt_identity())
+                created_by=get_user_id()
             )
             db.session.add(new_round)
             created_rounds.append(new_round)
@@ -168,13 +159,13 @@ def create_or_update_rounds(job_id):
 
 
 @hiring_rounds_bp.route('/round/<int:round_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def update_single_round(round_id):
     """
     Update a specific hiring round
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -233,13 +224,13 @@ def update_single_round(round_id):
 
 
 @hiring_rounds_bp.route('/round/<int:round_id>', methods=['DELETE'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def delete_round(round_id):
     """
     Delete a specific hiring round
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -272,7 +263,7 @@ def delete_round(round_id):
 
 
 @hiring_rounds_bp.route('/job/<int:job_id>/reorder', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def reorder_rounds(job_id):
     """
     Reorder hiring rounds for a job
@@ -283,7 +274,7 @@ def reorder_rounds(job_id):
     }
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -320,14 +311,29 @@ def reorder_rounds(job_id):
 
 # ==================== CANDIDATE PROGRESS ENDPOINTS ====================
 
+CANDIDATE_SORT_KEYS = {
+    'rank': RoundCandidateProgress.candidate_rank,
+    'score': RoundCandidateProgress.score,
+    'invited_at': RoundCandidateProgress.invited_at,
+    'name': Student.full_name,
+}
+CANDIDATES_MAX_LIMIT = 200
+SCORE_PERCENTILES = (25, 50, 75, 90)
+
+
 @hiring_rounds_bp.route('/round/<int:round_id>/candidates', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_round_candidates(round_id):
     """
     Get all candidates in a specific round with their progress
+    
+    Query params: status, sort_by (rank, score, invited_at, name), sort_order
+    (asc/desc), limit (max CANDIDATES_MAX_LIMIT) and cursor. With limit the
+    response is one keyset page: pass next_cursor back as cursor for the
+    following one. Unranked / unscored candidates are listed last.
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -338,46 +344,156 @@ def get_round_candidates(round_id):
         if not verify_job_ownership(round_obj.job_id, company_id):
             return jsonify({'error': 'Access denied'}), 403
         
-        # Get all candidate progress for this round
-        candidates = RoundCandidateProgress.query.filter_by(round_id=round_id).all()
+        filter_status = request.args.get('status')
+        sort_by = request.args.get('sort_by', 'rank')
+        if sort_by not in CANDIDATE_SORT_KEYS:
+            sort_by = 'rank'
+        sort_order = request.args.get('sort_order', 'desc' if sort_by == 'score' else 'asc')
+        descending = sort_order == 'desc'
+        sort_column = CANDIDATE_SORT_KEYS[sort_by]
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        if limit is not None:
+            limit = max(1, min(limit, CANDIDATES_MAX_LIMIT))
+        
+        query = RoundCandidateProgress.query.join(
+            Student, RoundCandidateProgress.student_id == Student.id
+        ).options(contains_eager(RoundCandidateProgress.student)).filter(
+            RoundCandidateProgress.round_id == round_id
+        )
+        if filter_status:
+            query = query.filter(RoundCandidateProgress.status == filter_status)
+        if cursor:
+            try:
+                cursor_sort, last_value, last_id = decode_cursor(cursor, 3)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if cursor_sort != f'{sort_by}:{sort_order}':
+                return jsonify({'error': 'Cursor does not match sort_by/sort_order'}), 400
+            query = query.filter(keyset_after(
+                sort_column, RoundCandidateProgress.id, last_value, last_id, descending, nulls_last=True
+            ))
+        query = query.order_by(*keyset_order(sort_column, RoundCandidateProgress.id, descending, nulls_last=True))
+        if limit is not None:
+            query = query.limit(limit + 1)
+        candidates = query.all()
+        
+        has_more = limit is not None and len(candidates) > limit
+        if has_more:
+            candidates = candidates[:limit]
+        next_cursor = None
+        if has_more:
+            last = candidates[-1]
+            last_value = last.student.full_name if sort_by == 'name' else getattr(last, sort_column.key)
+            next_cursor = encode_cursor(f'{sort_by}:{sort_order}', last_value, last.id)
         
         # Get statistics
-        total = len(candidates)
-        passed = len([c for c in candidates if c.status == 'Passed'])
-        failed = len([c for c in candidates if c.status == 'Failed'])
-        pending = len([c for c in candidates if c.status in ['Pending', 'Invited']])
+        statistics = round_status_statistics(round_id)
         
         return jsonify({
             'success': True,
             'round_id': round_id,
             'round_name': round_obj.round_name,
-            'statistics': {
-                'total': total,
-                'passed': passed,
-                'failed': failed,
-                'pending': pending
-            },
-            'candidates': [c.to_dict() for c in candidates]
+            'statistics': statistics,
+            'candidates': [c.to_dict() for c in candidates],
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@hiring_rounds_bp.route('/round/<int:round_id>/statistics', methods=['GET'])
+@roles_required(ROLE_COMPANY)
+def get_round_statistics(round_id):
+    """
+    Status counts and score distribution for a round, aggregated in the database
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        round_obj = HiringRound.query.get(round_id)
+        if not round_obj:
+            return jsonify({'error': 'Round not found'}), 404
+        
+        if not verify_job_ownership(round_obj.job_id, company_id):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        statistics = round_status_statistics(round_id)
+        scores = round_score_statistics(round_id)
+        evaluated = statistics['passed'] + statistics['failed']
+        
+        return jsonify({
+            'success': True,
+            'round_id': round_id,
+            'round_name': round_obj.round_name,
+            'statistics': statistics,
+            'pass_rate': round(statistics['passed'] * 100 / evaluated, 2) if evaluated else None,
+            'scores': scores,
+            'min_passing_score': float(round_obj.min_passing_score) if round_obj.min_passing_score is not None else None,
+            'max_score': float(round_obj.max_score) if round_obj.max_score is not None else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@hiring_rounds_bp.route('/round/<int:round_id>/recompute-ranks', methods=['POST'])
+@roles_required(ROLE_COMPANY)
+def recompute_round_ranks(round_id):
+    """
+    Rank a round's candidates by score (highest first, ties share a rank)
+    Candidates without a score are left unranked
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        round_obj = HiringRound.query.get(round_id)
+        if not round_obj:
+            return jsonify({'error': 'Round not found'}), 404
+        
+        if not verify_job_ownership(round_obj.job_id, company_id):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        ranked_count = recompute_ranks(round_id)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Ranked {ranked_count} candidates',
+            'ranked_count': ranked_count
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @hiring_rounds_bp.route('/round/<int:round_id>/invite-candidates', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def invite_candidates_to_round(round_id):
     """
     Invite candidates to a specific round
     Creates progress tracking entries for selected applications
     
-    Expected payload:
+    Expected payload (either):
     {
         "application_ids": [1, 2, 3, ...]
     }
+    {
+        "mode": "passed_previous"   // everyone who passed the previous round
+    }
+    
+    Already invited applications are skipped. Application ids that do not
+    belong to the round's job are rejected and nothing is invited.
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -388,39 +504,44 @@ def invite_candidates_to_round(round_id):
         if not verify_job_ownership(round_obj.job_id, company_id):
             return jsonify({'error': 'Access denied'}), 403
         
-        data = request.get_json()
-        application_ids = data.get('application_ids', [])
-        
-        if not application_ids:
-            return jsonify({'error': 'No application IDs provided'}), 400
-        
-        invited_count = 0
-        for app_id in application_ids:
-            # Check if already invited
-            existing = RoundCandidateProgress.query.filter_by(
-                round_id=round_id,
-                application_id=app_id
-            ).first()
+        data = request.get_json() or {}
+        mode = data.get('mode', 'selected')
+        skipped_count = 0
+        
+        if mode == 'passed_previous':
+            previous_round = HiringRound.query.filter(
+                HiringRound.job_id == round_obj.job_id,
+                HiringRound.round_number < round_obj.round_number
+            ).order_by(HiringRound.round_number.desc()).first()
+            if not previous_round:
+                return jsonify({'error': 'This is the first round; there is no previous round'}), 400
+            candidates = passed_previous_round_candidates(round_obj, previous_round)
+        elif mode == 'selected':
+            try:
+                application_ids = list(dict.fromkeys(int(app_id) for app_id in data.get('application_ids', [])))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'application_ids must be a list of integers'}), 400
             
-            if not existing:
-                application = Application.query.get(app_id)
-                if application:
-                    progress = RoundCandidateProgress(
-                        round_id=round_id,
-                        application_id=app_id,
-                        student_id=application.student_id,
-                        status='Invited',
-                        invited_at=datetime.utcnow()
-                    )
-                    db.session.add(progress)
-                    invited_count += 1
-        
+            if not application_ids:
+                return jsonify({'error': 'No application IDs provided'}), 400
+            
+            candidates, invalid_ids, skipped_count = selected_round_candidates(round_obj, application_ids)
+            if invalid_ids:
+                return jsonify({
+                    'error': 'Some applications do not belong to this job',
+                    'invalid_application_ids': invalid_ids
+                }), 400
+        else:
+            return jsonify({'error': 'Invalid mode. Must be one of: selected, passed_previous'}), 400
+        
+        invited_count = bulk_invite(round_id, candidates)
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': f'Successfully invited {invited_count} candidates',
-            'invited_count': invited_count
+            'invited_count': invited_count,
+            'already_invited_count': skipped_count
         }), 201
         
     except Exception as e:
@@ -429,13 +550,13 @@ def invite_candidates_to_round(round_id):
 
 
 @hiring_rounds_bp.route('/progress/<int:progress_id>', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def update_candidate_progress(progress_id):
     """
     Update candidate progress in a round (scores, status, feedback)
     """
     try:
-        company_id = get_company_id_from_jwt()
+        company_id = get_company_id()
         if not company_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -490,6 +611,148 @@ def update_candidate_progress(progress_id):
 
 # ==================== HELPER FUNCTIONS ====================
 
+def round_status_statistics(round_id):
+    """total / passed / failed / pending counts plus the count of every status, from one GROUP BY"""
+    counts = dict(db.session.query(
+        RoundCandidateProgress.status, func.count(RoundCandidateProgress.id)
+    ).filter(RoundCandidateProgress.round_id == round_id).group_by(RoundCandidateProgress.status).all())
+    return {
+        'total': sum(counts.values()),
+        'passed': counts.get('Passed', 0),
+        'failed': counts.get('Failed', 0),
+        'pending': counts.get('Pending', 0) + counts.get('Invited', 0),
+        'by_status': counts
+    }
+
+
+def round_score_statistics(round_id):
+    """
+    Count, min, max, average and SCORE_PERCENTILES of a round's scores in one query
+    
+    Percentiles are nearest-rank: the lowest score whose cumulative
+    distribution reaches the percentile.
+    """
+    distribution = db.session.query(
+        RoundCandidateProgress.score.label('score'),
+        func.cume_dist().over(order_by=RoundCandidateProgress.score).label('cume_dist')
+    ).filter(
+        RoundCandidateProgress.round_id == round_id,
+        RoundCandidateProgress.score.isnot(None)
+    ).subquery()
+    
+    row = db.session.query(
+        func.count(distribution.c.score).label('count'),
+        func.min(distribution.c.score).label('min'),
+        func.max(distribution.c.score).label('max'),
+        func.avg(distribution.c.score).label('average'),
+        *[
+            func.min(case((distribution.c.cume_dist >= percentile / 100, distribution.c.score))).label(f'p{percentile}')
+            for percentile in SCORE_PERCENTILES
+        ]
+    ).one()
+    
+    def number(value):
+        return round(float(value), 2) if value is not None else None
+    
+    return {
+        'scored': row.count,
+        'min': number(row.min),
+        'max': number(row.max),
+        'average': number(row.average),
+        'percentiles': {f'p{percentile}': number(getattr(row, f'p{percentile}')) for percentile in SCORE_PERCENTILES}
+    }
+
+
+def recompute_ranks(round_id):
+    """
+    Set candidate_rank for every candidate of a round in one UPDATE
+    
+    RANK() over score descending; unscored candidates sort after every score
+    so they do not shift the ranks, and are set to NULL. Returns the number
+    of ranked candidates.
+    """
+    ranked = db.session.query(
+        RoundCandidateProgress.id.label('progress_id'),
+        case(
+            (RoundCandidateProgress.score.is_(None), None),
+            else_=func.rank().over(order_by=[
+                RoundCandidateProgress.score.is_(None), RoundCandidateProgress.score.desc()
+            ])
+        ).label('new_rank')
+    ).filter(RoundCandidateProgress.round_id == round_id).subquery()
+    
+    db.session.execute(
+        update(RoundCandidateProgress).where(
+            RoundCandidateProgress.id == ranked.c.progress_id
+        ).values(candidate_rank=ranked.c.new_rank).execution_options(synchronize_session=False)
+    )
+    return db.session.query(func.count(RoundCandidateProgress.id)).filter(
+        RoundCandidateProgress.round_id == round_id,
+        RoundCandidateProgress.candidate_rank.isnot(None)
+    ).scalar()
+
+
+def selected_round_candidates(round_obj, application_ids):
+    """
+    (application_id, student_id) pairs to invite from application_ids
+    
+    Two queries whatever the list size: the applications of the round's job
+    among the ids, and the ids already invited to the round.
+    Returns (candidates, ids not belonging to the job, already invited count).
+    """
+    applications = db.session.query(Application.id, Application.student_id).filter(
+        Application.id.in_(application_ids),
+        Application.job_id == round_obj.job_id
+    ).all()
+    found = {app_id for app_id, _ in applications}
+    invalid_ids = [app_id for app_id in application_ids if app_id not in found]
+    
+    invited = {app_id for (app_id,) in db.session.query(RoundCandidateProgress.application_id).filter(
+        RoundCandidateProgress.round_id == round_obj.id,
+        RoundCandidateProgress.application_id.in_(application_ids)
+    )}
+    candidates = [(app_id, student_id) for app_id, student_id in applications if app_id not in invited]
+    return candidates, invalid_ids, len(found & invited)
+
+
+def passed_previous_round_candidates(round_obj, previous_round):
+    """(application_id, student_id) pairs that passed previous_round and are not yet in round_obj"""
+    invited = aliased(RoundCandidateProgress)
+    already_invited = db.session.query(invited.id).filter(
+        invited.round_id == round_obj.id,
+        invited.application_id == Application.id
+    ).exists()
+    return db.session.query(Application.id, Application.student_id).join(
+        RoundCandidateProgress, RoundCandidateProgress.application_id == Application.id
+    ).filter(
+        RoundCandidateProgress.round_id == previous_round.id,
+        RoundCandidateProgress.status == 'Passed',
+        Application.job_id == round_obj.job_id,
+        ~already_invited
+    ).all()
+
+
+def bulk_invite(round_id, candidates):
+    """Insert 'Invited' progress rows for (application_id, student_id) pairs in one statement"""
+    if not candidates:
+        return 0
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(RoundCandidateProgress, [
+        {
+            'round_id': round_id,
+            'application_id': app_id,
+            'student_id': student_id,
+            'status': 'Invited',
+            'invited_at': now,
+            'attempt_count': 0,
+            'created_at': now,
+            'updated_at': now
+        }
+        for app_id, student_id in candidates
+    ])
+    return len(candidates)
+
+
 def validate_rounds_data(rounds_data):
     """Validate rounds configuration data"""
     errors = []
@@ -0,0 +1,159 @@
+"""
+Student job feed: keyset pagination over approved jobs
+
+Jobs are ordered by (application_deadline, id) and paged with an opaque cursor
+holding the last row's key, so a page is one indexed range scan however many
+jobs the session has. The page is a single projection joined with company,
+session, the student's application and materialized eligibility, so it costs
+the same number of statements for 10 jobs or 10,000.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from models import db, Job, Company, PlacementSession, Application, StudentJobEligibility
+from eligibility import student_eligibility, student_reason_messages, REASON_BATCH
+from pagination import encode_cursor, decode_cursor, keyset_order, keyset_after
+
+FEED_DEFAULT_LIMIT = 20
+FEED_MAX_LIMIT = 100
+
+FEED_COLUMNS = (
+    Job.id, Job.company_id, Job.title, Job.job_type, Job.description, Job.requirements, Job.location,
+    Job.salary_range, Job.min_cgpa, Job.eligible_branches, Job.min_10th_percentage, Job.min_12th_percentage,
+    Job.application_deadline, Job.session_id, Job.status, Job.created_at,
+    Company.company_name, Company.logo_url, Company.company_website, Company.industry,
+    Company.description.label('company_description'),
+    PlacementSession.name.label('session_name'),
+    Application.id.label('application_id'),
+    StudentJobEligibility.reasons
+)
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError as e:
+        raise ValueError(f'Invalid {name}. Use YYYY-MM-DD') from e
+
+
+def feed_query(student, session_id, args):
+    """Projection of approved jobs for a student with the request's filters, in keyset order"""
+    query = db.session.query(*FEED_COLUMNS).join(
+        Company, Job.company_id == Company.id
+    ).outerjoin(
+        PlacementSession, Job.session_id == PlacementSession.id
+    ).outerjoin(
+        Application, and_(Application.job_id == Job.id, Application.student_id == student.id)
+    ).outerjoin(
+        StudentJobEligibility, and_(
+            StudentJobEligibility.job_id == Job.id,
+            StudentJobEligibility.student_id == student.id
+        )
+    ).filter(Job.status == 'Approved')
+
+    if session_id:
+        query = query.filter(Job.session_id == session_id)
+
+    # Jobs of sessions the student's batch is not mapped to are not listed
+    query = query.filter(or_(
+        StudentJobEligibility.reasons.is_(None),
+        StudentJobEligibility.reasons.op('&')(REASON_BATCH) == 0
+    ))
+
+    job_type = args.get('job_type')
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+
+    if args.get('eligible_only', 'false').lower() == 'true':
+        # Jobs without a stored row are evaluated in serialize_feed
+        query = query.filter(or_(StudentJobEligibility.reasons.is_(None), StudentJobEligibility.reasons == 0))
+
+    if args.get('not_applied', 'false').lower() == 'true':
+        query = query.filter(Application.id.is_(None))
+
+    if args.get('deadline_from'):
+        query = query.filter(Job.application_deadline >= parse_date(args['deadline_from'], 'deadline_from'))
+    if args.get('deadline_to'):
+        query = query.filter(Job.application_deadline <= parse_date(args['deadline_to'], 'deadline_to'))
+
+    text = (args.get('q') or '').strip()
+    if text:
+        pattern = f'%{text}%'
+        query = query.filter(or_(
+            Job.title.ilike(pattern),
+            Company.company_name.ilike(pattern),
+            Job.location.ilike(pattern)
+        ))
+
+    cursor = args.get('cursor')
+    if cursor:
+        deadline, job_id = decode_cursor(cursor, 2)
+        query = query.filter(keyset_after(Job.application_deadline, Job.id, deadline, job_id, False, nullable=False))
+
+    return query.order_by(*keyset_order(Job.application_deadline, Job.id, False, nullable=False))
+
+
+def serialize_feed_row(row, reasons, student):
+    """Job.to_dict() fields plus the student's application/eligibility state"""
+    return {
+        'id': row.id,
+        'company_id': row.company_id,
+        'company_name': row.company_name,
+        'company_logo': row.logo_url,
+        'company_website': row.company_website,
+        'company_industry': row.industry,
+        'company_description': row.company_description,
+        'title': row.title,
+        'job_type': row.job_type,
+        'description': row.description,
+        'requirements': row.requirements,
+        'location': row.location,
+        'salary_range': row.salary_range,
+        'min_cgpa': float(row.min_cgpa or 0),
+        'eligible_branches': row.eligible_branches,
+        'min_10th_percentage': float(row.min_10th_percentage) if row.min_10th_percentage else None,
+        'min_12th_percentage': float(row.min_12th_percentage) if row.min_12th_percentage else None,
+        'application_deadline': row.application_deadline.isoformat() if row.application_deadline else None,
+        'session_id': row.session_id,
+        'session_name': row.session_name,
+        'status': row.status,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'has_applied': row.application_id is not None,
+        'is_eligible': reasons == 0,
+        'eligibility_reasons': student_reason_messages(reasons, row, student)
+    }
+
+
+def serialize_feed(student, rows, args):
+    """Serialize feed rows, evaluating jobs whose eligibility row is not materialized yet"""
+    reasons = {row.id: row.reasons for row in rows}
+    missing = [row for row in rows if row.reasons is None]
+    if missing:
+        reasons.update(student_eligibility(student, missing))
+
+    eligible_only = args.get('eligible_only', 'false').lower() == 'true'
+    return [
+        serialize_feed_row(row, reasons[row.id], student) for row in rows
+        if not reasons[row.id] & REASON_BATCH and (reasons[row.id] == 0 or not eligible_only)
+    ]
+
+
+def feed_page(student, session_id, args):
+    """
+    One page of the feed: {'jobs', 'next_cursor', 'has_more'}
+
+    limit is capped at FEED_MAX_LIMIT. Jobs without a materialized eligibility
+    row are filtered after the fetch, so a page can hold fewer than limit jobs
+    while has_more is still true.
+    """
+    limit = max(1, min(int(args.get('limit', FEED_DEFAULT_LIMIT)), FEED_MAX_LIMIT))
+    rows = feed_query(student, session_id, args).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'jobs': serialize_feed(student, rows, args),
+        'next_cursor': encode_cursor(rows[-1].application_deadline, rows[-1].id) if has_more else None,
+        'has_more': has_more
+    }
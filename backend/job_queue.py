@@ -0,0 +1,287 @@
+"""
+In-process background job queue backed by the background_jobs table
+
+Request handlers submit slow external work (Gemini, Groq, Drive) and answer
+202 with a status URL; a thread pool in each web process runs the jobs.
+
+- Handlers register per job type with a concurrency limit, a timeout and a
+  retry budget (@job_handler).
+- Jobs are claimed with an atomic UPDATE, so several gunicorn processes can
+  share the table without running a job twice.
+- Failed attempts are retried with exponential backoff. Python threads
+  cannot be killed, so a timed-out attempt keeps its concurrency slot and
+  its job stays Running (lease renewed) until the handler returns; only
+  then is the job retried or failed, so attempts of a job never overlap.
+- A poller picks up retries, jobs left behind by a restarted process and
+  Running jobs whose lease expired.
+"""
+
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
+
+from flask import jsonify
+from sqlalchemy import or_
+
+from models import db, BackgroundJob
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '2'))
+JOB_LEASE_GRACE_SECONDS = 30
+
+
+class JobError(Exception):
+    """Attempt failed; the job is retried while attempts remain"""
+
+
+class PermanentJobError(Exception):
+    """Job cannot succeed (bad input, missing configuration); not retried"""
+
+
+class _HandlerSpec:
+    def __init__(self, fn, concurrency, timeout, max_attempts, backoff):
+        self.fn = fn
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+
+
+class JobQueue:
+    def __init__(self):
+        self.app = None
+        self.handlers = {}
+        self._runner = None
+        self._executor = None
+        self._poller = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        # job id -> timeout error of attempts still running past their timeout
+        self._overrun_lock = threading.Lock()
+        self._overrun = {}
+
+    def init_app(self, app):
+        self.app = app
+        # Threads start with the first request so scripts importing app stay single-threaded
+        app.before_request(self._ensure_started)
+
+    def handler(self, job_type, concurrency=2, timeout=120, max_attempts=3, backoff=5):
+        """Register fn(payload) -> JSON-serializable result for job_type"""
+        def decorator(fn):
+            self.handlers[job_type] = _HandlerSpec(fn, concurrency, timeout, max_attempts, backoff)
+            return fn
+        return decorator
+
+    def submit(self, job_type, payload, user_id=None):
+        """Persist a Queued job and hand it to the pool; returns the committed BackgroundJob"""
+        spec = self.handlers.get(job_type)
+        if spec is None:
+            raise ValueError(f'Unknown job type: {job_type}')
+        job = BackgroundJob(
+            job_type=job_type,
+            status='Queued',
+            payload=payload,
+            user_id=user_id,
+            max_attempts=spec.max_attempts,
+            timeout_seconds=spec.timeout
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._ensure_started()
+        self._dispatch(job.id, job_type)
+        return job
+
+    def _ensure_started(self):
+        if self._runner is not None:
+            return
+        with self._start_lock:
+            if self._runner is not None:
+                return
+            # Handler threads above JOB_WORKERS absorb attempts abandoned by a timeout
+            self._executor = ThreadPoolExecutor(max_workers=JOB_WORKERS * 2, thread_name_prefix='job-handler')
+            self._runner = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job-runner')
+            self._poller = threading.Thread(target=self._poll_forever, name='job-poller', daemon=True)
+            self._poller.start()
+
+    def _dispatch(self, job_id, job_type):
+        self._runner.submit(self._run, job_id, job_type)
+
+    def _claim(self, job_id, spec):
+        now = datetime.utcnow()
+        claimed = BackgroundJob.query.filter(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == 'Queued',
+            or_(BackgroundJob.next_run_at.is_(None), BackgroundJob.next_run_at <= now)
+        ).update({
+            'status': 'Running',
+            'attempts': BackgroundJob.attempts + 1,
+            'started_at': now,
+            'lease_expires_at': now + timedelta(seconds=spec.timeout + JOB_LEASE_GRACE_SECONDS)
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _call(self, fn, payload):
+        with self.app.app_context():
+            try:
+                return fn(payload)
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _run(self, job_id, job_type):
+        spec = self.handlers.get(job_type)
+        if spec is None or not spec.semaphore.acquire(blocking=False):
+            return  # At the type's concurrency limit; a finishing job or the poller picks it up
+        handed_off = False
+        try:
+            with self.app.app_context():
+                if not self._claim(job_id, spec):
+                    return
+                payload = db.session.get(BackgroundJob, job_id).payload
+
+            result, error, permanent = None, None, False
+            future = self._executor.submit(self._call, spec.fn, payload)
+            # The slot is released when the handler returns, not when we stop waiting
+            handed_off = True
+            future.add_done_callback(lambda done: self._attempt_done(job_id, job_type, spec, done))
+            try:
+                result = future.result(timeout=spec.timeout)
+            except FutureTimeout:
+                error = f'Timed out after {spec.timeout}s'
+                with self._overrun_lock:
+                    if not future.done():
+                        # _attempt_done finishes the job once the attempt really ends
+                        self._overrun[job_id] = error
+                        return
+            except PermanentJobError as e:
+                error, permanent = str(e), True
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                if not isinstance(e, JobError):
+                    print(f"Background job {job_id} ({job_type}) error: {traceback.format_exc()}")
+
+            with self.app.app_context():
+                self._finish(job_id, spec, result, error, permanent)
+        except Exception as e:
+            print(f"Background job {job_id} runner error: {e}")
+        finally:
+            if not handed_off:
+                spec.semaphore.release()
+                self._dispatch_next(job_type)
+
+    def _attempt_done(self, job_id, job_type, spec, future):
+        """Handler future callback: finish an overrun attempt, then free its slot"""
+        try:
+            with self._overrun_lock:
+                timeout_error = self._overrun.pop(job_id, None)
+            if timeout_error is not None:
+                # A late success is kept so its side effects are not repeated
+                exc = future.exception()
+                with self.app.app_context():
+                    if exc is None:
+                        self._finish(job_id, spec, future.result(), None, False)
+                    else:
+                        self._finish(job_id, spec, None, timeout_error, isinstance(exc, PermanentJobError))
+        except Exception as e:
+            print(f"Background job {job_id} runner error: {e}")
+        finally:
+            spec.semaphore.release()
+            self._dispatch_next(job_type)
+
+    def _finish(self, job_id, spec, result, error, permanent):
+        job = db.session.get(BackgroundJob, job_id)
+        now = datetime.utcnow()
+        job.lease_expires_at = None
+        if error is None:
+            job.status = 'Succeeded'
+            job.result = result
+            job.error = None
+            job.finished_at = now
+        elif permanent or job.attempts >= job.max_attempts:
+            job.status = 'Failed'
+            job.error = error
+            job.finished_at = now
+        else:
+            job.status = 'Queued'
+            job.error = error
+            job.next_run_at = now + timedelta(seconds=spec.backoff * 2 ** (job.attempts - 1))
+        db.session.commit()
+
+    def _dispatch_next(self, job_type):
+        try:
+            with self.app.app_context():
+                now = datetime.utcnow()
+                next_job = db.session.query(BackgroundJob.id).filter(
+                    BackgroundJob.job_type == job_type,
+                    BackgroundJob.status == 'Queued',
+                    or_(BackgroundJob.next_run_at.is_(None), BackgroundJob.next_run_at <= now)
+                ).order_by(BackgroundJob.id).first()
+            if next_job:
+                self._dispatch(next_job.id, job_type)
+        except Exception as e:
+            print(f"Background job dispatch error: {e}")
+
+    def poll_once(self):
+        """Requeue expired leases and dispatch due jobs"""
+        with self.app.app_context():
+            now = datetime.utcnow()
+            with self._overrun_lock:
+                overrun = list(self._overrun)
+            if overrun:
+                # Attempts still running past their timeout keep their jobs
+                BackgroundJob.query.filter(
+                    BackgroundJob.id.in_(overrun),
+                    BackgroundJob.status == 'Running'
+                ).update({
+                    'lease_expires_at': now + timedelta(seconds=JOB_LEASE_GRACE_SECONDS)
+                }, synchronize_session=False)
+            for job in BackgroundJob.query.filter(
+                BackgroundJob.status == 'Running',
+                BackgroundJob.lease_expires_at < now
+            ).all():
+                job.lease_expires_at = None
+                if job.attempts >= job.max_attempts:
+                    job.status = 'Failed'
+                    job.error = 'Worker lease expired'
+                    job.finished_at = now
+                else:
+                    job.status = 'Queued'
+                    job.next_run_at = now
+            db.session.commit()
+
+            due = db.session.query(BackgroundJob.id, BackgroundJob.job_type).filter(
+                BackgroundJob.status == 'Queued',
+                BackgroundJob.job_type.in_(list(self.handlers)),
+                or_(BackgroundJob.next_run_at.is_(None), BackgroundJob.next_run_at <= now)
+            ).order_by(BackgroundJob.id).limit(JOB_WORKERS * 4).all()
+        for job_id, job_type in due:
+            self._dispatch(job_id, job_type)
+
+    def _poll_forever(self):
+        while not self._stop.wait(JOB_POLL_SECONDS):
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Background job poller error: {e}")
+
+
+job_queue = JobQueue()
+job_handler = job_queue.handler
+submit_job = job_queue.submit
+
+
+def job_accepted(job, **extra):
+    """202 response for a submitted job; clients poll the status URL"""
+    status_url = f'/api/jobs/{job.id}'
+    response = jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url,
+        **extra
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
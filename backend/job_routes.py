@@ -0,0 +1,25 @@
+"""
+Background job status routes (202-and-poll contract)
+"""
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from models import db, BackgroundJob
+from auth import get_user_id, is_admin
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job_status(job_id):
+    """Status of a background job; the result is included once it has succeeded"""
+    try:
+        job = db.session.get(BackgroundJob, job_id)
+        if not job or (job.user_id != get_user_id() and not is_admin()):
+            return jsonify({'error': 'Job not found'}), 404
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
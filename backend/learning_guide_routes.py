@@ -4,14 +4,28 @@ Uses Groq's Llama 3 AI to generate personalized learning paths
 """
 
 import os
+import re
+import json
 from datetime import datetime
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Application, Job
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from models import db, Application, Job
+from auth import roles_required, get_user_id, get_student_id, current_student, ROLE_STUDENT
 from groq import Groq
+import llm_cache
+from job_queue import job_handler, submit_job, job_accepted, PermanentJobError
 
 learning_guide_bp = Blueprint('learning_guide', __name__, url_prefix='/api/student/learning-guide')
 
+# Bump when the matching prompt template changes so cached responses are not reused
+QUICK_TIPS_PROMPT_VERSION = 'quick-tips-v1'
+ROADMAP_JOB_PROMPT_VERSION = 'roadmap-job-v1'
+
+# Background job limit for Groq calls (a roadmap job makes up to two)
+GROQ_JOB_CONCURRENCY = int(os.getenv('GROQ_JOB_CONCURRENCY', '4'))
+
+ROADMAP_SYSTEM_PROMPT = "You are an expert career counselor specializing in tech placements and interview preparation. Provide detailed, actionable, and personalized guidance."
+
 # Initialize Groq client
 def get_groq_client():
     api_key = os.getenv('GROQ_API_KEY')
@@ -19,18 +33,60 @@ def get_groq_client():
         raise Exception('Groq API key not configured. Please add your API key to .env file.')
     return Groq(api_key=api_key)
 
+def get_groq_model():
+    return os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+
+def get_job_groq_client():
+    """Groq client for a background job; missing configuration is not worth retrying"""
+    try:
+        return get_groq_client()
+    except Exception as e:
+        raise PermanentJobError(str(e))
+
+def build_job_sections_prompt(job, company):
+    """Prompt for the roadmap sections that depend only on the job (shared by all applicants)"""
+    return f"""You are an expert career counselor. Describe what this role requires.
+
+Target Company: {company.company_name}
+Position: {job.title}
+Job Type: {job.job_type}
+Location: {job.location}
+Industry: {company.industry if company.industry else 'Technology'}
+
+Job Requirements:
+{job.requirements if job.requirements else 'Not specified'}
+
+Job Description:
+{job.description}
+
+Required CGPA: {job.min_cgpa if job.min_cgpa else 'No minimum'}
+Eligible Branches: {job.eligible_branches if job.eligible_branches else 'All'}
+
+Generate EXACTLY 2 sections in this format:
+
+## 2. COMPANY REQUIREMENTS
+List the key technical and soft skills this company specifically looks for. Be specific to {company.company_name}.
+
+## 3. MAJOR TOPICS TO COVER
+List the most important topics a candidate must study. Prioritize based on the job description.
+
+Keep each section concise and actionable. Use bullet points. No lengthy paragraphs."""
+
+DAY_PLAN_HEADING = re.compile(r'^#+\s*4\.', re.MULTILINE)
+
+def merge_roadmap(personal_content, job_sections):
+    """Slot the shared job sections between the personal skill gap (1) and day plan (4)"""
+    match = DAY_PLAN_HEADING.search(personal_content)
+    if not match:
+        return f"{personal_content.rstrip()}\n\n{job_sections.strip()}"
+    return f"{personal_content[:match.start()].rstrip()}\n\n{job_sections.strip()}\n\n{personal_content[match.start():]}"
+
 @learning_guide_bp.route('/applications', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_applied_companies():
     """Get all companies user has applied to with round information"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         applications = Application.query.filter_by(student_id=student.id).all()
         
         companies_data = []
@@ -92,44 +148,23 @@ def get_applied_companies():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@learning_guide_bp.route('/generate-roadmap', methods=['POST'])
-@jwt_required()
-def generate_learning_roadmap():
-    """Generate AI-powered personalized learning roadmap"""
-    try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        data = request.json
-        application_id = data.get('application_id')
-        
-        if not application_id:
-            return jsonify({'error': 'Application ID required'}), 400
-        
-        # Get application details
-        application = Application.query.get(application_id)
-        if not application or application.student_id != user.student.id:
-            return jsonify({'error': 'Application not found'}), 404
-        
-        job = application.job
-        company = job.company
-        student = user.student
-        
-        # Calculate days remaining
-        days_remaining = "Not specified"
-        if job.application_deadline:
-            deadline = job.application_deadline
-            today = datetime.now().date()
-            if deadline >= today:
-                days_remaining = f"{(deadline - today).days} days"
-            else:
-                days_remaining = "Deadline passed"
-        
-        # Prepare context for AI
-        student_context = f"""
+def build_roadmap_prompt(application, student):
+    """Per-student prompt for the skill gap (1) and day plan (4) sections"""
+    job = application.job
+    company = job.company
+    
+    # Calculate days remaining
+    days_remaining = "Not specified"
+    if job.application_deadline:
+        deadline = job.application_deadline
+        today = datetime.now().date()
+        if deadline >= today:
+            days_remaining = f"{(deadline - today).days} days"
+        else:
+            days_remaining = "Deadline passed"
+    
+    # Prepare context for AI
+    student_context = f"""
 Student Profile:
 - Name: {student.full_name}
 - Branch: {student.branch}
@@ -137,8 +172,8 @@ Student Profile:
 - Current Status: {application.status}
 - Skills: {student.skills if hasattr(student, 'skills') else 'Not specified'}
 """
-        
-        job_context = f"""
+    
+    job_context = f"""
 Target Company: {company.company_name}
 Position: {job.title}
 Job Type: {job.job_type}
@@ -156,36 +191,26 @@ Job Description:
 Required CGPA: {job.min_cgpa if job.min_cgpa else 'No minimum'}
 Eligible Branches: {job.eligible_branches if job.eligible_branches else 'All'}
 """
-        
-        # Calculate number of days for roadmap
-        days_num = 29  # default
-        if job.application_deadline:
-            deadline = job.application_deadline
-            today = datetime.now().date()
-            if deadline >= today:
-                days_num = (deadline - today).days
-        
-        # Generate roadmap using Groq Llama 3
-        try:
-            client = get_groq_client()
-            
-            prompt = f"""You are an expert career counselor. Create a simple, focused learning roadmap.
+    
+    # Calculate number of days for roadmap
+    days_num = 29  # default
+    if job.application_deadline:
+        deadline = job.application_deadline
+        today = datetime.now().date()
+        if deadline >= today:
+            days_num = (deadline - today).days
+    
+    prompt = f"""You are an expert career counselor. Create a simple, focused learning roadmap.
 
 {student_context}
 
 {job_context}
 
-Generate EXACTLY 4 sections in this format:
+Generate EXACTLY 2 sections in this format:
 
 ## 1. SKILL GAP ANALYSIS
 Identify the specific skills the student is missing compared to job requirements. List each gap as a bullet point.
 
-## 2. COMPANY REQUIREMENTS
-List the key technical and soft skills this company specifically looks for. Be specific to {company.company_name}.
-
-## 3. MAJOR TOPICS TO COVER
-List the most important topics the student must study. Prioritize based on the job description.
-
 ## 4. DAY-BY-DAY ROADMAP
 Create a clear day-by-day study plan from Day 1 to Day {days_num}.
 Format as:
@@ -195,100 +220,304 @@ Format as:
 ... and so on until Day {days_num}
 
 Keep each section concise and actionable. Use bullet points. No lengthy paragraphs."""
+    return prompt, days_remaining
 
-            response = client.chat.completions.create(
-                model=os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile'),
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert career counselor specializing in tech placements and interview preparation. Provide detailed, actionable, and personalized guidance."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
-            
-            roadmap_content = response.choices[0].message.content
-            
-            # Parse and structure the roadmap
-            roadmap_data = {
-                'success': True,
-                'company_name': company.company_name,
-                'company_logo': company.logo_url,
-                'job_title': job.title,
-                'job_type': job.job_type,
-                'current_stage': application.status,
-                'days_remaining': days_remaining,
-                'roadmap_content': roadmap_content,
-                'generated_at': datetime.now().isoformat(),
-                'application_id': application_id
+def roadmap_completion(client, model_name, user_prompt, max_tokens, stream=False):
+    return client.chat.completions.create(
+        model=model_name,
+        messages=[
+            {
+                "role": "system",
+                "content": ROADMAP_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": user_prompt
             }
-            
-            return jsonify(roadmap_data), 200
-            
-        except Exception as ai_error:
-            return jsonify({
-                'error': 'Failed to generate roadmap with AI',
-                'details': str(ai_error),
-                'fallback': True
-            }), 500
+        ],
+        temperature=0.7,
+        max_tokens=max_tokens,
+        stream=stream
+    )
+
+def complete_roadmap(client, model_name, user_prompt, max_tokens):
+    return roadmap_completion(client, model_name, user_prompt, max_tokens).choices[0].message.content
+
+def get_student_application(application_id):
+    """Resolve the caller's application, or return an error response tuple"""
+    if not application_id:
+        return None, (jsonify({'error': 'Application ID required'}), 400)
+    
+    # Get application details
+    application = Application.query.get(application_id)
+    if not application or application.student_id != get_student_id():
+        return None, (jsonify({'error': 'Application not found'}), 404)
+    
+    return application, None
+
+def build_roadmap_data(application):
+    """Generate the roadmap for an application and return the response body"""
+    job = application.job
+    company = job.company
+    prompt, days_remaining = build_roadmap_prompt(application, application.student)
+    
+    # Generate roadmap using Groq Llama 3. Company requirements and major
+    # topics depend only on the job and are cached for all its applicants;
+    # only the skill gap and day plan are generated per student.
+    client = get_job_groq_client()
+    model_name = get_groq_model()
+    
+    job_prompt = build_job_sections_prompt(job, company)
+    job_key = llm_cache.cache_key(model_name, ROADMAP_JOB_PROMPT_VERSION, str(job.id), job_prompt)
+    cached_sections = llm_cache.get('roadmap_job', job_key)
+    
+    if cached_sections:
+        job_sections = cached_sections['content']
+        personal_content = complete_roadmap(client, model_name, prompt, 3000)
+    else:
+        # Both halves are independent, so a cold cache costs one round-trip
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            job_future = executor.submit(complete_roadmap, client, model_name, job_prompt, 1500)
+            personal_future = executor.submit(complete_roadmap, client, model_name, prompt, 3000)
+            job_sections = job_future.result()
+            personal_content = personal_future.result()
+        llm_cache.put('roadmap_job', job_key, model_name, ROADMAP_JOB_PROMPT_VERSION, {'content': job_sections})
+    
+    roadmap_content = merge_roadmap(personal_content, job_sections)
+    
+    # Parse and structure the roadmap
+    return {
+        'success': True,
+        'company_name': company.company_name,
+        'company_logo': company.logo_url,
+        'job_title': job.title,
+        'job_type': job.job_type,
+        'current_stage': application.status,
+        'days_remaining': days_remaining,
+        'roadmap_content': roadmap_content,
+        'generated_at': datetime.now().isoformat(),
+        'application_id': application.id,
+        'sections_cached': bool(cached_sections)
+    }
+
+@job_handler('groq_roadmap', concurrency=GROQ_JOB_CONCURRENCY, timeout=180, max_attempts=3)
+def run_roadmap_job(payload):
+    application = Application.query.get(payload['application_id'])
+    if not application:
+        raise PermanentJobError('Application not found')
+    body = build_roadmap_data(application)
+    db.session.commit()  # Keeps the LLM cache entry or hit count
+    return body
+
+@learning_guide_bp.route('/generate-roadmap', methods=['POST'])
+@roles_required(ROLE_STUDENT)
+def generate_learning_roadmap():
+    """Queue an AI-powered personalized learning roadmap (202; poll the job status URL)"""
+    try:
+        data = request.json
+        application_id = data.get('application_id')
+        
+        application, error_response = get_student_application(application_id)
+        if error_response:
+            return error_response
+        
+        job = submit_job('groq_roadmap', {'application_id': application.id}, user_id=get_user_id())
+        return job_accepted(job, application_id=application.id)
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@learning_guide_bp.route('/quick-tips/<int:application_id>', methods=['GET'])
-@jwt_required()
-def get_quick_tips(application_id):
-    """Get quick AI-generated tips for specific application"""
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@learning_guide_bp.route('/generate-roadmap/stream', methods=['GET', 'POST'])
+@roles_required(ROLE_STUDENT)
+def stream_learning_roadmap():
+    """
+    Streaming variant of generate-roadmap (Server-Sent Events)
+    
+    Events: `meta` (company/job details), `token` ({"content": ...} chunks in
+    final section order), `done` and `error`. The shared company sections are
+    spliced in just before the day-by-day plan.
+    """
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        data = request.get_json(silent=True) or {}
+        application_id = data.get('application_id') or request.args.get('application_id', type=int)
         
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        application = Application.query.get(application_id)
-        if not application or application.student_id != user.student.id:
-            return jsonify({'error': 'Application not found'}), 404
+        application, error_response = get_student_application(application_id)
+        if error_response:
+            return error_response
         
         job = application.job
         company = job.company
+        prompt, days_remaining = build_roadmap_prompt(application, application.student)
         
+        client = get_groq_client()
+        model_name = get_groq_model()
+        job_prompt = build_job_sections_prompt(job, company)
+        job_key = llm_cache.cache_key(model_name, ROADMAP_JOB_PROMPT_VERSION, str(job.id), job_prompt)
+        cached_sections = llm_cache.get('roadmap_job', job_key)
+        db.session.commit()  # Counts the cache hit
+        
+        meta = {
+            'company_name': company.company_name,
+            'company_logo': company.logo_url,
+            'job_title': job.title,
+            'job_type': job.job_type,
+            'current_stage': application.status,
+            'days_remaining': days_remaining,
+            'application_id': application_id,
+            'sections_cached': bool(cached_sections)
+        }
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        executor = None
         try:
-            client = get_groq_client()
+            yield sse_event('meta', meta)
             
-            prompt = f"""Give 5 quick, actionable tips for a student preparing for {company.company_name}'s {job.title} position. 
-Current stage: {application.status}
-Make tips specific, concise (1-2 sentences each), and immediately actionable."""
-
-            response = client.chat.completions.create(
-                model=os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile'),
-                messages=[
-                    {"role": "system", "content": "You are a concise career advisor. Give brief, actionable tips."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+            if cached_sections:
+                job_future = None
+                job_sections = cached_sections['content']
+            else:
+                # Company sections are generated alongside the personal stream
+                executor = ThreadPoolExecutor(max_workers=1)
+                job_future = executor.submit(complete_roadmap, client, model_name, job_prompt, 1500)
+                job_sections = None
             
-            tips_content = response.choices[0].message.content
+            def shared_sections():
+                nonlocal job_sections
+                if job_sections is None:
+                    job_sections = job_future.result()
+                    llm_cache.put('roadmap_job', job_key, model_name, ROADMAP_JOB_PROMPT_VERSION, {'content': job_sections})
+                    db.session.commit()
+                return job_sections.strip()
             
-            return jsonify({
-                'success': True,
-                'tips': tips_content,
-                'company_name': company.company_name,
-                'job_title': job.title
-            }), 200
+            def separator(before):
+                return '' if before.endswith('\n\n') or not before else ('\n' if before.endswith('\n') else '\n\n')
+            
+            # Text is forwarded as it arrives; only a line that could still
+            # turn into the "## 4." heading is held back until it completes
+            text = ''
+            emitted = 0
+            inserted = False
+            stream = roadmap_completion(client, model_name, prompt, 3000, stream=True)
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if inserted:
+                    yield sse_event('token', {'content': delta})
+                    continue
+                text += delta
+                match = DAY_PLAN_HEADING.search(text, text.rfind('\n', 0, emitted) + 1)
+                if match:
+                    before = text[:match.start()]
+                    sections = shared_sections()
+                    yield sse_event('token', {'content': text[emitted:match.start()] + separator(before) + sections + '\n\n'})
+                    yield sse_event('token', {'content': text[match.start():]})
+                    inserted = True
+                    continue
+                line_start = text.rfind('\n') + 1
+                tail = text[line_start:]
+                safe = len(text) if tail.strip() and not tail.lstrip().startswith('#') else max(line_start, emitted)
+                if safe > emitted:
+                    yield sse_event('token', {'content': text[emitted:safe]})
+                    emitted = safe
+            
+            if not inserted:
+                sections = shared_sections()
+                yield sse_event('token', {'content': text[emitted:] + separator(text) + sections})
+            
+            yield sse_event('done', {'generated_at': datetime.now().isoformat()})
             
         except Exception as ai_error:
-            return jsonify({
-                'error': 'Failed to generate tips',
-                'details': str(ai_error)
-            }), 500
+            yield sse_event('error', {
+                'error': 'Failed to generate roadmap with AI',
+                'details': str(ai_error),
+                'fallback': True
+            })
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def quick_tips_request(application):
+    """Tips prompt and its cache key"""
+    job = application.job
+    prompt = f"""Give 5 quick, actionable tips for a student preparing for {job.company.company_name}'s {job.title} position. 
+Current stage: {application.status}
+Make tips specific, concise (1-2 sentences each), and immediately actionable."""
+    
+    # The prompt has nothing student-specific, so every applicant at
+    # the same stage of this job shares one response
+    key = llm_cache.cache_key(get_groq_model(), QUICK_TIPS_PROMPT_VERSION, str(job.id), application.status, prompt)
+    return prompt, key
+
+def quick_tips_body(application, tips_content, cached):
+    return {
+        'success': True,
+        'tips': tips_content,
+        'company_name': application.job.company.company_name,
+        'job_title': application.job.title,
+        'cached': cached
+    }
+
+@job_handler('groq_tips', concurrency=GROQ_JOB_CONCURRENCY, timeout=60, max_attempts=3)
+def run_quick_tips_job(payload):
+    application = Application.query.get(payload['application_id'])
+    if not application:
+        raise PermanentJobError('Application not found')
+    
+    prompt, key = quick_tips_request(application)
+    cached = llm_cache.get('quick_tips', key)  # Another applicant's job may have filled it
+    if cached:
+        db.session.commit()  # Counts the cache hit
+        return quick_tips_body(application, cached['tips'], True)
+    
+    client = get_job_groq_client()
+    model_name = get_groq_model()
+    response = client.chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": "You are a concise career advisor. Give brief, actionable tips."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=500
+    )
+    tips_content = response.choices[0].message.content
+    llm_cache.put('quick_tips', key, model_name, QUICK_TIPS_PROMPT_VERSION, {'tips': tips_content})
+    db.session.commit()
+    return quick_tips_body(application, tips_content, False)
+
+@learning_guide_bp.route('/quick-tips/<int:application_id>', methods=['GET'])
+@roles_required(ROLE_STUDENT)
+def get_quick_tips(application_id):
+    """Get quick AI-generated tips for specific application (cached: 200, otherwise 202 and poll)"""
+    try:
+        user_id = get_user_id()
+        
+        application = Application.query.get(application_id)
+        if not application or application.student_id != get_student_id():
+            return jsonify({'error': 'Application not found'}), 404
+        
+        prompt, key = quick_tips_request(application)
+        cached = llm_cache.get('quick_tips', key)
+        if cached:
+            db.session.commit()  # Counts the cache hit
+            return jsonify(quick_tips_body(application, cached['tips'], True)), 200
+        
+        job = submit_job('groq_tips', {'application_id': application.id}, user_id=user_id)
+        return job_accepted(job, application_id=application.id)
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
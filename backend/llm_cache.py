@@ -0,0 +1,108 @@
+"""
+Content-addressed response cache for LLM calls (Gemini ATS analysis)
+
+Keys are sha256 over (model, prompt template version, inputs), so identical
+resume/JD pairs are answered from the llm_response_cache table until the
+entry's TTL runs out. Bump a prompt version whenever its template changes.
+get and put never commit or roll back the caller's session: hit counts and
+new entries are saved by the caller's commit.
+"""
+
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from models import db, LLMResponseCache
+
+LLM_CACHE_TTL_HOURS = int(os.getenv('LLM_CACHE_TTL_HOURS', '168'))
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0})
+
+
+def _count(kind, field):
+    with _stats_lock:
+        _stats[kind][field] += 1
+
+
+def cache_key(model, prompt_version, *inputs):
+    """sha256 over the model, prompt version and inputs (length-prefixed so parts cannot run together)"""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version) + inputs:
+        data = (part or '').encode('utf-8')
+        digest.update(f'{len(data)}:'.encode('ascii'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def get(kind, key):
+    """Return the cached response for key, or None on a miss or expired entry"""
+    entry = LLMResponseCache.query.filter_by(cache_key=key).first()
+    if entry is None:
+        _count(kind, 'misses')
+        return None
+    if entry.expires_at <= datetime.utcnow():
+        _count(kind, 'expired')
+        _count(kind, 'misses')
+        return None
+    LLMResponseCache.query.filter_by(id=entry.id).update(
+        {'hit_count': db.func.coalesce(LLMResponseCache.hit_count, 0) + 1}, synchronize_session=False
+    )
+    _count(kind, 'hits')
+    return entry.response
+
+
+def put(kind, key, model, prompt_version, response, ttl_hours=None):
+    """Store a parsed response under key, replacing any expired entry (in a SAVEPOINT; the caller commits)"""
+    ttl = timedelta(hours=ttl_hours if ttl_hours is not None else LLM_CACHE_TTL_HOURS)
+    try:
+        with db.session.begin_nested():
+            entry = LLMResponseCache.query.filter_by(cache_key=key).first()
+            if entry is None:
+                entry = LLMResponseCache(cache_key=key)
+                db.session.add(entry)
+            entry.kind = kind
+            entry.model = model
+            entry.prompt_version = prompt_version
+            entry.response = response
+            entry.hit_count = 0
+            entry.created_at = datetime.utcnow()
+            entry.expires_at = entry.created_at + ttl
+        _count(kind, 'stores')
+    except Exception as e:
+        # A cache write must never fail the request that produced the response;
+        # only the savepoint is rolled back, the caller's changes are kept
+        print(f"LLM cache write failed: {e}")
+
+
+def purge_expired():
+    """Delete expired entries; returns the number removed"""
+    removed = LLMResponseCache.query.filter(
+        LLMResponseCache.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def get_stats():
+    """Per-kind hit/miss counters for this process plus persisted entry counts"""
+    with _stats_lock:
+        process = {kind: dict(counts) for kind, counts in _stats.items()}
+    for counts in process.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+
+    now = datetime.utcnow()
+    stored = {}
+    rows = db.session.query(
+        LLMResponseCache.kind,
+        db.func.count(LLMResponseCache.id),
+        db.func.sum(db.case((LLMResponseCache.expires_at > now, 1), else_=0)),
+        db.func.sum(LLMResponseCache.hit_count)
+    ).group_by(LLMResponseCache.kind).all()
+    for kind, total, live, hits in rows:
+        stored[kind] = {'entries': total, 'live_entries': int(live or 0), 'lifetime_hits': int(hits or 0)}
+
+    return {'ttl_hours': LLM_CACHE_TTL_HOURS, 'process': process, 'stored': stored}
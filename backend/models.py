@@ -43,6 +43,7 @@ class Student(db.Model):
     full_name = db.Column(db.String(255), nullable=False)
     enrollment_number = db.Column(db.String(50), unique=True, nullable=False)
     branch = db.Column(db.String(100), nullable=False)
+    branch_code = db.Column(db.String(20), index=True)  # Canonical code, see branches.normalize_branch
     cgpa = db.Column(db.Numeric(3, 2), nullable=False)
     tenth_percentage = db.Column(db.Numeric(5, 2))
     twelfth_percentage = db.Column(db.Numeric(5, 2))
@@ -51,6 +52,7 @@ class Student(db.Model):
     current_year = db.Column(db.SmallInteger)  # 1-4 year of study
     phone = db.Column(db.String(15))
     resume_url = db.Column(db.String(500))
+    resume_hash = db.Column(db.String(64))  # sha256 of extracted resume text
     ats_score = db.Column(db.Integer)  # ATS score 0-100
     ats_feedback = db.Column(db.Text)  # Detailed ATS feedback from Gemini
     ats_calculated_at = db.Column(db.DateTime)  # When ATS was last calculated
@@ -63,6 +65,13 @@ class Student(db.Model):
     profile_completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Company applicants view sort keys, with the keyset tie-break
+        db.Index('idx_student_cgpa', 'cgpa', 'id'),
+        db.Index('idx_student_ats', 'ats_score', 'id'),
+        db.Index('idx_student_name', 'full_name', 'id'),
+    )
+    
     # Relationships
     applications = db.relationship('Application', backref='student', cascade='all, delete-orphan')
     
@@ -73,6 +82,7 @@ class Student(db.Model):
             'full_name': self.full_name,
             'enrollment_number': self.enrollment_number,
             'branch': self.branch,
+            'branch_code': self.branch_code,
             'cgpa': float(self.cgpa) if self.cgpa else None,
             'tenth_percentage': float(self.tenth_percentage) if self.tenth_percentage else None,
             'twelfth_percentage': float(self.twelfth_percentage) if self.twelfth_percentage else None,
@@ -138,7 +148,7 @@ class Job(db.Model):
     location = db.Column(db.String(255))
     salary_range = db.Column(db.String(100))
     min_cgpa = db.Column(db.Numeric(3, 2), default=0.00)
-    eligible_branches = db.Column(db.Text)  # JSON-like format: ["CSE", "IT", "ECE"]
+    eligible_branches = db.Column(db.Text)  # Comma separated: "CSE, IT, ECE" (or "All")
     min_10th_percentage = db.Column(db.Numeric(5, 2))
     min_12th_percentage = db.Column(db.Numeric(5, 2))
     application_deadline = db.Column(db.Date, nullable=False)
@@ -150,6 +160,11 @@ class Job(db.Model):
     # Relationships
     applications = db.relationship('Application', backref='job', cascade='all, delete-orphan')
     hiring_rounds = db.relationship('HiringRound', backref='job', cascade='all, delete-orphan')
+    eligible_branch_rows = db.relationship('JobEligibleBranch', backref='job', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('idx_job_feed', 'session_id', 'status', 'application_deadline', 'id'),  # Student job feed keyset
+    )
     
     def to_dict(self):
         return {
@@ -178,6 +193,33 @@ class Job(db.Model):
         }
 
 
+class JobEligibleBranch(db.Model):
+    """Canonical branch codes a job is open to (no rows: all branches)"""
+    __tablename__ = 'job_eligible_branches'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    branch_code = db.Column(db.String(20), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('idx_branch_job', 'branch_code', 'job_id'),
+    )
+
+
+class StudentJobEligibility(db.Model):
+    """Materialized eligibility of each student for each job, maintained by eligibility.py"""
+    __tablename__ = 'student_job_eligibility'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    is_eligible = db.Column(db.Boolean, nullable=False, default=True)
+    reasons = db.Column(db.Integer, nullable=False, default=0)  # REASON_* bitmask, 0 when eligible
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_job_eligible', 'job_id', 'is_eligible'),
+    )
+
+
 class Application(db.Model):
     __tablename__ = 'applications'
     
@@ -190,7 +232,13 @@ class Application(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     notes = db.Column(db.Text)
     
-    __table_args__ = (db.UniqueConstraint('student_id', 'job_id', name='unique_application'),)
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'job_id', name='unique_application'),
+        # Company applicants view: filter by status, sort by applied_at
+        db.Index('idx_job_status_applied', 'job_id', 'status', 'applied_at'),
+        db.Index('idx_job_applied', 'job_id', 'applied_at'),
+        db.Index('idx_application_updated', 'updated_at'),  # Placement snapshot watermark
+    )
     
     def to_dict(self):
         return {
@@ -207,6 +255,114 @@ class Application(db.Model):
         }
 
 
+class ResumeScore(db.Model):
+    """Materialized ATS score of a student's resume against a job"""
+    __tablename__ = 'resume_scores'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False)
+    resume_url = db.Column(db.String(500))
+    resume_hash = db.Column(db.String(64), nullable=False)
+    jd_hash = db.Column(db.String(64), nullable=False)
+    overall_match_percentage = db.Column(db.Integer)  # 0-100 score
+    skills_match_percentage = db.Column(db.Integer)
+    experience_match_percentage = db.Column(db.Integer)
+    education_match_percentage = db.Column(db.Integer)
+    missing_keywords = db.Column(db.Text)  # JSON array of missing keywords
+    matched_keywords = db.Column(db.Text)  # JSON array of matched keywords
+    improvement_suggestions = db.Column(db.Text)  # JSON array of suggestions
+    level = db.Column(db.String(50))
+    summary = db.Column(db.Text)
+    report = db.Column(db.JSON)  # Full ATSMatcher report
+    heatmap_data = db.Column(db.JSON)
+    assessed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'job_id', name='unique_resume_job'),
+        db.Index('idx_job_score', 'job_id', 'overall_match_percentage'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'job_id': self.job_id,
+            'overall_match_percentage': self.overall_match_percentage,
+            'skills_match_percentage': self.skills_match_percentage,
+            'experience_match_percentage': self.experience_match_percentage,
+            'level': self.level,
+            'summary': self.summary,
+            'assessed_at': self.assessed_at.isoformat() if self.assessed_at else None
+        }
+
+class ResumeDocument(db.Model):
+    """Resume text and parsed ATS features, extracted once at upload"""
+    __tablename__ = 'resume_documents'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), unique=True, nullable=False)
+    resume_url = db.Column(db.String(500))
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 of text, mirrors students.resume_hash
+    text = db.Column(db.Text().with_variant(db.Text(length=4294967295), 'mysql'))
+    features = db.Column(db.JSON)  # EnhancedResumeParser.parse output
+    parser_version = db.Column(db.Integer, nullable=False)
+    extracted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    student = db.relationship('Student', backref=db.backref('resume_document', uselist=False, cascade='all, delete-orphan'))
+
+class LLMResponseCache(db.Model):
+    """Content-addressed cache of parsed LLM responses"""
+    __tablename__ = 'llm_response_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # sha256(model, prompt version, inputs)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. ats_resume, ats_jd
+    model = db.Column(db.String(100), nullable=False)
+    prompt_version = db.Column(db.String(50), nullable=False)
+    response = db.Column(db.JSON, nullable=False)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class BackgroundJob(db.Model):
+    """Queued unit of slow external work (LLM calls, Drive uploads) run by job_queue"""
+    __tablename__ = 'background_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum('Queued', 'Running', 'Succeeded', 'Failed'), default='Queued', nullable=False)
+    payload = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    timeout_seconds = db.Column(db.Integer, nullable=False)
+    next_run_at = db.Column(db.DateTime)  # Retry backoff; NULL means run now
+    lease_expires_at = db.Column(db.DateTime)  # Running jobs past this are requeued
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('idx_job_status_type', 'status', 'job_type', 'next_run_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'result': self.result if self.status == 'Succeeded' else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
 class Announcement(db.Model):
     __tablename__ = 'announcements'
     
@@ -413,6 +569,10 @@ class OfferLetter(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_offer_updated', 'updated_at'),  # Placement snapshot watermark
+    )
+    
     # Relationships
     application = db.relationship('Application', backref='offer_letters')
     company = db.relationship('Company', backref='offer_letters')
@@ -600,6 +760,9 @@ class PlacementStats(db.Model):
     total_companies_visiting = db.Column(db.Integer, default=0)
     companies_in_interview = db.Column(db.Integer, default=0)
     
+    # Offers/applications updated before this time are included (placement_snapshots.py)
+    computed_through = db.Column(db.DateTime)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -614,10 +777,28 @@ class PlacementStats(db.Model):
             'average_package': float(self.average_package) if self.average_package else 0,
             'department_stats': self.department_stats,
             'total_companies_visiting': self.total_companies_visiting,
-            'companies_in_interview': self.companies_in_interview
+            'companies_in_interview': self.companies_in_interview,
+            'computed_through': self.computed_through.isoformat() if self.computed_through else None
         }
 
 
+class StudentPlacementState(db.Model):
+    """Per-student placement state rolled up into PlacementStats, maintained by placement_snapshots.py"""
+    __tablename__ = 'student_placement_state'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    branch_code = db.Column(db.String(20))
+    is_placed = db.Column(db.Boolean, nullable=False, default=False)
+    best_ctc = db.Column(db.Numeric(12, 2))  # Highest annual CTC among placed offers
+    offers = db.Column(db.Integer, nullable=False, default=0)  # Placed (Sent/Accepted) offers
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_placement_state_branch', 'branch_code'),
+    )
+
+
 class CompanyVisit(db.Model):
     """Track company visits and their current status"""
     __tablename__ = 'company_visits'
@@ -669,6 +850,10 @@ class CompanyVisit(db.Model):
 class RoundCandidateProgress(db.Model):
     """Model for tracking candidate progress through recruitment rounds"""
     __tablename__ = 'round_candidate_progress'
+    __table_args__ = (
+        db.UniqueConstraint('round_id', 'application_id', name='unique_round_application'),
+        db.Index('idx_progress_round_status', 'round_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     round_id = db.Column(db.Integer, db.ForeignKey('hiring_rounds.id'), nullable=False)
@@ -0,0 +1,90 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints
+
+A page is ordered by (sort column, unique id column). The cursor is the last
+row's pair, so the next page is a range scan after it rather than an OFFSET
+that re-reads every earlier row. By default NULL sort values are kept first
+in ascending and last in descending order on every database (MySQL and
+SQLite already do this; Postgres would not without the explicit IS NULL
+key); pass nulls_last=True to keep them last in both directions, or
+nullable=False for a NOT NULL column to order on the plain (column, id) pair
+an index can serve.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return {'d': str(value)}
+    if isinstance(value, datetime):
+        return {'t': value.isoformat()}
+    if isinstance(value, date):
+        return {'D': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'd' in value:
+            return Decimal(value['d'])
+        if 't' in value:
+            return datetime.fromisoformat(value['t'])
+        if 'D' in value:
+            return date.fromisoformat(value['D'])
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def encode_cursor(*values):
+    """Opaque cursor for a row's key values"""
+    key = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Key values from a cursor issued by encode_cursor; ValueError if malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError('Invalid cursor')
+        return [_decode_value(value) for value in values]
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_order(column, id_column, descending, nulls_last=None, nullable=True):
+    """ORDER BY clauses for (column, id_column); NULLs first ascending / last descending unless nulls_last is given"""
+    if descending:
+        order = [column.desc(), id_column.desc()]
+    else:
+        order = [column.asc(), id_column.asc()]
+    if not nullable:
+        return order
+    if nulls_last is None:
+        nulls_last = descending
+    return [column.is_(None).asc() if nulls_last else column.is_(None).desc()] + order
+
+
+def keyset_after(column, id_column, value, last_id, descending, nulls_last=None, nullable=True):
+    """Rows after (value, last_id) in keyset_order"""
+    if nulls_last is None:
+        nulls_last = descending
+    id_after = id_column < last_id if descending else id_column > last_id
+    if not nullable:
+        value_after = column < value if descending else column > value
+        return or_(value_after, and_(column == value, id_after))
+    if value is None:
+        if nulls_last:
+            return and_(column.is_(None), id_after)
+        return or_(and_(column.is_(None), id_after), column.isnot(None))
+    value_after = column < value if descending else column > value
+    after = or_(value_after, and_(column == value, id_after))
+    if nulls_last:
+        return or_(after, column.is_(None))
+    return after
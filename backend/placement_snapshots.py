@@ -0,0 +1,247 @@
+"""
+Daily PlacementStats snapshots with incremental rollups
+
+student_placement_state holds one narrow row per student (branch, placed,
+best CTC, offer and application counts). A refresh recomputes only the
+students whose offers or applications changed since the last snapshot's
+watermark (updated_at), who are new, or whose branch changed, then rolls the
+state table up per branch with one GROUP BY into today's PlacementStats row.
+One row per day forms the time series behind the trend endpoint.
+
+- 'placement_snapshot' background job: on demand, and submitted by the
+  stats endpoint when the latest row is from an earlier day
+- refresh_placement_stats.py: the same refresh for a daily cron entry
+- full=True rebuilds every student's state (run it after deleting offers,
+  which leaves no updated_at behind)
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, literal
+
+from models import db, Student, Application, OfferLetter, Department, Job, PlacementStats, StudentPlacementState, BackgroundJob
+from analytics import best_offer_subquery, branch_summaries, overall_placement, placement_by_department
+from job_queue import job_handler, submit_job
+
+# Rows committed while the previous refresh ran may carry an earlier updated_at
+SNAPSHOT_WATERMARK_OVERLAP = timedelta(minutes=5)
+SNAPSHOT_ID_CHUNK = 1000
+
+STATE_COLUMNS = ['student_id', 'branch_code', 'is_placed', 'best_ctc', 'offers', 'applications', 'refreshed_at']
+
+
+def _state_query(now, student_ids=None):
+    """Student placement state rows (STATE_COLUMNS order), limited to student_ids when given"""
+    offers = best_offer_subquery(student_ids)
+    applications = db.session.query(
+        Application.student_id.label('student_id'),
+        func.count(Application.id).label('applications')
+    )
+    if student_ids is not None:
+        applications = applications.filter(Application.student_id.in_(student_ids))
+    applications = applications.group_by(Application.student_id).subquery()
+
+    query = db.session.query(
+        Student.id,
+        Student.branch_code,
+        case((offers.c.student_id.isnot(None), True), else_=False),
+        offers.c.best_ctc,
+        func.coalesce(offers.c.offers, 0),
+        func.coalesce(applications.c.applications, 0),
+        literal(now, db.DateTime)
+    ).outerjoin(
+        offers, offers.c.student_id == Student.id
+    ).outerjoin(
+        applications, applications.c.student_id == Student.id
+    )
+    if student_ids is not None:
+        query = query.filter(Student.id.in_(student_ids))
+    return query
+
+
+def changed_student_ids(since):
+    """Students with offers or applications updated since, without a state row, or whose branch changed"""
+    offers = db.session.query(OfferLetter.student_id).filter(OfferLetter.updated_at >= since)
+    applications = db.session.query(Application.student_id).filter(Application.updated_at >= since)
+    moved = db.session.query(Student.id).outerjoin(
+        StudentPlacementState, StudentPlacementState.student_id == Student.id
+    ).filter(
+        (StudentPlacementState.student_id.is_(None)) |
+        StudentPlacementState.branch_code.is_distinct_from(Student.branch_code)
+    )
+    return [student_id for (student_id,) in offers.union(applications, moved)]
+
+
+def refresh_student_states(student_ids=None):
+    """Recompute state rows for student_ids (every student when None) with INSERT ... SELECT; flushes only"""
+    now = datetime.utcnow()
+    db.session.flush()
+    table = StudentPlacementState.__table__
+
+    if student_ids is None:
+        db.session.execute(table.delete())
+        db.session.execute(insert(table).from_select(STATE_COLUMNS, _state_query(now)))
+        return
+
+    for start in range(0, len(student_ids), SNAPSHOT_ID_CHUNK):
+        chunk = student_ids[start:start + SNAPSHOT_ID_CHUNK]
+        db.session.execute(table.delete().where(table.c.student_id.in_(chunk)))
+        db.session.execute(insert(table).from_select(STATE_COLUMNS, _state_query(now, chunk)))
+
+    # Deleted students (SQLite does not enforce the cascade)
+    db.session.execute(table.delete().where(
+        ~db.session.query(Student.id).filter(Student.id == table.c.student_id).exists()
+    ))
+
+
+def state_rollup():
+    """placement summaries per branch from the state table, one GROUP BY; adds 'applied' per branch"""
+    state = StudentPlacementState
+    rows = db.session.query(
+        state.branch_code.label('code'),
+        Department.name.label('department_name'),
+        literal(None).label('branch'),
+        func.count(state.student_id).label('total'),
+        func.coalesce(func.sum(case((state.is_placed == True, 1), else_=0)), 0).label('placed'),
+        func.coalesce(func.sum(state.offers), 0).label('offers'),
+        func.max(state.best_ctc).label('highest'),
+        func.sum(state.best_ctc).label('package_sum'),
+        func.count(state.best_ctc).label('package_count'),
+        func.coalesce(func.sum(case((state.applications > 0, 1), else_=0)), 0).label('applied')
+    ).outerjoin(
+        Department, Department.code == state.branch_code
+    ).group_by(state.branch_code, Department.name).order_by(state.branch_code).all()
+
+    branches = branch_summaries(rows)
+    for branch, row in zip(branches, rows):
+        branch['applied'] = int(row.applied)
+    return branches
+
+
+def refresh_placement_snapshot(full=False, day=None):
+    """
+    Refresh the PlacementStats row for day (today) and return (stats, students refreshed or None when full)
+
+    Incremental from the latest row's computed_through unless full or there
+    is no earlier snapshot. Flushes; the caller commits.
+    """
+    started = datetime.utcnow()
+    day = day or started.date()
+
+    latest = PlacementStats.query.filter(
+        PlacementStats.computed_through.isnot(None)
+    ).order_by(PlacementStats.computed_through.desc()).first()
+    if full or not latest:
+        refresh_student_states()
+        refreshed = None
+    else:
+        changed = changed_student_ids(latest.computed_through - SNAPSHOT_WATERMARK_OVERLAP)
+        refresh_student_states(changed)
+        refreshed = len(changed)
+
+    branches = state_rollup()
+    overall = overall_placement(branches)
+    departments = placement_by_department(branches)
+    applied = {branch['code']: branch['applied'] for branch in branches}
+
+    stats = PlacementStats.query.filter_by(date=day).first()
+    if not stats:
+        stats = PlacementStats(date=day)
+        db.session.add(stats)
+    stats.total_students = overall['total']
+    stats.placed_students = overall['placed']
+    stats.unplaced_students = overall['unplaced']
+    stats.highest_package = overall['highest_package']
+    stats.average_package = overall['average_package']
+    stats.department_stats = {
+        dept['name']: {
+            'code': dept['code'],
+            'total': dept['total'],
+            'placed': dept['placed'],
+            'applied': applied.get(dept['code'], 0),
+            'placement_rate': dept['placement_rate'],
+            'highest_package': dept['highest_package'],
+            'average_package': dept['average_package']
+        }
+        for dept in departments
+    }
+    stats.total_companies_visiting = Job.query.filter(Job.status == 'Approved').count()
+    stats.companies_in_interview = db.session.query(func.count(func.distinct(Job.company_id))).join(
+        Application, Application.job_id == Job.id
+    ).filter(Application.status == 'Interview').scalar() or 0
+    stats.computed_through = started
+    db.session.flush()
+    return stats, refreshed
+
+
+def snapshot_job_pending():
+    """Whether a placement_snapshot job is queued or running"""
+    return db.session.query(BackgroundJob.id).filter(
+        BackgroundJob.job_type == 'placement_snapshot',
+        BackgroundJob.status.in_(['Queued', 'Running'])
+    ).first() is not None
+
+
+def latest_placement_snapshot():
+    """
+    Newest PlacementStats row for dashboards
+
+    Computed inline when there is none yet; when it is from an earlier day a
+    background refresh is queued and the previous row is served meanwhile.
+    """
+    stats = PlacementStats.query.order_by(PlacementStats.date.desc()).first()
+    if not stats:
+        stats, _ = refresh_placement_snapshot()
+        db.session.commit()
+    elif stats.date < datetime.utcnow().date() and not snapshot_job_pending():
+        submit_job('placement_snapshot', {})
+    return stats
+
+
+def placement_trend(days, department=None):
+    """
+    Daily placement rate series from PlacementStats rows of the last days
+
+    {'overall': [{date, total, placed, placement_rate}], 'departments':
+    {name: [{date, total, placed, applied, placement_rate}]}}, limited to
+    one department when given.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days)
+    rows = PlacementStats.query.filter(PlacementStats.date >= since).order_by(PlacementStats.date).all()
+
+    overall = []
+    departments = {}
+    for row in rows:
+        day = row.date.isoformat()
+        total = row.total_students or 0
+        overall.append({
+            'date': day,
+            'total': total,
+            'placed': row.placed_students or 0,
+            'placement_rate': (row.placed_students or 0) / total * 100 if total else 0
+        })
+        for name, dept in (row.department_stats or {}).items():
+            if department and name != department:
+                continue
+            departments.setdefault(name, []).append({
+                'date': day,
+                'total': dept.get('total', 0),
+                'placed': dept.get('placed', 0),
+                'applied': dept.get('applied'),
+                'placement_rate': dept.get('placement_rate', 0)
+            })
+    return {'overall': overall, 'departments': departments}
+
+
+@job_handler('placement_snapshot', concurrency=1, timeout=600)
+def run_placement_snapshot(payload):
+    """Refresh today's PlacementStats row (payload: {'full': bool})"""
+    stats, refreshed = refresh_placement_snapshot(full=bool(payload.get('full')))
+    db.session.commit()
+    return {
+        'date': stats.date.isoformat(),
+        'full': refreshed is None,
+        'students_refreshed': refreshed,
+        'placed_students': stats.placed_students,
+        'total_students': stats.total_students
+    }
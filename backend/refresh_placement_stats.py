@@ -0,0 +1,27 @@
+"""
+Refresh today's placement snapshot (PlacementStats row)
+
+Schedule daily, e.g. cron: 5 0 * * * cd /path/to/backend && python refresh_placement_stats.py
+Pass --full to recompute every student instead of the changes since the
+last snapshot (needed after offers were deleted).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from placement_snapshots import refresh_placement_snapshot
+
+with app.app_context():
+    try:
+        full = '--full' in sys.argv
+        stats, refreshed = refresh_placement_snapshot(full=full)
+        db.session.commit()
+        scope = 'all students' if refreshed is None else f'{refreshed} changed students'
+        print(f"✓ Placement snapshot for {stats.date} ({scope}): "
+              f"{stats.placed_students}/{stats.total_students} placed")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.session.rollback()
+        sys.exit(1)
@@ -0,0 +1,176 @@
+"""
+Bulk resume download as a ZIP bundle
+
+Resumes are fetched through get_stored_resume_bytes (Drive or local storage)
+on a bounded thread pool and written to the ZIP as each fetch completes, so
+at most RESUME_BUNDLE_WORKERS * 2 files are held in memory at once. Entries
+are stored uncompressed: PDFs and DOCX files are already compressed.
+
+- stream_resume_bundle: ZIP streamed straight into the response
+- 'resume_bundle' background job: the same bundle written to
+  uploads/bundles for very large selections, downloaded once it succeeds
+"""
+
+import os
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from io import RawIOBase
+from pathlib import Path
+
+from models import db, Application, Student
+from job_queue import job_handler, PermanentJobError
+
+RESUME_BUNDLE_WORKERS = int(os.getenv('RESUME_BUNDLE_WORKERS', '8'))
+RESUME_BUNDLE_TTL_HOURS = int(os.getenv('RESUME_BUNDLE_TTL_HOURS', '24'))
+BUNDLE_FOLDER = Path(__file__).parent / 'uploads' / 'bundles'
+
+
+class _ChunkWriter(RawIOBase):
+    """Non-seekable sink for ZipFile; the generator drains what was written so far"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def bundle_students(job_id, student_ids=None):
+    """(id, full_name, enrollment_number, resume_url) of job_id's applicants with a resume, limited to student_ids when given"""
+    # Plain rows, not ORM objects: they are read on the fetch threads
+    query = db.session.query(
+        Student.id, Student.full_name, Student.enrollment_number, Student.resume_url
+    ).join(Application, Application.student_id == Student.id).filter(
+        Application.job_id == job_id,
+        Student.resume_url.isnot(None),
+        Student.resume_url != ''
+    )
+    if student_ids:
+        query = query.filter(Student.id.in_(student_ids))
+    return query.order_by(Student.full_name).all()
+
+
+def entry_name(student):
+    """ZIP entry name: Name_Enrollment plus the stored file's extension"""
+    base = re.sub(r'[^A-Za-z0-9._-]+', '_', f'{student.full_name}_{student.enrollment_number}').strip('_')
+    ext = os.path.splitext((student.resume_url or '').split('?')[0])[1].lower()
+    return f'{base}{ext if ext in (".pdf", ".doc", ".docx") else ".pdf"}'
+
+
+def iter_resumes(students):
+    """Yield (student, bytes or None) as fetches complete, keeping at most 2 * workers in flight"""
+    from resume_routes import get_stored_resume_bytes
+
+    pending = list(reversed(students))
+    with ThreadPoolExecutor(max_workers=RESUME_BUNDLE_WORKERS) as executor:
+        in_flight = {}
+        while pending or in_flight:
+            while pending and len(in_flight) < RESUME_BUNDLE_WORKERS * 2:
+                student = pending.pop()
+                in_flight[executor.submit(get_stored_resume_bytes, student)] = student
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                student = in_flight.pop(future)
+                try:
+                    data, _ = future.result()
+                except Exception as e:
+                    print(f"Resume fetch failed for student {student.id}: {e}")
+                    data = None
+                yield student, data
+
+
+def write_bundle(zip_file, students):
+    """Write resumes into zip_file as they arrive; yields after each entry, returns (added, missing names)"""
+    added = 0
+    missing = []
+    used = set()
+    for student, data in iter_resumes(students):
+        if not data:
+            missing.append(f'{student.full_name} ({student.enrollment_number})')
+            continue
+        name = entry_name(student)
+        if name in used:
+            stem, ext = os.path.splitext(name)
+            name = f'{stem}_{student.id}{ext}'
+        used.add(name)
+        zip_file.writestr(name, data)
+        added += 1
+        yield
+    if missing:
+        zip_file.writestr('missing_resumes.txt', 'Resume could not be fetched for:\n' + '\n'.join(missing) + '\n')
+    return added, missing
+
+
+def stream_resume_bundle(students):
+    """Generator of ZIP bytes for students' resumes"""
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zip_file:
+        for _ in write_bundle(zip_file, students):
+            yield sink.drain()
+    yield sink.drain()
+
+
+def prune_bundles():
+    """Delete prepared bundles older than RESUME_BUNDLE_TTL_HOURS"""
+    cutoff = time.time() - RESUME_BUNDLE_TTL_HOURS * 3600
+    for path in [*BUNDLE_FOLDER.glob('*.zip'), *BUNDLE_FOLDER.glob('*.part')]:
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def new_bundle_token():
+    return uuid.uuid4().hex
+
+
+def bundle_path(token):
+    return BUNDLE_FOLDER / f'{token}.zip'
+
+
+def _drain(generator):
+    """Run a generator to the end and return its return value"""
+    while True:
+        try:
+            next(generator)
+        except StopIteration as done:
+            return done.value
+
+
+@job_handler('resume_bundle', concurrency=1, timeout=1800, max_attempts=2)
+def run_resume_bundle_job(payload):
+    """Prepare a resume ZIP on disk for GET /api/company/resume-bundles/<job id>"""
+    students = bundle_students(payload['job_id'], payload.get('student_ids'))
+    if not students:
+        raise PermanentJobError('No resumes to bundle')
+    # Release the connection for the long fetch
+    db.session.commit()
+
+    BUNDLE_FOLDER.mkdir(parents=True, exist_ok=True)
+    prune_bundles()
+    path = bundle_path(payload['token'])
+    # Each attempt writes its own file, so a retry never shares one with an earlier attempt
+    partial = path.with_name(f'{path.stem}.{uuid.uuid4().hex}.part')
+    try:
+        with zipfile.ZipFile(partial, 'w', zipfile.ZIP_STORED) as zip_file:
+            added, missing = _drain(write_bundle(zip_file, students))
+        partial.replace(path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    return {
+        'filename': payload['filename'],
+        'count': added,
+        'missing': len(missing),
+        'size': path.stat().st_size
+    }
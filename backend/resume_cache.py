@@ -0,0 +1,89 @@
+"""
+Bounded on-disk LRU cache for resume bytes downloaded from Google Drive
+
+Entries are plain files named after the Drive file id; recency is the file
+mtime (touched on every hit), so the cache survives restarts and is shared
+by all worker processes on the host. Writes are atomic (temp file + rename).
+"""
+
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+
+
+class DiskLRUCache:
+    """Size-bounded file cache keyed by Drive file id"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.directory / re.sub(r'[^A-Za-z0-9_-]', '_', key)
+
+    def get(self, key):
+        """Return cached bytes for key, or None"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store bytes for key, evicting least recently used entries beyond max_bytes"""
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Resume cache write failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def invalidate(self, key):
+        """Drop the entry for key if present"""
+        if key:
+            self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for entry in self._entries():
+            Path(entry.path).unlink(missing_ok=True)
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if e.is_file() and not e.name.startswith('.')]
+        except OSError:
+            return []
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                total -= size
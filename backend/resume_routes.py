@@ -1,12 +1,18 @@
 import os
 import re
 import json
+import threading
 import PyPDF2
 from io import BytesIO
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-from models import db, User, Student
+from models import db, Student, ResumeDocument, ResumeScore
+from auth import roles_required, get_user_id, get_student_id, current_student, ROLE_STUDENT
+from ats_scorer import SKILL_DATABASE, EnhancedResumeParser, PARSER_VERSION
+from ats_store import content_hash, refresh_student_scores, clear_student_scores
+from resume_cache import DiskLRUCache
+import llm_cache
+from job_queue import job_handler, submit_job, job_accepted, JobError, PermanentJobError
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -15,7 +21,9 @@ from dotenv import load_dotenv
 try:
     from google.oauth2 import service_account
     from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+    from googleapiclient.http import MediaIoBaseUpload
+    import google_auth_httplib2
+    import httplib2
     DRIVE_AVAILABLE = True
 except ImportError:
     DRIVE_AVAILABLE = False
@@ -38,10 +46,29 @@ UPLOAD_FOLDER = Path(__file__).parent / 'uploads' / 'resumes'
 UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
 DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file']
+# Bump when the matching Gemini prompt template changes so cached responses are not reused
+ATS_PROMPT_VERSION = 'ats-resume-v1'
+ATS_JD_PROMPT_VERSION = 'ats-jd-v1'
+# Background job limits for slow external calls
+GEMINI_JOB_CONCURRENCY = int(os.getenv('GEMINI_JOB_CONCURRENCY', '2'))
+DRIVE_JOB_CONCURRENCY = int(os.getenv('DRIVE_JOB_CONCURRENCY', '4'))
 DRIVE_FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
+DRIVE_FAKE_DIR = os.getenv('GOOGLE_DRIVE_FAKE_DIR')  # Offline FakeDriveService root
+RESUME_CACHE_MAX_BYTES = int(os.getenv('RESUME_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+# Downloaded Drive resumes, keyed by Drive file id
+RESUME_CACHE = DiskLRUCache(Path(__file__).parent / 'uploads' / 'drive_cache', RESUME_CACHE_MAX_BYTES)
+
+# Credentials are shared process-wide; httplib2 is not thread-safe, so each
+# thread gets its own service object built on top of them
+_drive_credentials = None
+_drive_lock = threading.Lock()
+_drive_local = threading.local()
 
 def drive_configured():
-    """Check if Drive is usable (libs + credentials)."""
+    """Check if Drive is usable (libs + credentials, or the offline fake)."""
+    if DRIVE_FAKE_DIR:
+        return True
     if not DRIVE_AVAILABLE:
         return False
     return bool(os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON') or os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE') or os.getenv('GOOGLE_APPLICATION_CREDENTIALS'))
@@ -49,23 +76,42 @@ def drive_configured():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def load_drive_credentials():
+    if os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'):
+        return service_account.Credentials.from_service_account_info(
+            json.loads(os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')),
+            scopes=DRIVE_SCOPES
+        )
+    cred_path = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE') or os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+    if cred_path and Path(cred_path).exists():
+        return service_account.Credentials.from_service_account_file(cred_path, scopes=DRIVE_SCOPES)
+    return None
+
+def build_drive_service():
+    if DRIVE_FAKE_DIR:
+        from fake_drive import FakeDriveService
+        return FakeDriveService(DRIVE_FAKE_DIR)
+    return build('drive', 'v3', credentials=_drive_credentials, cache_discovery=False)
+
 def get_drive_service():
+    """Reusable Drive client; credentials are loaded once and refreshed when expired"""
+    global _drive_credentials
     if not drive_configured():
         return None
-    creds = None
     try:
-        if os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'):
-            creds = service_account.Credentials.from_service_account_info(
-                json.loads(os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')),
-                scopes=DRIVE_SCOPES
-            )
-        else:
-            cred_path = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE') or os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-            if cred_path and Path(cred_path).exists():
-                creds = service_account.Credentials.from_service_account_file(cred_path, scopes=DRIVE_SCOPES)
-        if not creds:
-            return None
-        return build('drive', 'v3', credentials=creds, cache_discovery=False)
+        if not DRIVE_FAKE_DIR:
+            with _drive_lock:
+                if _drive_credentials is None:
+                    _drive_credentials = load_drive_credentials()
+                    if not _drive_credentials:
+                        return None
+                if not _drive_credentials.valid:
+                    _drive_credentials.refresh(google_auth_httplib2.Request(httplib2.Http()))
+        service = getattr(_drive_local, 'service', None)
+        if service is None:
+            service = build_drive_service()
+            _drive_local.service = service
+        return service
     except Exception as e:
         print(f"Drive client error: {e}")
         return None
@@ -90,23 +136,23 @@ def upload_file_to_drive(file_bytes, filename, mime_type):
         return None
 
 def download_drive_file(file_id):
+    cached = RESUME_CACHE.get(file_id)
+    if cached is not None:
+        return cached
     service = get_drive_service()
     if not service:
         return None
     try:
-        request = service.files().get_media(fileId=file_id)
-        fh = BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while not done:
-            _, done = downloader.next_chunk()
-        fh.seek(0)
-        return fh.read()
+        # Resumes are small; a single media GET avoids the chunked downloader's extra round-trips
+        data = service.files().get_media(fileId=file_id).execute()
+        RESUME_CACHE.put(file_id, data)
+        return data
     except Exception as e:
         print(f"Drive download failed: {e}")
         return None
 
 def delete_drive_file(file_id):
+    RESUME_CACHE.invalidate(file_id)
     service = get_drive_service()
     if not service:
         return False
@@ -170,7 +216,8 @@ def get_stored_resume_bytes(student):
                 print(f"Local resume read failed: {e}")
     return None, None
 
-def get_resume_text(student):
+def fetch_resume_text(student):
+    """Download and extract the stored resume. No DB access, so safe on worker threads."""
     resume_bytes, source = get_stored_resume_bytes(student)
     if not resume_bytes:
         return '', 'Resume file not found'
@@ -179,6 +226,53 @@ def get_resume_text(student):
         return '', 'Could not extract text from resume'
     return text, None
 
+def store_resume_document(student, text):
+    """Persist extracted text and parsed ATS features for the student's current resume (caller commits)"""
+    doc = student.resume_document
+    if doc is None:
+        doc = ResumeDocument(student=student)
+        db.session.add(doc)
+    student.resume_hash = content_hash(text)
+    doc.resume_url = student.resume_url
+    doc.content_hash = student.resume_hash
+    doc.text = text
+    doc.features = EnhancedResumeParser(SKILL_DATABASE).parse(text)
+    doc.parser_version = PARSER_VERSION
+    doc.extracted_at = datetime.utcnow()
+    return doc
+
+def current_resume_document(student):
+    """Stored document for the student's current resume, or None if it was never extracted"""
+    doc = student.resume_document
+    if not doc or doc.resume_url != student.resume_url or doc.content_hash != student.resume_hash:
+        return None
+    if doc.parser_version != PARSER_VERSION:
+        # Parser changed since extraction; re-parse the stored text, no download needed
+        doc.features = EnhancedResumeParser(SKILL_DATABASE).parse(doc.text)
+        doc.parser_version = PARSER_VERSION
+    return doc
+
+def get_resume_text(student):
+    """Resume text from the stored document, extracting (and backfilling) it on a miss"""
+    doc = current_resume_document(student)
+    if doc:
+        return doc.text, None
+    text, error = fetch_resume_text(student)
+    if error:
+        return '', error
+    store_resume_document(student, text)
+    return text, None
+
+def get_resume_features(student):
+    """Parsed ATS features of the student's resume, extracting (and backfilling) them on a miss"""
+    doc = current_resume_document(student)
+    if doc:
+        return doc.features, None
+    text, error = fetch_resume_text(student)
+    if error:
+        return None, error
+    return store_resume_document(student, text).features, None
+
 def parse_resume_data(text):
     """Extract structured data from resume text"""
     data = {}
@@ -275,17 +369,13 @@ def parse_resume_data(text):
     return data
 
 @resume_bp.route('/api/student/upload-resume', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def upload_resume():
     """Upload and parse resume"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user_id = get_user_id()
         
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         if 'resume' not in request.files:
             return jsonify({'error': 'No resume file provided'}), 400
@@ -304,53 +394,102 @@ def upload_resume():
         
         filename = secure_filename(f"resume_{student.id}_{file.filename}")
         parsed_data = {}
+        text = ''
         if filename.lower().endswith('.pdf'):
             text = extract_text_from_pdf_bytes(file_bytes)
             print(f"Extracted text length: {len(text)}")
             parsed_data = parse_resume_data(text)
             print(f"Parsed data: {parsed_data}")
         
-        storage = 'local'
-        resume_url = None
-        if drive_configured():
-            drive_file = upload_file_to_drive(file_bytes, filename, file.mimetype)
-            if drive_file:
-                resume_url = drive_file.get('webViewLink') or drive_file.get('webContentLink')
-                storage = 'drive'
+        # The previous Drive copy is no longer the student's resume
+        RESUME_CACHE.invalidate(extract_drive_file_id(student.resume_url))
         
-        if not resume_url:
-            filepath = UPLOAD_FOLDER / filename
-            filepath.write_bytes(file_bytes)
-            resume_url = f"/uploads/resumes/{filename}"
-            storage = 'local'
+        # Saved locally first; a background job moves it to Drive when configured
+        filepath = UPLOAD_FOLDER / filename
+        filepath.write_bytes(file_bytes)
+        resume_url = f"/uploads/resumes/{filename}"
         
         # Update student record
         student.resume_url = resume_url
+        
+        # Store text/features once and rescore against the student's jobs
+        if text.strip():
+            doc = store_resume_document(student, text)
+            refresh_student_scores(student, doc.features)
+        else:
+            if student.resume_document:
+                db.session.delete(student.resume_document)
+            clear_student_scores(student)
         db.session.commit()
         
+        if drive_configured():
+            job = submit_job('drive_upload', {
+                'student_id': student.id,
+                'filename': filename,
+                'mime_type': file.mimetype,
+                'local_url': resume_url
+            }, user_id=user_id)
+            return job_accepted(
+                job,
+                message='Resume uploaded successfully; moving to Google Drive',
+                resume_url=resume_url,
+                parsed_data=parsed_data,
+                storage='local'
+            )
+        
         return jsonify({
             'message': 'Resume uploaded successfully',
             'resume_url': student.resume_url,
             'parsed_data': parsed_data,
-            'storage': storage
+            'storage': 'local'
         }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+
+@job_handler('drive_upload', concurrency=DRIVE_JOB_CONCURRENCY, timeout=120, max_attempts=5)
+def run_drive_upload_job(payload):
+    """Move a locally saved resume to Google Drive and point the student at it"""
+    student = Student.query.get(payload['student_id'])
+    if not student or student.resume_url != payload['local_url']:
+        return {'skipped': True, 'reason': 'Resume was replaced or deleted before upload'}
+    
+    filepath = UPLOAD_FOLDER / payload['filename']
+    if not filepath.exists():
+        raise PermanentJobError('Local resume file is missing')
+    file_bytes = filepath.read_bytes()
+    
+    drive_file = upload_file_to_drive(file_bytes, payload['filename'], payload['mime_type'])
+    if not drive_file:
+        raise JobError('Google Drive upload failed')
+    resume_url = drive_file.get('webViewLink') or drive_file.get('webContentLink')
+    
+    db.session.refresh(student)
+    if student.resume_url != payload['local_url']:
+        # Replaced while uploading; the Drive copy is orphaned
+        delete_drive_file(drive_file['id'])
+        return {'skipped': True, 'reason': 'Resume was replaced or deleted during upload'}
+    
+    student.resume_url = resume_url
+    if student.resume_document:
+        student.resume_document.resume_url = resume_url
+    ResumeScore.query.filter_by(student_id=student.id, resume_url=payload['local_url']).update(
+        {'resume_url': resume_url}, synchronize_session=False
+    )
+    db.session.commit()
+    RESUME_CACHE.put(drive_file['id'], file_bytes)
+    filepath.unlink()
+    
+    return {'resume_url': resume_url, 'storage': 'drive'}
+
 @resume_bp.route('/api/student/parse-resume', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def parse_resume_endpoint():
     """Parse an already uploaded resume"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         if not student.resume_url:
             return jsonify({'error': 'No resume uploaded yet'}), 400
@@ -359,6 +498,7 @@ def parse_resume_endpoint():
         if error:
             status = 404 if 'not found' in error.lower() else 400
             return jsonify({'error': error}), status
+        db.session.commit()  # Keeps a backfilled resume document
         
         parsed_data = parse_resume_data(resume_text) if resume_text else {}
         return jsonify({'parsed_data': parsed_data}), 200
@@ -367,17 +507,11 @@ def parse_resume_endpoint():
         return jsonify({'error': str(e)}), 500
 
 @resume_bp.route('/api/student/delete-resume', methods=['DELETE'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def delete_resume():
     """Delete uploaded resume"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student = current_student()
         
         if not student.resume_url:
             return jsonify({'error': 'No resume to delete'}), 400
@@ -398,6 +532,10 @@ def delete_resume():
         student.ats_score = None
         student.ats_feedback = None
         student.ats_calculated_at = None
+        
+        if student.resume_document:
+            db.session.delete(student.resume_document)
+        clear_student_scores(student)
         db.session.commit()
         
         return jsonify({
@@ -410,18 +548,31 @@ def delete_resume():
         return jsonify({'error': str(e)}), 500
 
 
-def calculate_ats_with_gemini(resume_text):
-    """Calculate ATS score using Gemini API"""
+def gemini_config_error():
+    """Why Gemini cannot be called, or None if it is usable"""
     if not GEMINI_AVAILABLE:
-        return None, "Gemini API not available"
-    
+        return "Gemini API not available"
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key or api_key == 'YOUR_GEMINI_API_KEY_HERE':
-        return None, "Gemini API key not configured"
+        return "Gemini API key not configured"
+    return None
+
+
+def calculate_ats_with_gemini(resume_text):
+    """Calculate ATS score using Gemini API"""
+    config_error = gemini_config_error()
+    if config_error:
+        return None, config_error
+    api_key = os.getenv('GEMINI_API_KEY')
     
     try:
-        genai.configure(api_key=api_key)
         model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+        key = llm_cache.cache_key(model_name, ATS_PROMPT_VERSION, resume_text[:5000])
+        cached = llm_cache.get('ats_resume', key)
+        if cached:
+            return cached['score'], json.dumps(cached['feedback'])
+        
+        genai.configure(api_key=api_key)
         model = genai.GenerativeModel(model_name)
         
         prompt = f'''You are an expert ATS (Applicant Tracking System) analyzer. Analyze this resume and provide realistic feedback.
@@ -466,6 +617,7 @@ Respond in JSON format ONLY (no markdown, no code blocks):
             'overall': result.get('overall', '')
         }
         
+        llm_cache.put('ats_resume', key, model_name, ATS_PROMPT_VERSION, {'score': score, 'feedback': feedback})
         return score, json.dumps(feedback)
         
     except Exception as e:
@@ -475,20 +627,19 @@ Respond in JSON format ONLY (no markdown, no code blocks):
 
 def calculate_ats_with_jd(resume_text, jd_text):
     """Calculate ATS score by comparing resume against a specific Job Description"""
-    if not GEMINI_AVAILABLE:
-        return None, "Gemini API not available"
-    
-    # Force reload .env
-    env_path = Path(__file__).parent / '.env'
-    load_dotenv(dotenv_path=env_path, override=True)
-    
+    config_error = gemini_config_error()
+    if config_error:
+        return None, config_error
     api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key or api_key == 'YOUR_GEMINI_API_KEY_HERE':
-        return None, "Gemini API key not configured"
     
     try:
-        genai.configure(api_key=api_key)
         model_name = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+        key = llm_cache.cache_key(model_name, ATS_JD_PROMPT_VERSION, resume_text[:4000], jd_text[:3000])
+        cached = llm_cache.get('ats_jd', key)
+        if cached:
+            return cached['score'], json.dumps(cached['feedback'])
+        
+        genai.configure(api_key=api_key)
         model = genai.GenerativeModel(model_name)
         
         prompt = f'''You are an expert ATS analyzer comparing a resume against a job description.
@@ -539,6 +690,7 @@ Respond in JSON format ONLY (no markdown, no code blocks):
             'overall': result.get('overall', '')
         }
         
+        llm_cache.put('ats_jd', key, model_name, ATS_JD_PROMPT_VERSION, {'score': score, 'feedback': feedback})
         return score, json.dumps(feedback)
         
     except Exception as e:
@@ -546,55 +698,88 @@ Respond in JSON format ONLY (no markdown, no code blocks):
         return None, str(e)
 
 
-@resume_bp.route('/api/student/calculate-ats', methods=['POST'])
-@jwt_required()
-def calculate_ats_score():
-    """Calculate ATS score for uploaded resume using Gemini API"""
-    try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
-        
-        if not student.resume_url:
-            return jsonify({'error': 'No resume uploaded yet'}), 400
-        
+@job_handler('gemini_ats', concurrency=GEMINI_JOB_CONCURRENCY, timeout=90, max_attempts=3)
+def run_gemini_ats_job(payload):
+    """
+    Gemini ATS analysis, run by the background job queue
+    
+    payload: student_id; resume_text for an uploaded file (profile resume
+    otherwise); jd_text for a JD comparison; save to store the score on the
+    student's profile
+    """
+    student = Student.query.get(payload['student_id'])
+    if not student:
+        raise PermanentJobError('Student not found')
+    jd_text = payload.get('jd_text')
+    
+    config_error = gemini_config_error()
+    if config_error:
+        return {
+            'error': f'ATS calculation failed: {config_error}',
+            'fallback_score': 50,
+            'fallback_feedback': {
+                'overall': 'ATS score could not be calculated. Please check if your Gemini API key is configured correctly.',
+                'strengths': [],
+                'improvements': ['Unable to analyze - API configuration issue'],
+                'missing_keywords': [],
+                'matching_keywords': [] if jd_text else None,
+                'formatting_tips': []
+            }
+        }
+    
+    resume_text = payload.get('resume_text')
+    if resume_text is None:
         resume_text, error = get_resume_text(student)
         if error:
-            status = 404 if 'not found' in error.lower() else 400
-            return jsonify({'error': error}), status
-        
-        # Calculate ATS score using Gemini
+            raise PermanentJobError(error)
+        db.session.commit()  # Keeps a backfilled resume document
+    
+    if jd_text:
+        score, feedback = calculate_ats_with_jd(resume_text, jd_text)
+    else:
         score, feedback = calculate_ats_with_gemini(resume_text)
-        
-        if score is None:
-            return jsonify({
-                'error': f'ATS calculation failed: {feedback}',
-                'fallback_score': 50,
-                'fallback_feedback': json.dumps({
-                    'overall': 'ATS score could not be calculated. Please check if your Gemini API key is configured correctly.',
-                    'strengths': [],
-                    'improvements': ['Unable to analyze - API configuration issue'],
-                    'missing_keywords': [],
-                    'formatting_tips': []
-                })
-            }), 200
-        
-        # Save to database
+    db.session.commit()  # Keeps the LLM cache entry or hit count
+    if score is None:
+        raise JobError(f'ATS calculation failed: {feedback}')
+    
+    if jd_text:
+        return {
+            'success': True,
+            'ats_score': score,
+            'ats_feedback': json.loads(feedback),
+            'analysis_type': 'jd_comparison',
+            'calculated_at': datetime.utcnow().isoformat()
+        }
+    
+    # Save to database
+    if payload.get('save', True):
         student.ats_score = score
         student.ats_feedback = feedback
         student.ats_calculated_at = datetime.utcnow()
         db.session.commit()
+    
+    return {
+        'success': True,
+        'ats_score': score,
+        'ats_feedback': json.loads(feedback),
+        'calculated_at': datetime.utcnow().isoformat()
+    }
+
+
+@resume_bp.route('/api/student/calculate-ats', methods=['POST'])
+@roles_required(ROLE_STUDENT)
+def calculate_ats_score():
+    """Queue a Gemini ATS score for the profile resume (202; poll the job status URL)"""
+    try:
+        user_id = get_user_id()
         
-        return jsonify({
-            'success': True,
-            'ats_score': score,
-            'ats_feedback': json.loads(feedback),
-            'calculated_at': student.ats_calculated_at.isoformat()
-        }), 200
+        student = current_student()
+        
+        if not student.resume_url:
+            return jsonify({'error': 'No resume uploaded yet'}), 400
+        
+        job = submit_job('gemini_ats', {'student_id': student.id, 'save': True}, user_id=user_id)
+        return job_accepted(job)
         
     except Exception as e:
         db.session.rollback()
@@ -602,17 +787,13 @@ def calculate_ats_score():
 
 
 @resume_bp.route('/api/student/analyze-resume-upload', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def analyze_resume_upload():
     """Upload a resume file directly for ATS analysis (separate from profile resume)"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user_id = get_user_id()
         
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        student = user.student
+        student_id = get_student_id()
         
         if 'resume' not in request.files:
             return jsonify({'error': 'No resume file provided'}), 400
@@ -639,34 +820,9 @@ def analyze_resume_upload():
         
         print(f"Extracted {len(resume_text)} characters from resume")
         
-        # Calculate ATS score using Gemini
-        score, feedback = calculate_ats_with_gemini(resume_text)
-        
-        if score is None:
-            return jsonify({
-                'error': f'ATS calculation failed: {feedback}',
-                'fallback_score': 50,
-                'fallback_feedback': {
-                    'overall': 'ATS score could not be calculated. Please check if your Gemini API key is configured correctly.',
-                    'strengths': [],
-                    'improvements': ['Unable to analyze - API configuration issue'],
-                    'missing_keywords': [],
-                    'formatting_tips': []
-                }
-            }), 200
-        
-        # Save to database
-        student.ats_score = score
-        student.ats_feedback = feedback
-        student.ats_calculated_at = datetime.utcnow()
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'ats_score': score,
-            'ats_feedback': json.loads(feedback),
-            'calculated_at': student.ats_calculated_at.isoformat()
-        }), 200
+        # Gemini scoring runs in the background job queue
+        job = submit_job('gemini_ats', {'student_id': student_id, 'resume_text': resume_text, 'save': True}, user_id=user_id)
+        return job_accepted(job)
         
     except Exception as e:
         db.session.rollback()
@@ -675,20 +831,16 @@ def analyze_resume_upload():
 
 
 @resume_bp.route('/api/student/analyze-with-jd', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def analyze_resume_with_jd():
     """Analyze resume against a specific Job Description for targeted ATS scoring"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized'}), 403
+        user_id = get_user_id()
         
-        student = user.student
+        student = current_student()
         
-        # Get resume - either from upload or from profile
-        resume_text = ""
+        # Get resume - either from upload or from profile (read by the job)
+        resume_text = None
         
         if 'resume' in request.files and request.files['resume'].filename:
             # Resume uploaded directly
@@ -696,23 +848,18 @@ def analyze_resume_with_jd():
             if not file.filename.lower().endswith('.pdf'):
                 return jsonify({'error': 'Only PDF files are supported'}), 400
             
+            resume_text = ""
             try:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page in pdf_reader.pages:
                     resume_text += page.extract_text() or ''
             except Exception as e:
                 return jsonify({'error': f'Could not read PDF file: {str(e)}'}), 400
-        else:
-            # Use profile resume
-            if not student.resume_url:
-                return jsonify({'error': 'Please upload a resume or add one to your profile'}), 400
-            resume_text, error = get_resume_text(student)
-            if error:
-                status = 404 if 'not found' in error.lower() else 400
-                return jsonify({'error': error}), status
-        
-        if not resume_text.strip():
-            return jsonify({'error': 'Could not extract text from resume'}), 400
+            
+            if not resume_text.strip():
+                return jsonify({'error': 'Could not extract text from resume'}), 400
+        elif not student.resume_url:
+            return jsonify({'error': 'Please upload a resume or add one to your profile'}), 400
         
         # Get Job Description - either from file or text
         jd_text = ""
@@ -739,34 +886,16 @@ def analyze_resume_with_jd():
         if not jd_text.strip():
             return jsonify({'error': 'Could not extract text from Job Description'}), 400
         
-        print(f"Resume: {len(resume_text)} chars, JD: {len(jd_text)} chars")
-        
-        # Calculate ATS score with JD comparison
-        score, feedback = calculate_ats_with_jd(resume_text, jd_text)
-        
-        if score is None:
-            return jsonify({
-                'error': f'ATS calculation failed: {feedback}',
-                'fallback_score': 50,
-                'fallback_feedback': {
-                    'overall': 'Analysis could not be completed. Please check API configuration.',
-                    'strengths': [],
-                    'improvements': [],
-                    'missing_keywords': [],
-                    'matching_keywords': [],
-                    'formatting_tips': []
-                }
-            }), 200
-        
-        return jsonify({
-            'success': True,
-            'ats_score': score,
-            'ats_feedback': json.loads(feedback),
-            'analysis_type': 'jd_comparison',
-            'calculated_at': datetime.utcnow().isoformat()
-        }), 200
+        # Gemini JD comparison runs in the background job queue
+        job = submit_job('gemini_ats', {
+            'student_id': student.id,
+            'resume_text': resume_text,
+            'jd_text': jd_text
+        }, user_id=user_id)
+        return job_accepted(job, analysis_type='jd_comparison')
         
     except Exception as e:
+        db.session.rollback()
         print(f"Error in analyze_resume_with_jd: {e}")
         return jsonify({'error': str(e)}), 500
 
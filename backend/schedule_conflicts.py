@@ -0,0 +1,251 @@
+"""
+Scheduling conflict detection for company visits, hiring rounds and interview slots
+
+Every scheduled item becomes a ScheduleEvent with a time window (or the whole
+day when it has no time). Overlaps are found with a sweep over events sorted
+by start: each event is compared only with the events still open when it
+starts, so the cost is O(n log n + conflicts) rather than every pair.
+
+- Campus conflicts: events of different companies whose windows overlap
+- Student conflicts: a student's booked interview slots and scheduled or
+  invited rounds that overlap across different companies
+
+Severity follows the original visit check: Critical when two starts are less
+than CRITICAL_GAP apart, Warning for other overlaps and for untimed events
+on the same day.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from models import (db, CompanyVisit, Company, HiringRound, Job, InterviewSlot, InterviewBooking,
+                    RoundCandidateProgress, ApplicationRound, Application, Student)
+
+VISIT_WINDOW = timedelta(hours=2)
+ROUND_DEFAULT_WINDOW = timedelta(hours=2)
+SLOT_WINDOW = timedelta(minutes=int(os.getenv('INTERVIEW_SLOT_MINUTES', '60')))
+CRITICAL_GAP = timedelta(hours=1)
+
+VISIT_STATUSES = ('Scheduled', 'Ongoing')
+ROUND_STATUSES = ('Draft', 'Active')
+SLOT_STATUSES = ('Available', 'Full')
+BOOKING_STATUSES = ('Confirmed', 'Rescheduled')
+INVITED_PROGRESS_STATUSES = ('Invited', 'In Progress')
+SCHEDULED_ROUND_STATUSES = ('Scheduled',)
+
+
+class ScheduleEvent:
+    """A visit, round or slot on a day, with a [start, end) window when it has a time"""
+    __slots__ = ('kind', 'id', 'company_id', 'company_name', 'label', 'day', 'start', 'end')
+
+    def __init__(self, kind, event_id, company_id, company_name, label, day, time=None, window=None):
+        self.kind = kind
+        self.id = event_id
+        self.company_id = company_id
+        self.company_name = company_name
+        self.label = label
+        self.day = day
+        self.start = datetime.combine(day, time) if time else None
+        self.end = self.start + window if time else None
+
+    def to_dict(self):
+        return {
+            'type': self.kind,
+            'id': self.id,
+            'company_id': self.company_id,
+            'company': self.company_name,
+            'label': self.label,
+            'date': self.day.isoformat(),
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None
+        }
+
+
+def _in_range(query, column, start_date, end_date):
+    if start_date:
+        query = query.filter(column >= start_date)
+    if end_date:
+        query = query.filter(column <= end_date)
+    return query
+
+
+def visit_events(start_date=None, end_date=None):
+    rows = _in_range(db.session.query(
+        CompanyVisit.id, CompanyVisit.company_id, Company.company_name, CompanyVisit.recruitment_type,
+        CompanyVisit.visit_date, CompanyVisit.visit_time
+    ).outerjoin(Company, CompanyVisit.company_id == Company.id).filter(
+        CompanyVisit.status.in_(VISIT_STATUSES)
+    ), CompanyVisit.visit_date, start_date, end_date)
+    return [
+        ScheduleEvent('visit', row.id, row.company_id, row.company_name, row.recruitment_type,
+                      row.visit_date, row.visit_time, VISIT_WINDOW)
+        for row in rows
+    ]
+
+
+def _round_window(duration_minutes):
+    return timedelta(minutes=duration_minutes) if duration_minutes else ROUND_DEFAULT_WINDOW
+
+
+def round_events(start_date=None, end_date=None):
+    rows = _in_range(db.session.query(
+        HiringRound.id, Job.company_id, Company.company_name, HiringRound.round_name, Job.title,
+        HiringRound.scheduled_date, HiringRound.scheduled_time, HiringRound.duration_minutes
+    ).join(Job, HiringRound.job_id == Job.id).outerjoin(Company, Job.company_id == Company.id).filter(
+        HiringRound.scheduled_date.isnot(None),
+        HiringRound.status.in_(ROUND_STATUSES)
+    ), HiringRound.scheduled_date, start_date, end_date)
+    return [
+        ScheduleEvent('round', row.id, row.company_id, row.company_name, f'{row.title}: {row.round_name}',
+                      row.scheduled_date, row.scheduled_time, _round_window(row.duration_minutes))
+        for row in rows
+    ]
+
+
+def slot_events(start_date=None, end_date=None):
+    rows = _in_range(db.session.query(
+        InterviewSlot.id, InterviewSlot.company_id, Company.company_name, InterviewSlot.interviewer_name,
+        InterviewSlot.slot_date, InterviewSlot.slot_time
+    ).outerjoin(Company, InterviewSlot.company_id == Company.id).filter(
+        InterviewSlot.status.in_(SLOT_STATUSES)
+    ), InterviewSlot.slot_date, start_date, end_date)
+    return [
+        ScheduleEvent('slot', row.id, row.company_id, row.company_name,
+                      f'Interview with {row.interviewer_name}' if row.interviewer_name else 'Interview',
+                      row.slot_date, row.slot_time, SLOT_WINDOW)
+        for row in rows
+    ]
+
+
+def student_commitments(start_date=None, end_date=None):
+    """student_id -> events they are booked or invited to, from three joined queries"""
+    commitments = {}
+
+    bookings = _in_range(db.session.query(
+        InterviewBooking.student_id, InterviewSlot.id, InterviewSlot.company_id, Company.company_name,
+        InterviewSlot.interviewer_name, InterviewSlot.slot_date, InterviewSlot.slot_time
+    ).join(InterviewSlot, InterviewBooking.interview_slot_id == InterviewSlot.id).outerjoin(
+        Company, InterviewSlot.company_id == Company.id
+    ).filter(
+        InterviewBooking.status.in_(BOOKING_STATUSES),
+        InterviewSlot.status.in_(SLOT_STATUSES)
+    ), InterviewSlot.slot_date, start_date, end_date)
+    for row in bookings:
+        commitments.setdefault(row.student_id, []).append(ScheduleEvent(
+            'slot', row.id, row.company_id, row.company_name,
+            f'Interview with {row.interviewer_name}' if row.interviewer_name else 'Interview',
+            row.slot_date, row.slot_time, SLOT_WINDOW
+        ))
+
+    round_columns = (
+        HiringRound.id, Job.company_id, Company.company_name, HiringRound.round_name, Job.title,
+        HiringRound.scheduled_date, HiringRound.scheduled_time, HiringRound.duration_minutes
+    )
+    invited = db.session.query(RoundCandidateProgress.student_id.label('student_id'), *round_columns).join(
+        HiringRound, RoundCandidateProgress.round_id == HiringRound.id
+    ).filter(RoundCandidateProgress.status.in_(INVITED_PROGRESS_STATUSES))
+    scheduled = db.session.query(Application.student_id.label('student_id'), *round_columns).select_from(
+        ApplicationRound
+    ).join(Application, ApplicationRound.application_id == Application.id).join(
+        HiringRound, ApplicationRound.hiring_round_id == HiringRound.id
+    ).filter(ApplicationRound.status.in_(SCHEDULED_ROUND_STATUSES))
+
+    for query in (invited, scheduled):
+        query = _in_range(query.join(Job, HiringRound.job_id == Job.id).outerjoin(
+            Company, Job.company_id == Company.id
+        ).filter(
+            HiringRound.scheduled_date.isnot(None),
+            HiringRound.status.in_(ROUND_STATUSES)
+        ), HiringRound.scheduled_date, start_date, end_date)
+        for row in query:
+            events = commitments.setdefault(row.student_id, [])
+            # The same round can come from both progress tables
+            if any(e.kind == 'round' and e.id == row.id for e in events):
+                continue
+            events.append(ScheduleEvent(
+                'round', row.id, row.company_id, row.company_name, f'{row.title}: {row.round_name}',
+                row.scheduled_date, row.scheduled_time, _round_window(row.duration_minutes)
+            ))
+    return commitments
+
+
+def overlapping_pairs(events):
+    """
+    (a, b) pairs of events of different companies that overlap
+
+    Timed events are swept in start order against the windows still open;
+    an untimed event blocks its whole day, so it pairs with every other
+    event starting that day.
+    """
+    timed = sorted((e for e in events if e.start), key=lambda e: (e.start, e.kind, e.id))
+    untimed = {}
+    for event in events:
+        if not event.start:
+            untimed.setdefault(event.day, []).append(event)
+
+    pairs = []
+    active = []
+    for event in timed:
+        active = [open_event for open_event in active if open_event.end > event.start]
+        pairs.extend((open_event, event) for open_event in active if open_event.company_id != event.company_id)
+        active.append(event)
+
+    if untimed:
+        timed_by_day = {}
+        for event in timed:
+            timed_by_day.setdefault(event.day, []).append(event)
+        for day, day_events in untimed.items():
+            for i, event in enumerate(day_events):
+                others = day_events[i + 1:] + timed_by_day.get(day, [])
+                pairs.extend((event, other) for other in others if other.company_id != event.company_id)
+    return pairs
+
+
+def severity(a, b):
+    if a.start and b.start and abs(a.start - b.start) < CRITICAL_GAP:
+        return 'Critical'
+    return 'Warning'
+
+
+def find_conflicts(start_date=None, end_date=None, include_students=True):
+    """
+    {'conflicts': [...], 'student_conflicts': [...]} between start_date and end_date (inclusive, optional)
+
+    Campus conflicts keep the original company1/company2/scheduled_date/
+    severity keys and add both events.
+    """
+    events = visit_events(start_date, end_date) + round_events(start_date, end_date) + slot_events(start_date, end_date)
+    conflicts = [{
+        'company1': a.company_name,
+        'company2': b.company_name,
+        'scheduled_date': a.day.isoformat(),
+        'severity': severity(a, b),
+        'type': f'{a.kind}-{b.kind}',
+        'event1': a.to_dict(),
+        'event2': b.to_dict()
+    } for a, b in overlapping_pairs(events)]
+
+    student_conflicts = []
+    if include_students:
+        for student_id, student_events in student_commitments(start_date, end_date).items():
+            if len(student_events) < 2:
+                continue
+            for a, b in overlapping_pairs(student_events):
+                student_conflicts.append({
+                    'student_id': student_id,
+                    'scheduled_date': a.day.isoformat(),
+                    'severity': severity(a, b),
+                    'event1': a.to_dict(),
+                    'event2': b.to_dict()
+                })
+        if student_conflicts:
+            ids = {c['student_id'] for c in student_conflicts}
+            names = dict(db.session.query(Student.id, Student.full_name).filter(Student.id.in_(ids)))
+            for conflict in student_conflicts:
+                conflict['student_name'] = names.get(conflict['student_id'])
+
+    order = lambda c: (c['scheduled_date'], c['severity'] != 'Critical')
+    return {
+        'conflicts': sorted(conflicts, key=order),
+        'student_conflicts': sorted(student_conflicts, key=order)
+    }
@@ -4,40 +4,23 @@ Purpose: Admin endpoints for managing placement sessions and academic batches
 """
 
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, PlacementSession, Batch, BatchSessionMapping, Student, Job, Application
+from flask_jwt_extended import jwt_required
+from models import db, PlacementSession, Batch, BatchSessionMapping, Student, Job, Application
 from datetime import datetime, date
 from sqlalchemy import func, or_, and_
+from auth import roles_required, get_user_id, current_student, ROLE_STUDENT, ROLE_COMPANY, ROLE_ADMIN
+from eligibility import refresh_batch_session_eligibility
 
 session_bp = Blueprint('session', __name__, url_prefix='/api')
 
 
-def get_user_id():
-    """Get user ID from JWT identity"""
-    identity = get_jwt_identity()
-    return int(identity) if isinstance(identity, str) else identity
-
-
-def require_admin():
-    """Check if current user is admin"""
-    user_id = get_user_id()
-    user = User.query.get(user_id)
-    if not user or user.role_id != 3:
-        return None
-    return user
-
-
 # ==================== PLACEMENT SESSION ENDPOINTS ====================
 
 @session_bp.route('/admin/sessions', methods=['GET', 'POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def manage_sessions():
     """Get all sessions or create new session (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         if request.method == 'GET':
             # Get all sessions with statistics
             sessions = PlacementSession.query.order_by(PlacementSession.start_year.desc()).all()
@@ -77,7 +60,7 @@ def manage_sessions():
             start_date=start_date,
             end_date=end_date,
             status=data.get('status', 'Upcoming'),
-            created_by=admin.id
+            created_by=get_user_id()
         )
         
         db.session.add(session)
@@ -94,14 +77,10 @@ def manage_sessions():
 
 
 @session_bp.route('/admin/sessions/<int:session_id>', methods=['GET', 'PUT', 'DELETE'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def session_detail(session_id):
     """Get, update, or delete a specific session (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         session = PlacementSession.query.get(session_id)
         if not session:
             return jsonify({'error': 'Session not found'}), 404
@@ -178,14 +157,10 @@ def session_detail(session_id):
 
 
 @session_bp.route('/admin/sessions/<int:session_id>/set-active', methods=['PUT'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def set_active_session(session_id):
     """Set a session as the active session (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         session = PlacementSession.query.get(session_id)
         if not session:
             return jsonify({'error': 'Session not found'}), 404
@@ -234,14 +209,10 @@ def get_active_session():
 # ==================== BATCH ENDPOINTS ====================
 
 @session_bp.route('/admin/batches', methods=['GET', 'POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def manage_batches():
     """Get all batches or create new batch (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         if request.method == 'GET':
             batches = Batch.query.order_by(Batch.end_year.desc()).all()
             
@@ -292,14 +263,10 @@ def manage_batches():
 
 
 @session_bp.route('/admin/batches/<int:batch_id>', methods=['GET', 'PUT', 'DELETE'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def batch_detail(batch_id):
     """Get, update, or delete a specific batch (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         batch = Batch.query.get(batch_id)
         if not batch:
             return jsonify({'error': 'Batch not found'}), 404
@@ -368,14 +335,10 @@ def batch_detail(batch_id):
 # ==================== BATCH-SESSION MAPPING ENDPOINTS ====================
 
 @session_bp.route('/admin/sessions/<int:session_id>/batches', methods=['POST'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def map_batch_to_session(session_id):
     """Map a batch to a session (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         session = PlacementSession.query.get(session_id)
         if not session:
             return jsonify({'error': 'Session not found'}), 404
@@ -407,6 +370,7 @@ def map_batch_to_session(session_id):
         )
         
         db.session.add(mapping)
+        refresh_batch_session_eligibility(batch_id, session_id)
         db.session.commit()
         
         return jsonify({
@@ -420,14 +384,10 @@ def map_batch_to_session(session_id):
 
 
 @session_bp.route('/admin/sessions/<int:session_id>/batches/<int:batch_id>', methods=['PUT', 'DELETE'])
-@jwt_required()
+@roles_required(ROLE_ADMIN)
 def manage_batch_session_mapping(session_id, batch_id):
     """Update or remove batch-session mapping (Admin only)"""
     try:
-        admin = require_admin()
-        if not admin:
-            return jsonify({'error': 'Unauthorized - Admin access required'}), 403
-        
         mapping = BatchSessionMapping.query.filter_by(
             batch_id=batch_id,
             session_id=session_id
@@ -441,6 +401,7 @@ def manage_batch_session_mapping(session_id, batch_id):
             
             if 'is_eligible' in data:
                 mapping.is_eligible = bool(data['is_eligible'])
+                refresh_batch_session_eligibility(batch_id, session_id)
             
             db.session.commit()
             return jsonify({
@@ -450,6 +411,7 @@ def manage_batch_session_mapping(session_id, batch_id):
         
         elif request.method == 'DELETE':
             db.session.delete(mapping)
+            refresh_batch_session_eligibility(batch_id, session_id)
             db.session.commit()
             return jsonify({'message': 'Mapping removed successfully'}), 200
         
@@ -461,17 +423,11 @@ def manage_batch_session_mapping(session_id, batch_id):
 # ==================== STUDENT BATCH INFO ====================
 
 @session_bp.route('/student/batch-info', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_STUDENT)
 def get_student_batch_info():
     """Get current student's batch and eligible sessions"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 1:
-            return jsonify({'error': 'Unauthorized - Student access only'}), 403
-        
-        student = user.student
+        student = current_student()
         if not student:
             return jsonify({'error': 'Student profile not found'}), 404
         
@@ -504,16 +460,10 @@ def get_student_batch_info():
 # ==================== COMPANY SESSION CONTEXT ====================
 
 @session_bp.route('/company/sessions', methods=['GET'])
-@jwt_required()
+@roles_required(ROLE_COMPANY)
 def get_company_sessions():
     """Get active and upcoming sessions for company job posting"""
     try:
-        user_id = get_user_id()
-        user = User.query.get(user_id)
-        
-        if user.role_id != 2:
-            return jsonify({'error': 'Unauthorized - Company access only'}), 403
-        
         sessions = PlacementSession.query.filter(
             PlacementSession.status.in_(['Active', 'Upcoming'])
         ).order_by(PlacementSession.start_year.desc()).all()
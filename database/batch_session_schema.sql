@@ -69,7 +69,8 @@ ADD INDEX idx_batch (batch_id);
 ALTER TABLE jobs 
 ADD COLUMN session_id INT NULL AFTER application_deadline,
 ADD FOREIGN KEY (session_id) REFERENCES placement_sessions(id) ON DELETE SET NULL,
-ADD INDEX idx_session (session_id);
+ADD INDEX idx_session (session_id),
+ADD INDEX idx_job_feed (session_id, status, application_deadline, id);
 
 -- Add session_id to applications table (for audit and filtering)
 ALTER TABLE applications 
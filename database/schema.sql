@@ -6,6 +6,7 @@ USE placement_portal;
 
 -- Drop tables if they exist (for clean setup)
 DROP TABLE IF EXISTS applications;
+DROP TABLE IF EXISTS job_eligible_branches;
 DROP TABLE IF EXISTS jobs;
 DROP TABLE IF EXISTS announcements;
 DROP TABLE IF EXISTS companies;
@@ -32,18 +33,23 @@ CREATE TABLE students (
     full_name VARCHAR(255) NOT NULL,
     enrollment_number VARCHAR(50) UNIQUE NOT NULL,
     branch VARCHAR(100) NOT NULL,
+    branch_code VARCHAR(20) COMMENT 'Canonical code (Department.code or alias group)',
     cgpa DECIMAL(3,2) NOT NULL,
     tenth_percentage DECIMAL(5,2),
     twelfth_percentage DECIMAL(5,2),
     graduation_year INT NOT NULL,
     phone VARCHAR(15),
     resume_url VARCHAR(500),
+    resume_hash CHAR(64),
     skills TEXT,
     profile_completed BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_cgpa (cgpa),
-    INDEX idx_branch (branch)
+    INDEX idx_branch (branch),
+    INDEX idx_branch_code (branch_code),
+    INDEX idx_student_cgpa (cgpa, id),
+    INDEX idx_student_name (full_name, id)
 );
 
 -- Companies Table (Recruiter Profile)
@@ -86,6 +92,15 @@ CREATE TABLE jobs (
     INDEX idx_company (company_id)
 );
 
+-- Canonical branch codes each job is open to (no rows: all branches)
+CREATE TABLE job_eligible_branches (
+    job_id INT NOT NULL,
+    branch_code VARCHAR(20) NOT NULL,
+    PRIMARY KEY (job_id, branch_code),
+    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+    INDEX idx_branch_job (branch_code, job_id)
+);
+
 -- Applications Table (Pivot Table)
 CREATE TABLE applications (
     id INT PRIMARY KEY AUTO_INCREMENT,
@@ -100,7 +115,9 @@ CREATE TABLE applications (
     UNIQUE KEY unique_application (student_id, job_id),
     INDEX idx_status (status),
     INDEX idx_student (student_id),
-    INDEX idx_job (job_id)
+    INDEX idx_job (job_id),
+    INDEX idx_job_status_applied (job_id, status, applied_at),
+    INDEX idx_job_applied (job_id, applied_at)
 );
 
 -- Announcements Table (Admin Broadcasts)
@@ -7,6 +7,7 @@ DROP VIEW IF EXISTS branch_placement;
 DROP TABLE IF EXISTS interview_experiences;
 DROP TABLE IF EXISTS notifications;
 DROP TABLE IF EXISTS resume_scores;
+DROP TABLE IF EXISTS resume_documents;
 DROP TABLE IF EXISTS student_skill_assessments;
 DROP TABLE IF EXISTS company_visits;
 
@@ -86,6 +87,8 @@ CREATE TABLE resume_scores (
     student_id INT NOT NULL,
     job_id INT NOT NULL,
     resume_url VARCHAR(500),
+    resume_hash CHAR(64) NOT NULL COMMENT 'sha256 of the scored resume text',
+    jd_hash CHAR(64) NOT NULL COMMENT 'sha256 of the scored JD text',
     overall_match_percentage INT COMMENT '0-100 score',
     skills_match_percentage INT,
     experience_match_percentage INT,
@@ -93,15 +96,33 @@ CREATE TABLE resume_scores (
     missing_keywords TEXT COMMENT 'JSON array of missing keywords',
     matched_keywords TEXT COMMENT 'JSON array of matched keywords',
     improvement_suggestions TEXT COMMENT 'JSON array of suggestions',
+    level VARCHAR(50),
+    summary TEXT,
+    report JSON COMMENT 'Full ATS report',
+    heatmap_data JSON,
     assessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
     FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
     UNIQUE KEY unique_resume_job (student_id, job_id),
     INDEX idx_match_score (overall_match_percentage),
+    INDEX idx_job_score (job_id, overall_match_percentage),
     INDEX idx_student (student_id),
     INDEX idx_job (job_id)
 );
 
+-- Resume text and parsed ATS features, extracted once at upload
+CREATE TABLE resume_documents (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    student_id INT NOT NULL UNIQUE,
+    resume_url VARCHAR(500),
+    content_hash CHAR(64) NOT NULL COMMENT 'sha256 of text, mirrors students.resume_hash',
+    text LONGTEXT,
+    features JSON COMMENT 'EnhancedResumeParser.parse output',
+    parser_version INT NOT NULL,
+    extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+);
+
 -- ==================== 5. SKILL ASSESSMENTS & GAP ANALYSIS ====================
 CREATE TABLE student_skill_assessments (
     id INT PRIMARY KEY AUTO_INCREMENT,
@@ -197,3 +218,64 @@ CREATE TABLE application_rounds (
     INDEX idx_app_round_app (application_id),
     INDEX idx_app_round_round (hiring_round_id)
 );
+
+-- ==================== 8. BACKGROUND JOBS ====================
+-- Slow external work (Gemini, Groq, Google Drive) run by backend/job_queue.py
+DROP TABLE IF EXISTS background_jobs;
+
+CREATE TABLE background_jobs (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    job_type VARCHAR(50) NOT NULL,
+    status ENUM('Queued', 'Running', 'Succeeded', 'Failed') NOT NULL DEFAULT 'Queued',
+    payload JSON,
+    result JSON,
+    error TEXT,
+    user_id INT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    timeout_seconds INT NOT NULL,
+    next_run_at DATETIME NULL COMMENT 'Retry backoff; NULL means run now',
+    lease_expires_at DATETIME NULL COMMENT 'Running jobs past this are requeued',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_job_status_type (status, job_type, next_run_at)
+);
+
+-- ==================== 9. STUDENT-JOB ELIGIBILITY ====================
+-- Materialized eligibility maintained by backend/eligibility.py
+-- reasons bitmask: 1 = CGPA, 2 = branch, 4 = batch not mapped to the job's session
+DROP TABLE IF EXISTS student_job_eligibility;
+
+CREATE TABLE student_job_eligibility (
+    student_id INT NOT NULL,
+    job_id INT NOT NULL,
+    is_eligible BOOLEAN NOT NULL DEFAULT TRUE,
+    reasons INT NOT NULL DEFAULT 0,
+    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, job_id),
+    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE,
+    INDEX idx_job_eligible (job_id, is_eligible)
+);
+
+-- ==================== 10. PLACEMENT SNAPSHOTS ====================
+-- Per-student placement state rolled up into placement_stats by backend/placement_snapshots.py
+DROP TABLE IF EXISTS student_placement_state;
+
+CREATE TABLE student_placement_state (
+    student_id INT PRIMARY KEY,
+    branch_code VARCHAR(20),
+    is_placed BOOLEAN NOT NULL DEFAULT FALSE,
+    best_ctc DECIMAL(12,2) COMMENT 'Highest annual CTC among Sent/Accepted offers',
+    offers INT NOT NULL DEFAULT 0,
+    applications INT NOT NULL DEFAULT 0,
+    refreshed_at DATETIME,
+    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+    INDEX idx_placement_state_branch (branch_code)
+);
+
+-- Watermark for incremental refreshes (offer_letters gets idx_offer_updated from
+-- backend/add_placement_snapshot_tables.py, as the table is created by the ORM)
+CREATE INDEX idx_application_updated ON applications(updated_at);